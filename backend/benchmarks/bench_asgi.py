@@ -0,0 +1,150 @@
+"""
+Slow clients on the WSGI path (thread pool) vs the ASGI path (async endpoints).
+Every client needs `delay` seconds to receive its response, like a mobile user
+on a poor network. A WSGI worker thread is held for that time, so the number of
+requests in progress is capped by the thread count; the async endpoints keep
+serving while the event loop waits on the clients.
+Usage: python -m benchmarks.bench_asgi [clients] [delay seconds] [wsgi threads]
+"""
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from benchmarks.common import create_tasks, report, setup_django, test_database
+
+
+class InFlight:
+    """Number of requests in progress, and its peak"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = self.peak = 0
+
+    def __enter__(self):
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc_info):
+        with self.lock:
+            self.current -= 1
+
+
+def run_wsgi(handler, path, token, clients, delay, threads):
+    in_flight = InFlight()
+
+    def client(submitted):
+        with in_flight:
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': 'pagination=cursor',
+                'HTTP_AUTHORIZATION': f'Bearer {token}', 'HTTP_ACCEPT': 'application/json',
+            }
+            setup_testing_defaults(environ)
+            statuses = []
+            body = handler(environ, lambda status, headers, exc_info=None: statuses.append(status))
+            for _ in body:
+                time.sleep(delay)  # the worker thread is blocked writing to the slow client
+            body.close()
+            assert statuses[0].startswith('200'), statuses
+        return time.perf_counter() - submitted
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(client, [time.perf_counter()] * clients))
+    return time.perf_counter() - start, latencies, in_flight.peak
+
+
+def run_asgi(application, path, token, clients, delay):
+    in_flight = InFlight()
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': b'', 'root_path': '',
+        'headers': [
+            (b'host', b'127.0.0.1'),
+            (b'authorization', f'Bearer {token}'.encode()),
+            (b'accept', b'application/json'),
+        ],
+        'client': ('127.0.0.1', 50000), 'server': ('127.0.0.1', 80),
+    }
+
+    async def client():
+        submitted = time.perf_counter()
+        requested = False
+        statuses = []
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await asyncio.Future()  # the client never disconnects
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                statuses.append(message['status'])
+            elif message['type'] == 'http.response.body':
+                await asyncio.sleep(delay)  # slow client: only this coroutine waits
+
+        with in_flight:
+            await application(dict(scope), receive, send)
+        assert statuses == [200], statuses
+        return time.perf_counter() - submitted
+
+    async def main():
+        return await asyncio.gather(*(client() for _ in range(clients)))
+
+    start = time.perf_counter()
+    latencies = asyncio.run(main())
+    return time.perf_counter() - start, latencies, in_flight.peak
+
+
+def summary(elapsed, latencies, peak, clients):
+    latencies = sorted(latencies)
+    return (
+        f"{clients / elapsed:7.1f} req/s  wall {elapsed:6.2f} s  "
+        f"median {latencies[len(latencies) // 2] * 1000:7.0f} ms  "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:7.0f} ms  "
+        f"peak in progress {peak}"
+    )
+
+
+def main(clients, delay, threads):
+    from django.conf import settings
+    from django.core.handlers.asgi import ASGIHandler
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test.utils import override_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    token = AccessToken.for_user(create_tasks('bench', 50))
+    asgi_middleware = [
+        'complice_taches.middleware.AsyncWhiteNoiseMiddleware' if path == 'whitenoise.middleware.WhiteNoiseMiddleware'
+        else path for path in settings.MIDDLEWARE
+    ]
+    # Both paths read from the database: no response cache
+    with override_settings(TASK_CACHE_ENABLED=False):
+        wsgi = WSGIHandler()
+        with override_settings(MIDDLEWARE=asgi_middleware):
+            asgi = ASGIHandler()
+
+        rows = [
+            (f"WSGI, {threads} threads, /api/tasks/",
+             summary(*run_wsgi(wsgi, '/api/tasks/', token, clients, delay, threads), clients)),
+            ("ASGI, async view, /api/async/tasks/",
+             summary(*run_asgi(asgi, '/api/async/tasks/', token, clients, delay), clients)),
+        ]
+    report(f"{clients} concurrent clients, {delay * 1000:.0f} ms to receive each response", rows)
+
+
+if __name__ == '__main__':
+    setup_django()
+    args = sys.argv[1:]
+    with test_database():
+        main(
+            int(args[0]) if len(args) > 0 else 200,
+            float(args[1]) if len(args) > 1 else 0.2,
+            int(args[2]) if len(args) > 2 else 8,
+        )
@@ -0,0 +1,49 @@
+"""
+Requests per second on /api/user/me/ with and without the cached JWT user lookup.
+Usage: python -m benchmarks.bench_jwt_auth [requests]
+"""
+import sys
+import time
+
+from benchmarks.common import report, setup_django, test_database
+
+AUTHENTICATION_CLASSES = {
+    'JWTAuthentication (SELECT per request)':
+        'rest_framework_simplejwt.authentication.JWTAuthentication',
+    'CachedJWTAuthentication':
+        'users_app.authentication.CachedJWTAuthentication',
+}
+
+
+def main(count):
+    from unittest import mock
+
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+    from django.utils.module_loading import import_string
+    from rest_framework.views import APIView
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    user = User.objects.create_user(username='bench', password='bench-pwd')
+    client = Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+    rows = []
+    for label, path in AUTHENTICATION_CLASSES.items():
+        # APIView binds the default authentication classes at import time
+        with mock.patch.object(APIView, 'authentication_classes', [import_string(path)]):
+            client.get('/api/user/me/')  # warm up
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                for _ in range(count):
+                    assert client.get('/api/user/me/').status_code == 200
+                elapsed = time.perf_counter() - start
+        rows.append((label, f"{count / elapsed:>8,.0f} req/s  {len(queries) / count:.1f} queries/req"))
+    report(f"GET /api/user/me/ x {count} (in-process test client)", rows)
+
+
+if __name__ == '__main__':
+    setup_django()
+    with test_database():
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
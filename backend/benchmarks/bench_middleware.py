@@ -0,0 +1,55 @@
+"""
+Latency of GET /api/tasks/ through the full middleware stack vs the lean API chain.
+Usage: python -m benchmarks.bench_middleware [requests]
+"""
+import statistics
+import sys
+import time
+
+from benchmarks.common import create_tasks, report, setup_django, test_database
+
+
+def measure(client, count):
+    client.get('/api/tasks/')  # warm up
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        assert client.get('/api/tasks/').status_code == 200
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.mean(samples), samples[len(samples) // 2], samples[int(len(samples) * 0.99)]
+
+
+def main(count):
+    from django.conf import settings
+    from django.test import Client
+    from django.test.utils import override_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    user = create_tasks('bench', 50)
+    headers = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}', 'HTTP_ACCEPT': 'application/json'}
+    base = [path for path in settings.MIDDLEWARE if path != 'complice_taches.middleware.FullStackMiddleware'
+            and path not in settings.FULL_STACK_MIDDLEWARE]
+    stacks = {
+        'Full middleware stack': base + settings.FULL_STACK_MIDDLEWARE,
+        'Lean API chain': base + ['complice_taches.middleware.FullStackMiddleware'],
+    }
+
+    rows = []
+    # Cached responses would hide the middleware cost behind the cache hit path and
+    # vice versa: measure both
+    for cached in (False, True):
+        for label, middleware in stacks.items():
+            with override_settings(MIDDLEWARE=middleware, TASK_CACHE_ENABLED=cached):
+                mean, median, p99 = measure(Client(**headers), count)
+            rows.append((
+                f"{label}{' (cache hit)' if cached else ''}",
+                f"mean {mean:.3f} ms  median {median:.3f} ms  p99 {p99:.3f} ms",
+            ))
+    report(f"GET /api/tasks/ x {count} (in-process test client)", rows)
+
+
+if __name__ == '__main__':
+    setup_django()
+    with test_database():
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
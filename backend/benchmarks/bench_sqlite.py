@@ -0,0 +1,107 @@
+"""
+Mixed task reads and writes from concurrent threads on a SQLite file, with the
+default configuration and with SQLITE_TUNED (WAL, pragmas, IMMEDIATE write
+transactions, persistent connections).
+Every operation ends like a request does (close_old_connections), so without
+persistent connections each one opens a new connection.
+Usage: python -m benchmarks.bench_sqlite [threads] [seconds] [write share 0-1]
+"""
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.common import report, setup_django
+
+
+def configure(path, tuned):
+    """Point the default database at a new file, migrated, in the given mode"""
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import connections
+
+    connections.close_all()
+    settings.SQLITE_TUNED = tuned
+    database = connections.settings['default']
+    database['NAME'] = str(path)
+    database['CONN_MAX_AGE'] = 600 if tuned else 0
+    database['OPTIONS'] = {'transaction_mode': 'IMMEDIATE'} if tuned else {}
+    # Fresh wrapper for this thread, built from the updated settings
+    del connections['default']
+    call_command('migrate', verbosity=0)
+
+
+def run(threads, seconds, write_share):
+    from django.contrib.auth.models import User
+    from django.db import OperationalError, close_old_connections, connection
+    from todolist_app.models import TaskList
+
+    users = [User.objects.create_user(username=f'bench{i}', password='bench-pwd') for i in range(threads)]
+    for user in users:
+        TaskList.objects.bulk_create(TaskList(gestionnaire=user, task=f"Tâche {i}") for i in range(200))
+    connection.close()
+
+    counts = {'reads': 0, 'writes': 0, 'locked': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def worker(user):
+        done = {'reads': 0, 'writes': 0, 'locked': 0}
+        tasks = TaskList.objects.filter(gestionnaire=user)
+        while time.monotonic() < deadline:
+            try:
+                if random.random() < write_share:
+                    if random.random() < 0.5:
+                        TaskList(gestionnaire=user, task="Nouvelle tâche").save()
+                    else:
+                        pk = tasks.order_by('?').values_list('pk', flat=True).first()
+                        tasks.set_done(pk, random.random() < 0.5)
+                    done['writes'] += 1
+                else:
+                    list(tasks.order_by('-created_at').read_values()[:50])
+                    done['reads'] += 1
+            except OperationalError as exc:
+                if 'locked' not in str(exc):
+                    raise
+                done['locked'] += 1
+            finally:
+                close_old_connections()
+        connection.close()
+        with lock:
+            for name, value in done.items():
+                counts[name] += value
+
+    pool = [threading.Thread(target=worker, args=(user,)) for user in users]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return (
+        f"{counts['reads'] / elapsed:7.0f} reads/s  {counts['writes'] / elapsed:6.0f} writes/s  "
+        f"{counts['locked']:5} 'database is locked' errors"
+    )
+
+
+def main(threads, seconds, write_share):
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for label, tuned in (("default (rollback journal)", False), ("SQLITE_TUNED (WAL)", True)):
+            configure(Path(directory) / f'{"tuned" if tuned else "default"}.sqlite3', tuned)
+            rows.append((label, run(threads, seconds, write_share)))
+        from django.db import connections
+        connections.close_all()
+    report(f"{threads} threads for {seconds} s, {write_share:.0%} writes", rows)
+
+
+if __name__ == '__main__':
+    setup_django()
+    args = sys.argv[1:]
+    main(
+        int(args[0]) if len(args) > 0 else 8,
+        float(args[1]) if len(args) > 1 else 5,
+        float(args[2]) if len(args) > 2 else 0.3,
+    )
@@ -0,0 +1,42 @@
+"""
+Rows per second of TaskSerializer vs the TaskReadSerializer fast path.
+Usage: python -m benchmarks.bench_task_serializer [rows]
+"""
+import sys
+
+from benchmarks.common import create_tasks, report, setup_django, test_database, timed
+
+
+def main(count):
+    from rest_framework.renderers import JSONRenderer
+    from todolist_app.models import TaskList
+    from todolist_app.serializers import TaskReadSerializer, TaskSerializer
+
+    create_tasks('bench', count)
+    queryset = TaskList.objects.order_by('-created_at', '-id')
+    instances = list(queryset.with_owner())
+    rows = list(queryset.read_values())
+
+    assert JSONRenderer().render(TaskSerializer(instances, many=True).data) == \
+        JSONRenderer().render(TaskReadSerializer(rows, many=True).data)
+
+    results = {
+        'TaskSerializer (serialize only)':
+            timed(lambda: TaskSerializer(instances, many=True).data),
+        'TaskReadSerializer (serialize only)':
+            timed(lambda: TaskReadSerializer(rows, many=True).data),
+        'TaskSerializer (query + serialize)':
+            timed(lambda: TaskSerializer(queryset.with_owner(), many=True).data),
+        'TaskReadSerializer (query + serialize)':
+            timed(lambda: TaskReadSerializer(queryset.read_values(), many=True).data),
+    }
+    report(
+        f"Serialization of {count} tasks (best of 5)",
+        [(label, f"{count / seconds:>12,.0f} rows/s") for label, seconds in results.items()],
+    )
+
+
+if __name__ == '__main__':
+    setup_django()
+    with test_database():
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,63 @@
+"""
+Shared helpers for the benchmark scripts.
+Run them from the backend directory, e.g. `python -m benchmarks.bench_task_serializer`.
+Each benchmark runs against a throw-away test database, never against db.sqlite3.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'complice_taches.settings')
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Create the test database for the duration of the benchmark"""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def create_tasks(username, count, batch_size=1000):
+    """Create a user owning `count` tasks"""
+    from django.contrib.auth.models import User
+    from todolist_app.models import TaskList
+
+    user = User.objects.create_user(username=username, password='bench-pwd')
+    TaskList.objects.bulk_create(
+        (TaskList(gestionnaire=user, task=f"Benchmark task {i}", done=i % 3 == 0)
+         for i in range(count)),
+        batch_size=batch_size,
+    )
+    return user
+
+
+def timed(func, repeat=5):
+    """Best wall-clock time of `repeat` runs, in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(title, rows):
+    """Print a small aligned table of (label, value) rows"""
+    print(title)
+    width = max(len(label) for label, _ in rows)
+    for label, value in rows:
+        print(f"  {label.ljust(width)}  {value}")
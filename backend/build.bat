@@ -4,6 +4,7 @@ pip install -r requirements.txt
 
 echo Applying database migrations...
 python manage.py migrate
+python manage.py createcachetable
 
 echo Collecting static files...
 python manage.py collectstatic --no-input
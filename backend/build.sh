@@ -7,6 +7,7 @@ pip install -r requirements.txt
 
 # Apply database migrations
 python manage.py migrate
+python manage.py createcachetable
 
 # Collect static files
 python manage.py collectstatic --no-input
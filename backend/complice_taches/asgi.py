@@ -3,6 +3,10 @@ ASGI config for complice_taches project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serving through ASGI turns on ASGI_MODE (async-capable middleware only), so the
+async endpoints (/api/async/...) handle many slow clients in one process:
+    gunicorn complice_taches.asgi:application -k uvicorn.workers.UvicornWorker
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -12,5 +16,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'complice_taches.settings')
+os.environ.setdefault('ASGI_MODE', 'True')
 
 application = get_asgi_application()
@@ -0,0 +1,202 @@
+"""
+Per-request performance instrumentation.
+
+PerformanceMiddleware records, for every request: the number of SQL queries and
+the time spent in them (through connection.execute_wrapper), the view time, the
+serialization time (DRF response rendering plus blocks wrapped in
+`timing('serialize')`) and the total time. They are logged on the
+`complice_taches.performance` logger, and sent back in a Server-Timing header to
+staff users only, unless PERFORMANCE_SERVER_TIMING sends it to everyone; requests over
+PERFORMANCE_QUERY_BUDGET queries are logged as warnings with their most repeated
+statements, which is what an N+1 query looks like.
+"""
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('complice_taches.performance')
+
+_current = ContextVar('request_metrics', default=None)
+
+# Fields of the log records, for JsonFormatter
+FIELDS = (
+    'method', 'path', 'status', 'queries', 'db_ms', 'serialize_ms', 'view_ms', 'total_ms',
+    'budget', 'repeated_queries',
+)
+
+
+class RequestMetrics:
+    """Timings of one request; also the execute_wrapper of its database connections"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+        self.timings = Counter()  # named blocks, e.g. 'serialize'
+        self.view_start = None
+        self.view_end = None
+        self.render_start = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+            self.statements[sql] += 1
+
+    def rendered(self, response):
+        self.timings['serialize'] += time.perf_counter() - self.render_start
+        return response
+
+    def as_dict(self, total):
+        view = 0.0
+        if self.view_start is not None:
+            view = (self.view_end or self.start + total) - self.view_start
+        return {
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 2),
+            'serialize_ms': round(self.timings['serialize'] * 1000, 2),
+            'view_ms': round(view * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+        }
+
+
+@contextmanager
+def timing(name):
+    """Add the duration of the block to the current request's `name` timing"""
+    metrics = _current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.timings[name] += time.perf_counter() - start
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with the FIELDS set on it (see LOGGING)"""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in FIELDS:
+            if hasattr(record, field):
+                data[field] = getattr(record, field)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def server_timing(values):
+    return (
+        f"db;dur={values['db_ms']};desc=\"{values['queries']} queries\", "
+        f"serialize;dur={values['serialize_ms']}, "
+        f"view;dur={values['view_ms']}, "
+        f"total;dur={values['total_ms']}"
+    )
+
+
+class PerformanceMiddleware:
+    """Records the timings of each request (see the module docstring); sync and async"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            self.process_view = self._aprocess_view
+            self.process_template_response = self._aprocess_template_response
+        self.budget = getattr(settings, 'PERFORMANCE_QUERY_BUDGET', None)
+        self.header = getattr(settings, 'PERFORMANCE_SERVER_TIMING', False)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with self._instrument(metrics):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with self._instrument(metrics):
+                response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics)
+
+    @contextmanager
+    def _instrument(self, metrics):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            yield
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.view_start = time.perf_counter()
+        return None
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        return self.__class__.process_view(self, request, view_func, view_args, view_kwargs)
+
+    def process_template_response(self, request, response):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.view_end = metrics.render_start = time.perf_counter()
+            response.add_post_render_callback(metrics.rendered)
+        return response
+
+    async def _aprocess_template_response(self, request, response):
+        return self.__class__.process_template_response(self, request, response)
+
+    def _finish(self, request, response, metrics):
+        values = metrics.as_dict(time.perf_counter() - metrics.start)
+        request.performance = values  # for MetricsMiddleware
+        # request.user is the JWT user here: DRF sets it on the request during the view
+        if self.header or getattr(getattr(request, 'user', None), 'is_staff', False):
+            response['Server-Timing'] = server_timing(values)
+
+        extra = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **values,
+        }
+        message = (
+            f"{request.method} {request.path} {response.status_code} "
+            f"{values['total_ms']}ms, {values['queries']} queries ({values['db_ms']}ms)"
+        )
+        if self.budget is not None and metrics.queries > self.budget:
+            repeated = [
+                {'count': count, 'sql': sql[:300]}
+                for sql, count in metrics.statements.most_common(3) if count > 1
+            ]
+            logger.warning(
+                "Query budget exceeded (%s > %s): %s", metrics.queries, self.budget, message,
+                extra={**extra, 'budget': self.budget, 'repeated_queries': repeated},
+            )
+        else:
+            logger.info(message, extra=extra)
+        return response
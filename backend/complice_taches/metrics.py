@@ -0,0 +1,301 @@
+"""
+Prometheus metrics (text exposition format) at /metrics.
+
+MetricsMiddleware counts the requests of the API (METRICS_PATH_PREFIXES) by route
+(URL name), method and status, and observes their latency in a histogram. The
+queries and DB time measured by PerformanceMiddleware, the database connections
+opened and the task response cache stats are exported too.
+
+Every worker process keeps its metrics in memory and writes them to its own file
+in METRICS_DIR (at most every METRICS_FLUSH_SECONDS); /metrics adds up the files
+of all workers, so any worker can answer the scrape. When a worker starts, the
+files of stopped workers are added up into a single file, so that counters never
+go backwards and METRICS_DIR does not grow with every restart.
+"""
+import hmac
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: stopped workers' files are not merged
+    fcntl = None
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS = {
+    'http_requests_total': ('counter', "API requests by route, method and status"),
+    'http_request_duration_seconds': ('histogram', "API request latency by route and method"),
+    'db_queries_total': ('counter', "SQL queries run by API requests"),
+    'db_query_duration_seconds_total': ('counter', "Time spent in SQL queries by API requests"),
+    'db_connections_opened_total': ('counter', "Database connections opened, by alias"),
+    'task_cache_operations_total': ('counter', "Task response cache operations (todolist_app/cache.py)"),
+}
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Metrics of the stopped workers, added up
+STOPPED_WORKERS_FILE = 'stopped-workers.json'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def metrics_dir():
+    return Path(_setting('METRICS_DIR', Path(tempfile.gettempdir()) / 'complice_taches-metrics'))
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class Registry:
+    """The metrics of this process, and their file in METRICS_DIR"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}  # key: [count per bucket..., sum]
+        # pid and a random part: a recycled pid never overwrites a stopped worker's file
+        self.file_name = f'{os.getpid()}-{uuid.uuid4().hex[:8]}.json'
+        self._flushed_at = 0.0
+        self._timer = None
+
+    def inc(self, name, labels, amount=1):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        key = _key(name, labels)
+        with self._lock:
+            values = self.histograms.get(key)
+            if values is None:
+                values = self.histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+            for index, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    values[index] += 1
+                    break
+            else:
+                values[len(BUCKETS)] += 1  # +Inf
+            values[-1] += value
+
+    def snapshot(self):
+        from todolist_app import cache
+        with self._lock:
+            counters = [[name, dict(labels), value] for (name, labels), value in self.counters.items()]
+            histograms = [[name, dict(labels), list(values)] for (name, labels), values in self.histograms.items()]
+        counters += [
+            ['task_cache_operations_total', {'operation': operation}, count]
+            for operation, count in cache.get_stats().items()
+        ]
+        return {'counters': counters, 'histograms': histograms}
+
+    def flush(self):
+        """Write the metrics of this process to its file"""
+        directory = metrics_dir()
+        with self._flush_lock:
+            directory.mkdir(parents=True, exist_ok=True)
+            temporary = directory / f'.{self.file_name}.tmp'
+            temporary.write_text(json.dumps(self.snapshot()))
+            os.replace(temporary, directory / self.file_name)
+        with self._lock:
+            self._flushed_at = time.monotonic()
+            self._timer = None
+
+    def schedule_flush(self):
+        """Flush now if the last flush is old enough, otherwise once it is"""
+        interval = _setting('METRICS_FLUSH_SECONDS', 1)
+        with self._lock:
+            wait = self._flushed_at + interval - time.monotonic()
+            if wait > 0:
+                if self._timer is None:
+                    self._timer = threading.Timer(wait, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        self.flush()
+
+
+registry = Registry()
+
+
+def on_connection_created(sender, connection, **kwargs):
+    registry.inc('db_connections_opened_total', {'alias': connection.alias, 'vendor': connection.vendor})
+
+
+def collect(directory=None):
+    """The metrics of all workers added up: ({key: value}, {key: histogram values})"""
+    return _add_up(Path(directory or metrics_dir()).glob('*.json'))
+
+
+def _add_up(files):
+    counters, histograms = {}, {}
+    for file in files:
+        try:
+            data = json.loads(file.read_text())
+        except (OSError, ValueError):  # replaced or removed while read
+            continue
+        for name, labels, value in data['counters']:
+            key = _key(name, labels)
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, values in data['histograms']:
+            key = _key(name, labels)
+            total = histograms.get(key)
+            histograms[key] = values if total is None else [a + b for a, b in zip(total, values)]
+    return counters, histograms
+
+
+def _worker_stopped(file):
+    pid = file.name.split('-', 1)[0]
+    if not pid.isdigit() or int(pid) == os.getpid():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:  # running, as another user
+        return False
+    return False
+
+
+@contextmanager
+def _locked(directory):
+    with open(directory / '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def merge_stopped_workers(directory=None):
+    """Add up the files of the stopped workers (of this host) into STOPPED_WORKERS_FILE"""
+    directory = Path(directory or metrics_dir())
+    if fcntl is None or not directory.is_dir():
+        return
+    with _locked(directory):
+        stopped = [file for file in directory.glob('*.json') if _worker_stopped(file)]
+        if not stopped:
+            return
+        merged = directory / STOPPED_WORKERS_FILE
+        counters, histograms = _add_up([merged, *stopped])
+        temporary = directory / f'.{STOPPED_WORKERS_FILE}.tmp'
+        temporary.write_text(json.dumps({
+            'counters': [[name, dict(labels), value] for (name, labels), value in counters.items()],
+            'histograms': [[name, dict(labels), values] for (name, labels), values in histograms.items()],
+        }))
+        os.replace(temporary, merged)
+        for file in stopped:
+            file.unlink(missing_ok=True)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+def render(counters, histograms):
+    """The text exposition format of collect()'s result"""
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        samples = sorted((labels, value) for (metric, labels), value in counters.items() if metric == name)
+        series = sorted((labels, values) for (metric, labels), values in histograms.items() if metric == name)
+        if not samples and not series:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in samples:
+            lines.append(f'{name}{_labels(labels)} {_number(value)}')
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ('+Inf',), values):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(values[-1])}')
+            lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """Metrics of all workers; needs `Authorization: Bearer <METRICS_TOKEN>` (or DEBUG)"""
+    token = _setting('METRICS_TOKEN', '')
+    if token:
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if not hmac.compare_digest(header.encode(), f'Bearer {token}'.encode()):
+            response = HttpResponse('Unauthorized\n', status=401, content_type=CONTENT_TYPE)
+            response['WWW-Authenticate'] = 'Bearer realm="metrics"'
+            return response
+    elif not settings.DEBUG:
+        raise Http404
+    registry.flush()
+    return HttpResponse(render(*collect()), content_type=CONTENT_TYPE)
+
+
+class MetricsMiddleware:
+    """Records the API requests in the registry (see the module docstring); sync and async"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.prefixes = tuple(_setting('METRICS_PATH_PREFIXES', ['/api/']))
+        merge_stopped_workers()
+        connection_created.connect(on_connection_created, dispatch_uid='complice_taches.metrics')
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, elapsed):
+        if not request.path_info.startswith(self.prefixes):
+            return
+        match = request.resolver_match
+        route = match.view_name if match is not None else 'unmatched'
+        registry.inc('http_requests_total', {
+            'route': route, 'method': request.method, 'status': str(response.status_code),
+        })
+        registry.observe('http_request_duration_seconds', {'route': route, 'method': request.method}, elapsed)
+        performance = getattr(request, 'performance', None)
+        if performance is not None:
+            registry.inc('db_queries_total', {'route': route}, performance['queries'])
+            registry.inc('db_query_duration_seconds_total', {'route': route}, performance['db_ms'] / 1000)
+        registry.schedule_flush()
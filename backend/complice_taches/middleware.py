@@ -0,0 +1,169 @@
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.exception import convert_exception_to_response
+from django.utils.module_loading import import_string
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+def is_lean_api_request(request):
+    """
+    JWT API calls that need none of the session/CSRF/auth/messages/clickjacking
+    middleware. The browsable API (HTML) keeps the full stack.
+    """
+    if not request.path_info.startswith(tuple(settings.LEAN_API_PREFIXES)):
+        return False
+    if request.GET.get('format') == 'api':
+        return False
+    return 'text/html' not in request.META.get('HTTP_ACCEPT', '')
+
+
+def adapt(is_async, method):
+    """Make `method` sync or async, like django.core.handlers.base.BaseHandler.adapt_method_mode"""
+    if is_async and not iscoroutinefunction(method):
+        return sync_to_async(method, thread_sensitive=True)
+    if not is_async and iscoroutinefunction(method):
+        return async_to_sync(method)
+    return method
+
+
+class FullStackMiddleware:
+    """
+    Runs settings.FULL_STACK_MIDDLEWARE for every request except lean API calls,
+    which go straight to the view. The inner chain is built exactly like Django
+    builds settings.MIDDLEWARE, including process_view/process_exception/
+    process_template_response hooks, so admin and browsable API behave as before.
+
+    Under ASGI it runs in async mode, so lean API calls never go through a thread
+    (Django would run the sync hooks of the inner middleware in one).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            self.process_view = self._aprocess_view
+            self.process_template_response = self._aprocess_template_response
+        self._view_middleware = []
+        self._template_response_middleware = []
+        self._exception_middleware = []
+
+        handler = get_response
+        for middleware_path in reversed(settings.FULL_STACK_MIDDLEWARE):
+            middleware_class = import_string(middleware_path)
+            if self.async_mode:
+                middleware_is_async = getattr(middleware_class, 'async_capable', False)
+            else:
+                middleware_is_async = not getattr(middleware_class, 'sync_capable', True)
+            try:
+                middleware = middleware_class(adapt(middleware_is_async, handler))
+            except MiddlewareNotUsed:
+                continue
+            if hasattr(middleware, 'process_view'):
+                self._view_middleware.insert(0, adapt(self.async_mode, middleware.process_view))
+            if hasattr(middleware, 'process_template_response'):
+                self._template_response_middleware.append(
+                    adapt(self.async_mode, middleware.process_template_response)
+                )
+            if hasattr(middleware, 'process_exception'):
+                # Django always calls exception middleware synchronously
+                self._exception_middleware.append(adapt(False, middleware.process_exception))
+            handler = convert_exception_to_response(middleware)
+        self.full_stack = adapt(self.async_mode, handler)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        request.lean_api = is_lean_api_request(request)
+        if request.lean_api:
+            return self.get_response(request)
+        return self.full_stack(request)
+
+    async def __acall__(self, request):
+        request.lean_api = is_lean_api_request(request)
+        if request.lean_api:
+            return await self.get_response(request)
+        return await self.full_stack(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.lean_api:
+            return None
+        for process_view in self._view_middleware:
+            response = process_view(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        if request.lean_api:
+            return None
+        for process_view in self._view_middleware:
+            response = await process_view(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    def process_template_response(self, request, response):
+        if not request.lean_api:
+            for process_template_response in self._template_response_middleware:
+                response = process_template_response(request, response)
+        return response
+
+    async def _aprocess_template_response(self, request, response):
+        if not request.lean_api:
+            for process_template_response in self._template_response_middleware:
+                response = await process_template_response(request, response)
+        return response
+
+    def process_exception(self, request, exception):
+        if request.lean_api:
+            return None
+        for process_exception in self._exception_middleware:
+            response = process_exception(request, exception)
+            if response is not None:
+                return response
+        return None
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware for the ASGI deployment. WhiteNoise is sync-only: in
+    settings.MIDDLEWARE it would make Django run the rest of every request in a
+    thread. Looking up and opening a static file does not block, so do it inline;
+    the file is read in a worker thread that does not queue behind the ORM.
+    """
+    sync_capable = False
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        markcoroutinefunction(self)
+
+    async def __call__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            response = self.serve(static_file, request)
+            if response.streaming and not response.is_async:
+                response.streaming_content = read_in_thread(response)
+            return response
+        return await self.get_response(request)
+
+
+async def read_in_thread(response):
+    """Stream a FileResponse chunk by chunk, each read in a worker thread"""
+    iterator = iter(response.streaming_content)
+    read = sync_to_async(next, thread_sensitive=False)
+    try:
+        while (chunk := await read(iterator, None)) is not None:
+            yield chunk
+    finally:
+        # response.close() would close it too, but also sends request_finished
+        file = getattr(response, 'file_to_stream', None)
+        if file is not None:
+            file.close()
@@ -0,0 +1,135 @@
+"""
+Opt-in request profiling (settings.PROFILING_ENABLED).
+
+ProfilingMiddleware runs a request under cProfile when it is sampled
+(PROFILING_SAMPLE_RATE, 0.0 to 1.0) or when a staff user sends the
+PROFILING_HEADER header (X-Profile: 1) with a JWT. Each profile is saved in
+PROFILING_DIR as a pstats file named after the request; only the newest
+PROFILING_MAX_FILES are kept, so the directory works as a ring whatever the
+number of workers writing to it. `manage.py profiles` lists and summarizes them.
+
+When PROFILING_ENABLED is off the middleware is not installed at all. It is
+sync only: under ASGI, turning profiling on makes Django run requests in a thread.
+"""
+import cProfile
+import logging
+import os
+import random
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SUFFIX = '.prof'
+# 20261018T101500123456-4242-GET-api~tasks-125ms.prof ('/' of the path as '~')
+NAME_PATTERN = re.compile(
+    r'^(?P<time>\d{8}T\d{12})-(?P<pid>\d+)-(?P<method>[A-Z]+)-(?P<path>.*)-(?P<ms>\d+)ms\.prof$'
+)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def profile_dir():
+    return Path(_setting('PROFILING_DIR', Path(settings.BASE_DIR) / '.profiles'))
+
+
+def profile_name(request, elapsed):
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+    path = re.sub(r'[^A-Za-z0-9_.~-]+', '_', request.path.strip('/').replace('/', '~'))[:80]
+    return f"{stamp}-{os.getpid()}-{request.method}-{path}-{round(elapsed * 1000)}ms{SUFFIX}"
+
+
+def list_profiles(directory=None):
+    """Profiles of the ring, oldest first: dicts with the request details and `file`"""
+    directory = Path(directory or profile_dir())
+    if not directory.is_dir():
+        return []
+    profiles = []
+    for file in sorted(directory.glob(f'*{SUFFIX}')):
+        match = NAME_PATTERN.match(file.name)
+        if match is None:
+            continue
+        profiles.append({
+            'time': datetime.strptime(match['time'], '%Y%m%dT%H%M%S%f').replace(tzinfo=timezone.utc),
+            'pid': int(match['pid']),
+            'method': match['method'],
+            'path': '/' + match['path'].replace('~', '/'),
+            'ms': int(match['ms']),
+            'file': file,
+        })
+    return profiles
+
+
+def save_profile(profiler, name, directory=None, max_files=None):
+    """Write the profile, then drop the oldest ones beyond `max_files`"""
+    directory = Path(directory or profile_dir())
+    max_files = max_files or _setting('PROFILING_MAX_FILES', 50)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / name
+    # Written under a temporary name so that readers never see a partial file
+    temporary = directory / f'.{name}.tmp'
+    profiler.dump_stats(temporary)
+    os.replace(temporary, path)
+
+    files = sorted(directory.glob(f'*{SUFFIX}'))
+    for old in files[:max(len(files) - max_files, 0)]:
+        try:
+            old.unlink()
+        except FileNotFoundError:  # removed by another worker
+            pass
+    return path
+
+
+def is_staff_request(request):
+    """A valid JWT of a staff user (request.user is not set yet on lean API calls)"""
+    from users_app.authentication import CachedJWTAuthentication
+    try:
+        result = CachedJWTAuthentication().authenticate(request)
+    except Exception:
+        return False
+    return result is not None and result[0].is_staff
+
+
+class ProfilingMiddleware:
+    """Profiles sampled requests and staff requests asking for it (see the module docstring)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = _setting('PROFILING_SAMPLE_RATE', 0.0)
+        self.header = 'HTTP_' + _setting('PROFILING_HEADER', 'X-Profile').upper().replace('-', '_')
+
+    def should_profile(self, request):
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        return bool(request.META.get(self.header)) and is_staff_request(request)
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another request of this process is being profiled (one profiler at a time)
+            return self.get_response(request)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        elapsed = time.perf_counter() - start
+
+        try:
+            path = save_profile(profiler, profile_name(request, elapsed))
+        except OSError:
+            logger.exception("Could not save the profile of %s %s", request.method, request.path)
+        else:
+            response['X-Profile-Id'] = path.name
+        return response
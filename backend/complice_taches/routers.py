@@ -0,0 +1,127 @@
+"""
+Read replica routing (settings.DATABASE_REPLICAS).
+
+Only the views using ReplicaReadsMixin read from a replica, and only for their
+read-only actions (TaskViewSet list/retrieve, the user list); every other query
+goes to the primary. A request stops using the replica once it writes
+(read-after-write), and users are pinned to the primary for REPLICA_PIN_SECONDS
+after a write: their own (end of the request) or one to their tasks (the
+tasks_changed signal, whatever the write path: API, admin, import...). Staff
+users see everyone's tasks, so any task write pins them all (ALL_USERS); the
+task response cache then never stores a lagging staff listing under the new
+version. Pins are kept in the default cache, which must be shared
+(CACHE_BACKEND=file or db) with several workers: see check_shared_pins().
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error
+
+# Apps whose models are replicated; anything else (e.g. the database cache) stays on the primary
+REPLICATED_APPS = {'todolist_app', 'auth'}
+
+# Pin scope of the staff users, who read the tasks of all users
+ALL_USERS = 'all'
+
+_request = ContextVar('replica_request', default=None)
+
+
+class _RequestState:
+    def __init__(self, user_id, use_replica):
+        self.user_id = user_id
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def _pin_key(user_id):
+    return f'db:pinned:{user_id}'
+
+
+def pin(user_ids):
+    """Send the reads of these users to the primary for REPLICA_PIN_SECONDS"""
+    if not get_replicas() or not user_ids:
+        return
+    timeout = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+    caches['default'].set_many({_pin_key(user_id): True for user_id in user_ids}, timeout)
+
+
+def is_pinned(user_id):
+    return caches['default'].get(_pin_key(user_id)) is not None
+
+
+def on_tasks_changed(sender, owner_ids, **kwargs):
+    pin([*owner_ids, ALL_USERS])
+
+
+def check_shared_pins(**kwargs):
+    """System check: pins kept in a per-process cache while several workers serve requests"""
+    workers = getattr(settings, 'WEB_CONCURRENCY', 1)
+    if get_replicas() and workers > 1 and isinstance(caches['default'], LocMemCache):
+        return [Error(
+            f"DATABASE_REPLICAS with a per-process default cache and WEB_CONCURRENCY={workers}: "
+            "the other workers would not see the pins and read stale data from the replicas.",
+            hint="Set CACHE_BACKEND=db (or file).",
+            id='complice_taches.E001',
+        )]
+    return []
+
+
+class ReplicaRouter:
+    """Reads of replica-enabled requests go to a random replica; writes go to the primary"""
+
+    def db_for_read(self, model, **hints):
+        state = _request.get()
+        if state is None or not state.use_replica or state.wrote:
+            return None
+        if model._meta.app_label not in REPLICATED_APPS:
+            return None
+        return random.choice(get_replicas())
+
+    def db_for_write(self, model, **hints):
+        state = _request.get()
+        if state is not None and model._meta.app_label in REPLICATED_APPS:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaReadsMixin:
+    """
+    For DRF views: the actions of `replica_actions` (ViewSets) or the methods of
+    `replica_methods` (other views) read from a replica.
+    """
+    replica_actions = ('list', 'retrieve')
+    replica_methods = ('GET',)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        user_id = request.user.id
+        if hasattr(self, 'action'):
+            eligible = self.action in self.replica_actions
+        else:
+            eligible = request.method in self.replica_methods
+        pinned = bool(user_id) and (is_pinned(user_id) or (request.user.is_staff and is_pinned(ALL_USERS)))
+        use_replica = eligible and bool(get_replicas()) and not pinned
+        self._replica_token = _request.set(_RequestState(user_id, use_replica))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            state = _request.get()
+            _request.reset(token)
+            self._replica_token = None
+            if state.wrote and state.user_id:
+                pin([state.user_id])
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 import dj_database_url
@@ -70,11 +71,8 @@ INSTALLED_APPS = [
     'todolist_app',
 ]
 
-MIDDLEWARE = [
-    'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
-    'corsheaders.middleware.CorsMiddleware',
-    'django.middleware.common.CommonMiddleware',
+# Only needed by the admin, the browsable API and /api-auth/
+FULL_STACK_MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -82,6 +80,67 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Lean API mode: JWT calls under these prefixes skip FULL_STACK_MIDDLEWARE
+# (see complice_taches/middleware.py)
+LEAN_API_MIDDLEWARE = os.environ.get('LEAN_API_MIDDLEWARE', 'True') == 'True'
+LEAN_API_PREFIXES = ['/api/']
+
+# ASGI mode (set by complice_taches/asgi.py): every middleware must be async-capable,
+# otherwise Django runs the rest of each request in a thread.
+ASGI_MODE = os.environ.get('ASGI_MODE', 'False') == 'True'
+
+# Per-request query count and timings (complice_taches/instrumentation.py):
+# a log record on the 'complice_taches.performance' logger for every request, and a
+# Server-Timing header for staff users, or for everyone with PERFORMANCE_SERVER_TIMING
+# (by default in DEBUG only: it tells any client the SQL query count and DB time)
+PERFORMANCE_INSTRUMENTATION = os.environ.get('PERFORMANCE_INSTRUMENTATION', 'True') == 'True'
+PERFORMANCE_SERVER_TIMING = os.environ.get('PERFORMANCE_SERVER_TIMING', str(DEBUG)) == 'True'
+# Requests running more SQL queries than this are logged as warnings (N+1 queries)
+PERFORMANCE_QUERY_BUDGET = int(os.environ.get('PERFORMANCE_QUERY_BUDGET', 20))
+
+# Prometheus metrics at /metrics (complice_taches/metrics.py). Each worker writes its
+# metrics to METRICS_DIR (outside the source tree), shared by the workers; without
+# METRICS_TOKEN the endpoint only answers in DEBUG.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'False') == 'True'
+METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'complice_taches-metrics'))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_FLUSH_SECONDS = 1
+METRICS_PATH_PREFIXES = ['/api/']
+
+# Opt-in cProfile of sampled requests, and of staff requests sending PROFILING_HEADER
+# (complice_taches/profiling.py; `manage.py profiles` to read them)
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False') == 'True'
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0.0))
+PROFILING_HEADER = 'X-Profile'
+PROFILING_DIR = os.environ.get('PROFILING_DIR', str(BASE_DIR / '.profiles'))
+PROFILING_MAX_FILES = 50
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'complice_taches.middleware.AsyncWhiteNoiseMiddleware' if ASGI_MODE
+    else 'whitenoise.middleware.WhiteNoiseMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.common.CommonMiddleware',
+]
+
+if LEAN_API_MIDDLEWARE:
+    MIDDLEWARE += ['complice_taches.middleware.FullStackMiddleware']
+    # The admin checks look for its middleware in MIDDLEWARE; they run inside FullStackMiddleware
+    SILENCED_SYSTEM_CHECKS = ['admin.E408', 'admin.E409', 'admin.E410']
+else:
+    MIDDLEWARE += FULL_STACK_MIDDLEWARE
+
+if PERFORMANCE_INSTRUMENTATION:
+    # First, so that its timings cover the other middleware
+    MIDDLEWARE.insert(0, 'complice_taches.instrumentation.PerformanceMiddleware')
+
+if METRICS_ENABLED:
+    # Outside PerformanceMiddleware, which measures the DB time of the requests for it
+    MIDDLEWARE.insert(0, 'complice_taches.metrics.MetricsMiddleware')
+
+if PROFILING_ENABLED:
+    MIDDLEWARE.insert(0, 'complice_taches.profiling.ProfilingMiddleware')
+
 ROOT_URLCONF = 'complice_taches.urls'
 
 TEMPLATES = [
@@ -100,16 +159,22 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'complice_taches.wsgi.application'
+ASGI_APPLICATION = 'complice_taches.asgi.application'
 
 # -------------------------------
 # Database Configuration
 # -------------------------------
+# Tuned SQLite for small deployments with concurrent writers: WAL journal and
+# pragmas, IMMEDIATE write transactions and persistent connections
+SQLITE_TUNED = os.environ.get('SQLITE_TUNED', 'False') == 'True'
+
 if IS_RENDER:
     # Render PostgreSQL database
     DATABASES = {
         'default': dj_database_url.config(
             default=os.environ.get('DATABASE_URL'),
-            conn_max_age=600,
+            # Persistent connections are not reused across async requests
+            conn_max_age=0 if ASGI_MODE else 600,
             ssl_require=True
         )
     }
@@ -121,6 +186,115 @@ else:
             'NAME': BASE_DIR / 'db.sqlite3',
         }
     }
+    if SQLITE_TUNED:
+        DATABASES['default'].update({
+            'CONN_MAX_AGE': 0 if ASGI_MODE else 600,
+            'CONN_HEALTH_CHECKS': True,
+            # Take the write lock when the transaction starts: a deferred transaction
+            # that starts writing after a read fails at once with "database is locked"
+            'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+        })
+
+# Applied to every new SQLite connection when SQLITE_TUNED (complice_taches/sqlite.py)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',        # readers and the writer no longer block each other
+    'synchronous': 'NORMAL',      # safe with WAL; no fsync per commit
+    'busy_timeout': 5000,         # ms to wait for the write lock
+    'cache_size': -20000,         # KiB (20 MB) of page cache per connection
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Read replicas (complice_taches/routers.py): the list/detail reads of tasks and
+# users go to one of DATABASE_REPLICAS, except for users who wrote in the last
+# REPLICA_PIN_SECONDS (the replica lag tolerated). On Render, DATABASE_REPLICA_URLS
+# is a comma-separated list of URLs; locally, SQLITE_REPLICA_PATH is a copy of
+# db.sqlite3 standing in for a replica.
+if IS_RENDER:
+    REPLICA_URLS = [url for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url]
+    for number, url in enumerate(REPLICA_URLS, 1):
+        DATABASES[f'replica{number}'] = dj_database_url.parse(
+            url, conn_max_age=0 if ASGI_MODE else 600, ssl_require=True
+        )
+elif os.environ.get('SQLITE_REPLICA_PATH'):
+    DATABASES['replica1'] = {**DATABASES['default'], 'NAME': os.environ['SQLITE_REPLICA_PATH']}
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+for alias in DATABASE_REPLICAS:
+    # Tests read the replicas from the test database
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+DATABASE_ROUTERS = ['complice_taches.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+
+# -------------------------------
+# Cache
+# -------------------------------
+# Local memory (one cache per process) by default in development, the database cache
+# on Render. CACHE_BACKEND=file or db shares the cache, and so cached task lists and
+# replica pins, between workers (for db, `python manage.py createcachetable`, run by
+# the build).
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'db' if IS_RENDER else 'locmem')
+# Worker processes (gunicorn reads the same variable)
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+if CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+        }
+    }
+elif CACHE_BACKEND == 'db':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', 'task_flow_cache'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'task-flow',
+        }
+    }
+
+# Task list/detail response cache (see todolist_app/cache.py). Needs a shared cache
+# with several workers: off by default otherwise, and a system check error if forced.
+TASK_CACHE_ENABLED = os.environ.get(
+    'TASK_CACHE_ENABLED', str(CACHE_BACKEND != 'locmem' or WEB_CONCURRENCY == 1)
+) == 'True'
+TASK_CACHE_ALIAS = 'default'
+TASK_CACHE_TIMEOUT = 300  # seconds
+
+# Live task events (/api/tasks/events/, see todolist_app/events.py).
+# InProcessBroker only sees the writes of its own process; DatabasePollingBroker
+# also polls the database for the writes of other workers.
+TASK_EVENTS_BROKER = os.environ.get('TASK_EVENTS_BROKER', 'todolist_app.events.DatabasePollingBroker')
+TASK_EVENTS_POLL_SECONDS = 2
+TASK_EVENTS_HEARTBEAT_SECONDS = 15
+# Streams are closed after this long; EventSource reconnects with Last-Event-ID
+TASK_EVENTS_MAX_SECONDS = 300
+# Under WSGI a stream holds a sync worker: keep it below gunicorn's --timeout (30 s)
+TASK_EVENTS_WSGI_MAX_SECONDS = 20
+# Tokens of ?access_token= (POST /api/tasks/events/token/): only accepted by the stream
+TASK_EVENTS_TOKEN_LIFETIME = timedelta(minutes=1)
+
+# Archive tier (see todolist_app/archive.py): `manage.py archive_tasks` moves the tasks
+# completed more than TASK_ARCHIVE_AFTER_DAYS ago out of TaskList, in batches
+TASK_ARCHIVE_AFTER_DAYS = int(os.environ.get('TASK_ARCHIVE_AFTER_DAYS', 30))
+TASK_ARCHIVE_BATCH_SIZE = 500
+
+# User deletion (see todolist_app/purge.py): tasks are deleted USER_DELETE_BATCH_SIZE
+# at a time; users with more than USER_DELETE_INLINE_MAX_TASKS tasks are deactivated
+# and deleted in the background by `python manage.py delete_users --loop` (the worker
+# of render.yaml / Procfile), which also resumes deletions a stopped worker left half
+# done once their lease has expired. The thread of the web process only runs when a
+# deletion is queued by that process, so nothing resumes it after a restart: off by default.
+USER_DELETE_BATCH_SIZE = 1000
+USER_DELETE_INLINE_MAX_TASKS = 5000
+USER_DELETE_IN_PROCESS_WORKER = os.environ.get('USER_DELETE_IN_PROCESS_WORKER', 'False') == 'True'
+USER_DELETE_LEASE_SECONDS = 300
 
 # -------------------------------
 # Password validation
@@ -181,7 +355,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # -------------------------------
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users_app.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -198,6 +372,10 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
 
+# Authenticated users are cached for this many seconds (users_app/authentication.py)
+JWT_USER_CACHE_ALIAS = 'default'
+JWT_USER_CACHE_TIMEOUT = 60
+
 # -------------------------------
 # CORS Settings (Different for local/production)
 # -------------------------------
@@ -248,6 +426,14 @@ EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER or 'webmaster@localhost'
 
+# Outbox: contact messages are stored and sent in the background
+# (`python manage.py send_outbox --loop`, or a thread of the web process).
+OUTBOX_IN_PROCESS_WORKER = os.environ.get('OUTBOX_IN_PROCESS_WORKER', 'True') == 'True'
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BASE_SECONDS = 30
+OUTBOX_LEASE_SECONDS = 300
+
 # -------------------------------
 # Logging
 # -------------------------------
@@ -259,6 +445,9 @@ LOGGING = {
             'format': '{levelname} {asctime} {module} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'complice_taches.instrumentation.JsonFormatter',
+        },
     },
     'handlers': {
         'console': {
@@ -266,6 +455,11 @@ LOGGING = {
             'class': 'logging.StreamHandler',
             'formatter': 'verbose',
         },
+        'performance': {
+            'level': 'INFO',
+            'class': 'logging.StreamHandler',
+            'formatter': 'json',
+        },
     },
     'loggers': {
         'django': {
@@ -273,5 +467,10 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        'complice_taches.performance': {
+            'handlers': ['performance'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
\ No newline at end of file
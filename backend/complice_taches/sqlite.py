@@ -0,0 +1,21 @@
+"""
+Tuned SQLite connections (settings.SQLITE_TUNED).
+
+configure_connection runs the PRAGMA statements of settings.SQLITE_PRAGMAS on
+every new SQLite connection (connection_created signal, connected in
+todolist_app.apps). journal_mode=WAL is stored in the database file; the other
+pragmas only last as long as the connection, which is why settings also turns on
+persistent connections (CONN_MAX_AGE) in this mode.
+"""
+from django.conf import settings
+
+
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite' or not getattr(settings, 'SQLITE_TUNED', False):
+        return
+    in_memory = connection.is_in_memory_db()
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            if in_memory and name in ('journal_mode', 'mmap_size'):
+                continue
+            cursor.execute(f'PRAGMA {name} = {value}')
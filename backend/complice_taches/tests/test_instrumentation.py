@@ -0,0 +1,83 @@
+import json
+import logging
+
+import pytest
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import Client, RequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+from complice_taches.instrumentation import JsonFormatter, PerformanceMiddleware
+from todolist_app.models import TaskList
+
+
+def api_client(user):
+    return Client(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}", HTTP_ACCEPT="application/json")
+
+
+@pytest.mark.django_db
+def test_server_timing_header_and_log_record(caplog, settings):
+    settings.TASK_CACHE_ENABLED = False
+    settings.PERFORMANCE_SERVER_TIMING = True
+    user = User.objects.create_user(username="victor", password="pwd123")
+    TaskList.objects.create(gestionnaire=user, task="Mesurer")
+
+    with caplog.at_level(logging.INFO, logger="complice_taches.performance"):
+        response = api_client(user).get("/api/tasks/")
+
+    assert response.status_code == 200
+    timing = response["Server-Timing"]
+    for metric in ("db;dur=", "serialize;dur=", "view;dur=", "total;dur="):
+        assert metric in timing
+
+    record = next(r for r in caplog.records if r.name == "complice_taches.performance")
+    assert record.levelno == logging.INFO
+    assert (record.method, record.path, record.status) == ("GET", "/api/tasks/", 200)
+    assert record.queries >= 1
+    assert f'desc="{record.queries} queries"' in timing
+    assert record.total_ms >= record.view_ms >= 0
+
+    line = json.loads(JsonFormatter().format(record))
+    assert line["queries"] == record.queries and line["path"] == "/api/tasks/"
+
+
+@pytest.mark.django_db
+def test_query_budget_warning_lists_repeated_queries(caplog, settings):
+    settings.PERFORMANCE_QUERY_BUDGET = 3
+    settings.PERFORMANCE_SERVER_TIMING = True
+    user = User.objects.create_user(username="wendy", password="pwd123")
+    tasks = [TaskList.objects.create(gestionnaire=user, task=f"Tâche {i}") for i in range(5)]
+
+    def n_plus_one(request):
+        # The owner of each task read one by one
+        names = [TaskList.objects.get(pk=task.pk).gestionnaire.username for task in tasks]
+        return HttpResponse(",".join(names))
+
+    with caplog.at_level(logging.INFO, logger="complice_taches.performance"):
+        response = PerformanceMiddleware(n_plus_one)(RequestFactory().get("/api/tasks/"))
+
+    assert 'desc="10 queries"' in response["Server-Timing"]
+    record = next(r for r in caplog.records if r.name == "complice_taches.performance")
+    assert record.levelno == logging.WARNING
+    assert "Query budget exceeded (10 > 3)" in record.getMessage()
+    assert record.budget == 3
+    assert [repeated["count"] for repeated in record.repeated_queries] == [5, 5]
+
+
+@pytest.mark.django_db
+def test_server_timing_header_is_for_staff_only_by_default(caplog, settings):
+    settings.PERFORMANCE_SERVER_TIMING = False
+    user = User.objects.create_user(username="xavier", password="pwd123")
+    staff = User.objects.create_user(username="yvonne", password="pwd123", is_staff=True)
+
+    with caplog.at_level(logging.INFO, logger="complice_taches.performance"):
+        anonymous = Client().post("/api/token/", {"username": "xavier", "password": "pwd123"})
+        regular = api_client(user).get("/api/tasks/")
+        admin = api_client(staff).get("/api/tasks/")
+
+    assert anonymous.status_code == regular.status_code == admin.status_code == 200
+    assert "Server-Timing" not in anonymous and "Server-Timing" not in regular
+    assert "db;dur=" in admin["Server-Timing"]
+    # Every request is still logged
+    assert [r.path for r in caplog.records if r.name == "complice_taches.performance"] == [
+        "/api/token/", "/api/tasks/", "/api/tasks/",
+    ]
@@ -0,0 +1,95 @@
+import json
+import subprocess
+import sys
+
+import pytest
+from django.contrib.auth.models import User
+from django.test import Client
+from rest_framework_simplejwt.tokens import AccessToken
+from complice_taches import metrics
+
+
+@pytest.fixture
+def registry(settings, tmp_path, monkeypatch):
+    settings.METRICS_DIR = str(tmp_path)
+    settings.METRICS_TOKEN = "s3cret"
+    if "complice_taches.metrics.MetricsMiddleware" not in settings.MIDDLEWARE:  # off by default
+        settings.MIDDLEWARE = ["complice_taches.metrics.MetricsMiddleware", *settings.MIDDLEWARE]
+    registry = metrics.Registry()
+    monkeypatch.setattr(metrics, "registry", registry)
+    return registry
+
+
+def scrape(token="s3cret"):
+    return Client().get("/metrics", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+
+@pytest.mark.django_db
+def test_api_requests_are_counted_by_route_and_status(registry):
+    user = User.objects.create_user(username="amelie", password="pwd123")
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}", HTTP_ACCEPT="application/json")
+    client.get("/api/tasks/")
+    client.get("/api/tasks/")
+    client.get("/api/tasks/999999/")
+
+    response = scrape()
+
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    body = response.content.decode()
+    assert 'http_requests_total{method="GET",route="tasks-list",status="200"} 2' in body
+    assert 'http_requests_total{method="GET",route="tasks-detail",status="404"} 1' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="tasks-list",le="+Inf"} 2' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="tasks-list"} 2' in body
+    assert 'db_queries_total{route="tasks-list"}' in body
+    assert 'task_cache_operations_total{operation="hits"}' in body
+    # /metrics itself is not an API route
+    assert 'route="metrics"' not in body
+
+
+def test_metrics_of_all_workers_are_added_up(registry, settings):
+    other_worker = metrics.Registry()
+    for worker in (registry, other_worker):
+        worker.inc("http_requests_total", {"route": "contact", "method": "POST", "status": "201"})
+        worker.observe("http_request_duration_seconds", {"route": "contact", "method": "POST"}, 0.03)
+    other_worker.observe("http_request_duration_seconds", {"route": "contact", "method": "POST"}, 20)
+    registry.flush()
+    other_worker.flush()
+
+    body = metrics.render(*metrics.collect())
+
+    assert 'http_requests_total{method="POST",route="contact",status="201"} 2' in body
+    assert 'http_request_duration_seconds_bucket{method="POST",route="contact",le="0.025"} 0' in body
+    assert 'http_request_duration_seconds_bucket{method="POST",route="contact",le="0.05"} 2' in body
+    assert 'http_request_duration_seconds_bucket{method="POST",route="contact",le="+Inf"} 3' in body
+    assert 'http_request_duration_seconds_sum{method="POST",route="contact"} 20.06' in body
+    assert "# TYPE http_request_duration_seconds histogram" in body
+
+
+@pytest.mark.django_db
+def test_metrics_need_the_token(registry, settings):
+    assert scrape("wrong").status_code == 401
+    settings.METRICS_TOKEN = ""
+    settings.DEBUG = False
+    assert scrape().status_code == 404
+
+
+@pytest.mark.skipif(metrics.fcntl is None, reason="POSIX only")
+def test_files_of_stopped_workers_are_merged(registry, settings, tmp_path):
+    stopped = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    pid = int(stopped.stdout)
+    for name in (f"{pid}-aaaa.json", f"{pid}-bbbb.json"):
+        (tmp_path / name).write_text(json.dumps({
+            "counters": [["http_requests_total", {"route": "contact", "method": "POST", "status": "201"}, 2]],
+            "histograms": [],
+        }))
+    registry.inc("http_requests_total", {"route": "contact", "method": "POST", "status": "201"})
+    registry.flush()
+
+    metrics.merge_stopped_workers()
+    metrics.merge_stopped_workers()
+
+    assert sorted(file.name for file in tmp_path.glob("*.json")) == [
+        registry.file_name, metrics.STOPPED_WORKERS_FILE,
+    ]
+    assert 'http_requests_total{method="POST",route="contact",status="201"} 5' in metrics.render(*metrics.collect())
@@ -0,0 +1,80 @@
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth.models import User
+from django.http import FileResponse, HttpResponse
+from django.test import Client
+from rest_framework_simplejwt.tokens import AccessToken
+from complice_taches.middleware import FullStackMiddleware, read_in_thread
+
+
+@pytest.mark.django_db
+def test_api_calls_skip_the_full_middleware_stack():
+    user = User.objects.create_user(username="sybil", password="pwd123")
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+
+    response = client.get("/api/tasks/", HTTP_ACCEPT="application/json")
+
+    assert response.status_code == 200
+    assert "X-Frame-Options" not in response
+    assert not hasattr(response.wsgi_request, "session")
+
+
+@pytest.mark.django_db
+def test_admin_keeps_sessions_csrf_and_clickjacking_protection():
+    User.objects.create_superuser(username="trent", password="pwd123", email="t@example.com")
+    client = Client(enforce_csrf_checks=True)
+
+    page = client.get("/admin/login/")
+    assert page.status_code == 200
+    assert page["X-Frame-Options"] == "DENY"
+
+    # Without the CSRF token the login is refused
+    assert client.post("/admin/login/", {"username": "trent", "password": "pwd123"}).status_code == 403
+
+    token = page.cookies["csrftoken"].value
+    response = client.post("/admin/login/?next=/admin/", {
+        "username": "trent", "password": "pwd123", "csrfmiddlewaretoken": token,
+    })
+    assert response.status_code == 302
+    assert client.get("/admin/").status_code == 200
+
+
+@pytest.mark.django_db
+def test_browsable_api_keeps_the_full_stack():
+    response = Client().get("/api/tasks/", HTTP_ACCEPT="text/html")
+
+    assert response["X-Frame-Options"] == "DENY"
+
+
+def test_lean_api_calls_stay_async_under_asgi(rf):
+    seen = []
+
+    async def view(request):
+        seen.append(request)
+        return HttpResponse("ok")
+
+    middleware = FullStackMiddleware(view)
+    assert iscoroutinefunction(middleware)
+    assert iscoroutinefunction(middleware.process_view)
+
+    request = rf.get("/api/tasks/", HTTP_ACCEPT="application/json")
+    response = async_to_sync(middleware)(request)
+    assert response.content == b"ok"
+    assert seen == [request] and request.lean_api
+    assert async_to_sync(middleware.process_view)(request, view, (), {}) is None
+
+    page = async_to_sync(middleware)(rf.get("/admin/login/"))
+    assert page["X-Frame-Options"] == "DENY"
+
+
+def test_static_files_are_streamed_chunk_by_chunk_under_asgi(tmp_path):
+    path = tmp_path / "app.js"
+    path.write_bytes(b"0123456789")
+    response = FileResponse(path.open("rb"))
+    response.block_size = 4
+
+    async def read_all():
+        return [chunk async for chunk in read_in_thread(response)]
+
+    assert async_to_sync(read_all)() == [b"0123", b"4567", b"89"]
+    assert response.file_to_stream.closed
@@ -0,0 +1,59 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from complice_taches.profiling import list_profiles
+
+
+@pytest.fixture
+def profiling(settings, tmp_path):
+    settings.PROFILING_DIR = str(tmp_path)
+    settings.PROFILING_MAX_FILES = 3
+    settings.TASK_CACHE_ENABLED = False
+    with override_settings(MIDDLEWARE=['complice_taches.profiling.ProfilingMiddleware', *settings.MIDDLEWARE]):
+        yield tmp_path
+
+
+def api_client(user, **headers):
+    return Client(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}", HTTP_ACCEPT="application/json", **headers)
+
+
+@pytest.mark.django_db
+def test_staff_header_profiles_the_request(profiling):
+    staff = User.objects.create_user(username="xavier", password="pwd123", is_staff=True)
+
+    response = api_client(staff, HTTP_X_PROFILE="1").get("/api/tasks/")
+
+    assert response.status_code == 200
+    [profile] = list_profiles(profiling)
+    assert response["X-Profile-Id"] == profile["file"].name
+    assert (profile["method"], profile["path"]) == ("GET", "/api/tasks")
+
+
+@pytest.mark.django_db
+def test_header_is_ignored_for_non_staff_and_unsampled_requests(profiling):
+    user = User.objects.create_user(username="yvonne", password="pwd123")
+
+    response = api_client(user, HTTP_X_PROFILE="1").get("/api/tasks/")
+
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response
+    assert list_profiles(profiling) == []
+
+
+@pytest.mark.django_db
+def test_sampled_profiles_are_kept_in_a_bounded_ring(profiling, settings, capsys):
+    settings.PROFILING_SAMPLE_RATE = 1.0
+    user = User.objects.create_user(username="zoe", password="pwd123")
+    client = api_client(user)
+    names = [client.get("/api/tasks/")["X-Profile-Id"] for _ in range(5)]
+
+    assert [profile["file"].name for profile in list_profiles(profiling)] == names[-3:]
+
+    call_command("profiles", dir=str(profiling))
+    assert "3 profile(s)" in capsys.readouterr().out
+    call_command("profiles", "all", dir=str(profiling), limit=5)
+    out = capsys.readouterr().out
+    assert "3 profile(s)" in out
+    assert "function calls" in out
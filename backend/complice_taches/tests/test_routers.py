@@ -0,0 +1,91 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import Client
+from rest_framework_simplejwt.tokens import AccessToken
+from complice_taches import routers
+from todolist_app.models import TaskList
+
+
+@pytest.fixture
+def replica(settings):
+    """The 'replica1' test database (see conftest.py) as the replica"""
+    settings.DATABASE_REPLICAS = ["replica1"]
+    settings.TASK_CACHE_ENABLED = False
+    return "replica1"
+
+
+def task_names(response):
+    assert response.status_code == 200
+    return [task["task"] for task in response.json()["results"]]
+
+
+@pytest.mark.django_db(databases=["default", "replica1"])
+def test_reads_go_to_the_replica_until_the_user_writes(replica):
+    user = User.objects.create_user(username="bruno", password="pwd123")
+    TaskList.objects.create(gestionnaire=user, task="Sur le primaire")
+    # The replica lags behind: it only has an older copy of the data
+    User.objects.using(replica).create(pk=user.pk, username="bruno")
+    TaskList.objects.using(replica).create(gestionnaire_id=user.pk, task="Sur le réplica")
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}", HTTP_ACCEPT="application/json")
+
+    assert task_names(client.get("/api/tasks/")) == ["Sur le réplica"]
+
+    # After a write the user reads from the primary for REPLICA_PIN_SECONDS
+    assert client.post("/api/tasks/", {"task": "Nouvelle tâche"}).status_code == 201
+    assert task_names(client.get("/api/tasks/")) == ["Nouvelle tâche", "Sur le primaire"]
+
+    cache.clear()  # the pin expires
+    assert task_names(client.get("/api/tasks/")) == ["Sur le réplica"]
+
+
+@pytest.mark.django_db(databases=["default", "replica1"])
+def test_writes_through_other_paths_pin_the_owner(replica, django_capture_on_commit_callbacks):
+    user = User.objects.create_user(username="carla", password="pwd123")
+    User.objects.using(replica).create(pk=user.pk, username="carla")
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}", HTTP_ACCEPT="application/json")
+    assert task_names(client.get("/api/tasks/")) == []
+
+    # e.g. the admin or an import: the tasks_changed signal pins the owner
+    with django_capture_on_commit_callbacks(execute=True):
+        TaskList.objects.bulk_create([TaskList(gestionnaire=user, task="Importée")])
+
+    assert task_names(client.get("/api/tasks/")) == ["Importée"]
+
+
+@pytest.mark.django_db(databases=["default", "replica1"])
+def test_only_read_actions_use_the_replica(replica):
+    staff = User.objects.create_user(username="dora", password="pwd123", is_staff=True)
+    User.objects.using(replica).create(pk=staff.pk, username="dora", is_staff=True)
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(staff)}", HTTP_ACCEPT="application/json")
+    User.objects.create_user(username="ernest", password="pwd123")
+
+    usernames = [user["username"] for user in client.get("/api/user/users/").json()["results"]]
+    assert "ernest" not in usernames  # list: replica
+
+    # Detail view: primary
+    ernest = User.objects.get(username="ernest")
+    assert client.get(f"/api/user/users/{ernest.pk}/").status_code == 200
+
+
+@pytest.mark.django_db(databases=["default", "replica1"])
+def test_task_writes_pin_staff_listings(replica, settings, django_capture_on_commit_callbacks):
+    settings.TASK_CACHE_ENABLED = True
+    staff = User.objects.create_user(username="fanny", password="pwd123", is_staff=True)
+    User.objects.using(replica).create(pk=staff.pk, username="fanny", is_staff=True)
+    user = User.objects.create_user(username="gilles", password="pwd123")
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(staff)}", HTTP_ACCEPT="application/json")
+    assert task_names(client.get("/api/tasks/")) == []
+
+    # Another user's write: staff listings are read from the primary, and cached as such
+    with django_capture_on_commit_callbacks(execute=True):
+        TaskList.objects.create(gestionnaire=user, task="Écrite par Gilles")
+    assert task_names(client.get("/api/tasks/")) == ["Écrite par Gilles"]
+    assert task_names(client.get("/api/tasks/")) == ["Écrite par Gilles"]
+
+
+def test_pins_need_a_shared_cache_with_several_workers(replica, settings):
+    assert routers.check_shared_pins() == []
+
+    settings.WEB_CONCURRENCY = 2
+    assert [error.id for error in routers.check_shared_pins()] == ["complice_taches.E001"]
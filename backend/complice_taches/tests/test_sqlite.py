@@ -0,0 +1,42 @@
+import pytest
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(connection.vendor != "sqlite", reason="SQLite only"),
+]
+
+
+def open_database(path):
+    wrapper = DatabaseWrapper({**connection.settings_dict, "NAME": str(path)}, alias="tuned")
+    wrapper.ensure_connection()
+    return wrapper
+
+
+def pragma(wrapper, name):
+    with wrapper.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+def test_tuned_mode_sets_wal_and_pragmas(settings, tmp_path):
+    settings.SQLITE_TUNED = True
+    wrapper = open_database(tmp_path / "tuned.sqlite3")
+    try:
+        assert pragma(wrapper, "journal_mode") == "wal"
+        assert pragma(wrapper, "synchronous") == 1  # NORMAL
+        assert pragma(wrapper, "busy_timeout") == settings.SQLITE_PRAGMAS["busy_timeout"]
+        assert pragma(wrapper, "cache_size") == settings.SQLITE_PRAGMAS["cache_size"]
+    finally:
+        wrapper.close()
+
+
+def test_default_mode_keeps_sqlite_defaults(settings, tmp_path):
+    settings.SQLITE_TUNED = False
+    wrapper = open_database(tmp_path / "plain.sqlite3")
+    try:
+        assert pragma(wrapper, "journal_mode") == "delete"
+        assert pragma(wrapper, "synchronous") == 2  # FULL
+    finally:
+        wrapper.close()
@@ -3,6 +3,8 @@ from django.urls import path, include
 from django.http import HttpResponse  # Add this import
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from .metrics import metrics_view
+
 
 def root_view(request):
     """Simple view for the root URL to confirm API is running"""
@@ -27,4 +29,5 @@ urlpatterns = [
     path('api-auth/', include('rest_framework.urls')),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('metrics', metrics_view, name='metrics'),
 ]
\ No newline at end of file
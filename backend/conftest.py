@@ -0,0 +1,32 @@
+import pytest
+from django.core.cache import caches
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Caches outlive the test database: start every test with empty caches"""
+    for cache in caches.all():
+        cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def metrics_dir(settings, tmp_path):
+    """Metrics files of the requests made by tests go to a temporary directory"""
+    settings.METRICS_DIR = str(tmp_path / 'metrics')
+    # Written at the end of each request, not by a timer that would outlive the test
+    settings.METRICS_FLUSH_SECONDS = 0
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix):
+    """
+    A second test database, 'replica1', standing in for a read replica that lags
+    behind: nothing copies the data of the primary to it (see test_routers.py).
+    """
+    from django.db import connections
+
+    if 'replica1' not in connections.settings:
+        connections.settings['replica1'] = {**connections.settings['default'], 'TEST': {
+            **connections.settings['default']['TEST'], 'MIRROR': None,
+        }}
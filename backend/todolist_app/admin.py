@@ -1,23 +1,68 @@
 from django.contrib import admin
-from .models import TaskList
+from django.db.models import Q
+from django.utils import timezone
+from . import archive, search
+from .models import ArchivedTask, TaskList, OutboxEmail, UserDeletion
 
 @admin.register(TaskList)
 class TaskListAdmin(admin.ModelAdmin):
     list_display = ('id', 'task', 'gestionnaire', 'done')
     list_display_links = ('task',)
+    list_select_related = ('gestionnaire',)
     list_filter = ('done', 'gestionnaire')
     search_fields = ('task', 'gestionnaire__username')
+    search_help_text = "Mots de la tâche (index plein texte) ou nom exact de l'utilisateur"
     ordering = ('id',)
     actions = ['marquer_terminee', 'marquer_en_attente']
 
+    def get_search_results(self, request, queryset, search_term):
+        """Recherche par l'index plein texte (voir search.py) au lieu de LIKE '%...%'"""
+        if not search_term:
+            return queryset, False
+        matches = search.matching(TaskList.objects.all(), search_term).values('pk')
+        return queryset.filter(Q(pk__in=matches) | Q(gestionnaire__username=search_term.strip())), False
+
     def marquer_terminee(self, request, queryset):
         """Marquer les tâches sélectionnées comme terminées"""
-        updated = queryset.update(done=True)
+        updated = queryset.update(done=True, updated_at=timezone.now())
         self.message_user(request, f"{updated} tâche(s) marquée(s) comme terminée(s).")
     marquer_terminee.short_description = "Marquer comme terminée"
 
     def marquer_en_attente(self, request, queryset):
         """Marquer les tâches sélectionnées comme en attente"""
-        updated = queryset.update(done=False)
+        updated = queryset.update(done=False, updated_at=timezone.now())
         self.message_user(request, f"{updated} tâche(s) marquée(s) comme en attente.")
     marquer_en_attente.short_description = "Marquer comme en attente"
+
+
+@admin.register(ArchivedTask)
+class ArchivedTaskAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'gestionnaire', 'created_at', 'archived_at')
+    list_select_related = ('gestionnaire',)
+    list_filter = ('gestionnaire',)
+    ordering = ('-archived_at',)
+    actions = ['restaurer']
+
+    def restaurer(self, request, queryset):
+        """Remettre les tâches sélectionnées dans la liste des tâches"""
+        restored = archive.restore(queryset)
+        self.message_user(request, f"{len(restored)} tâche(s) restaurée(s).")
+    restaurer.short_description = "Restaurer"
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('id', 'subject', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject', 'reply_to')
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
+    ordering = ('-id',)
+
+
+@admin.register(UserDeletion)
+class UserDeletionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'username', 'status', 'tasks_deleted', 'tasks_total', 'requested_at', 'finished_at')
+    list_filter = ('status',)
+    search_fields = ('username',)
+    readonly_fields = ('user_id', 'username', 'status', 'tasks_total', 'tasks_deleted', 'requested_at', 'finished_at', 'claimed_until', 'claim_token')
+    ordering = ('-id',)
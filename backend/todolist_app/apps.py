@@ -4,3 +4,22 @@ from django.apps import AppConfig
 class TodolistAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'todolist_app'
+
+    def ready(self):
+        from django.core import checks
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_migrate
+
+        from complice_taches import routers, sqlite
+        from . import cache, events, search
+        from .signals import tasks_changed
+
+        checks.register(cache.check_shared_cache, checks.Tags.caches)
+        checks.register(routers.check_shared_pins, checks.Tags.caches)
+
+        connection_created.connect(sqlite.configure_connection, dispatch_uid='complice_taches.sqlite')
+        post_migrate.connect(search.on_post_migrate, sender=self, dispatch_uid='todolist_app.search')
+
+        tasks_changed.connect(cache.on_tasks_changed, dispatch_uid='todolist_app.cache')
+        tasks_changed.connect(events.on_tasks_changed, dispatch_uid='todolist_app.events')
+        tasks_changed.connect(routers.on_tasks_changed, dispatch_uid='complice_taches.routers')
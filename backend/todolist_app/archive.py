@@ -0,0 +1,111 @@
+"""
+Archive tier for completed tasks.
+
+archive() moves the tasks completed (done, not updated) for more than
+TASK_ARCHIVE_AFTER_DAYS from TaskList to ArchivedTask, one transaction per batch
+of TASK_ARCHIVE_BATCH_SIZE, so TaskList and its indexes stay sized to active
+work. Archived tasks leave TaskList with a raw DELETE, not through
+TaskListQuerySet.delete(): no tombstone is written, so sync clients and live
+event streams keep them (an archived task still exists), while the counters are
+decremented, so /api/tasks/stats/ counts active tasks and reports the archived
+ones apart. restore() moves them back with their id and creation date.
+
+Run by `manage.py archive_tasks` (e.g. daily from cron); the task list includes
+archived tasks with ?include_archived=true, and /api/tasks/restore/ restores them.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Value
+from django.utils import timezone
+
+from . import counters
+from .models import ArchivedTask, TaskList, TaskListQuerySet, TaskTombstone, notify_tasks_changed
+
+ARCHIVED_FIELDS = ('id', 'gestionnaire_id', 'task', 'done', 'created_at', 'updated_at')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def cutoff(days=None, now=None):
+    """Tasks completed before this are archived"""
+    days = _setting('TASK_ARCHIVE_AFTER_DAYS', 30) if days is None else days
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def archive_batch(before, batch_size=None):
+    """Archive up to `batch_size` tasks completed before `before`; returns how many"""
+    batch_size = batch_size or _setting('TASK_ARCHIVE_BATCH_SIZE', 500)
+    with transaction.atomic():
+        rows = list(
+            TaskList.objects.filter(done=True, updated_at__lt=before)
+            .order_by('updated_at').select_for_update().values_list(*ARCHIVED_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+        ArchivedTask.objects.bulk_create(ArchivedTask(**dict(zip(ARCHIVED_FIELDS, row))) for row in rows)
+        moved = TaskList._base_manager.filter(pk__in=[row[0] for row in rows])
+        # Plain DELETE: no tombstones, counters updated from the rows already read
+        moved._raw_delete(moved.db)
+        deltas = counters.row_deltas(((row[1], row[3], row[4]) for row in rows), -1)
+        counters.apply(deltas, moved.db)
+    notify_tasks_changed(deltas.keys(), moved.db)
+    return len(rows)
+
+
+def archive(days=None, batch_size=None, pause=0):
+    """Archive all the tasks completed more than `days` ago; yields the running total per batch"""
+    before = cutoff(days)
+    total = 0
+    while True:
+        moved = archive_batch(before, batch_size)
+        if not moved:
+            return
+        total += moved
+        yield total
+        if pause:
+            time.sleep(pause)  # let other writers in between batches
+
+
+def restore(archived):
+    """Move the tasks of the ArchivedTask queryset `archived` back to TaskList; returns their ids"""
+    using = router.db_for_write(TaskList)
+    with transaction.atomic(using=using):
+        rows = list(archived.using(using).select_for_update().order_by('id'))
+        if not rows:
+            return []
+        tasks = [
+            TaskList(id=row.id, gestionnaire_id=row.gestionnaire_id, task=row.task, done=row.done)
+            for row in rows
+        ]
+        # The base manager skips the counters of TaskListQuerySet.bulk_create: they are
+        # applied below, once the original creation dates (auto_now_add) are back
+        TaskList._base_manager.using(using).bulk_create(tasks)
+        for task, row in zip(tasks, rows):
+            task.created_at = row.created_at
+        TaskList._base_manager.using(using).bulk_update(tasks, ['created_at'])
+        counters.apply(counters.row_deltas(
+            (task.gestionnaire_id, task.done, task.created_at) for task in tasks
+        ), using)
+
+        ids = [row.id for row in rows]
+        owner_ids = {row.gestionnaire_id for row in rows}
+        # Tasks archived before archiving stopped writing tombstones come back as changed rows
+        TaskTombstone.objects.using(using).filter(owner_id__in=owner_ids, task_id__in=ids).delete()
+        ArchivedTask.objects.using(using).filter(pk__in=ids).delete()
+    notify_tasks_changed(owner_ids, using)
+    return ids
+
+
+def with_archived(rows, archived):
+    """
+    read_values() rows of a TaskList queryset and of an ArchivedTask queryset in
+    one list, newest first, each row with an `archived` flag.
+    """
+    active = rows.order_by().annotate(archived=Value(False))
+    old = archived.order_by().values(*TaskListQuerySet.READ_VALUES).annotate(archived=Value(True))
+    return active.union(old, all=True).order_by('-created_at', '-id')
@@ -0,0 +1,74 @@
+"""
+Async versions of the task list/detail/toggle endpoints, for the ASGI deployment
+(see complice_taches/asgi.py). Authentication and reads use the async cache and ORM
+APIs, so a request waiting on a slow client holds no thread; only the status
+toggle, which runs in a transaction, goes through sync_to_async.
+"""
+from asgiref.sync import sync_to_async
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.request import Request
+from rest_framework.serializers import DateTimeField
+
+from users_app.authentication import api_json_response, async_jwt_required
+
+from .models import TaskList
+from .pagination import TaskCursorPagination
+from .serializers import TaskReadSerializer
+
+
+def get_queryset(user):
+    """Les admins voient toutes les tâches, les utilisateurs seulement les leurs"""
+    if user.is_staff:
+        return TaskList.objects.all()
+    return TaskList.objects.filter(gestionnaire_id=user.id)
+
+
+def not_found():
+    return api_json_response({'detail': 'No TaskList matches the given query.'}, status=404)
+
+
+@require_GET
+@async_jwt_required
+async def task_list(request):
+    """Liste des tâches, pagination par curseur (?cursor=, ?page_size=, ?with_total=1)"""
+    paginator = TaskCursorPagination()
+    page = await paginator.apaginate_queryset(get_queryset(request.user).read_values(), Request(request))
+    return api_json_response(paginator.get_paginated_response(TaskReadSerializer(page, many=True).data).data)
+
+
+@require_GET
+@async_jwt_required
+async def task_detail(request, pk):
+    """Détail d'une tâche"""
+    row = await get_queryset(request.user).read_values().filter(pk=pk).afirst()
+    if row is None:
+        return not_found()
+    return api_json_response(TaskReadSerializer(row).data)
+
+
+async def _set_done(request, pk, done, message):
+    owner_id = None if request.user.is_staff else request.user.id
+    result = await sync_to_async(get_queryset(request.user).set_done)(pk, done, owner_id)
+    if result is None:
+        return not_found()
+    done, updated_at = result
+    return api_json_response({
+        'status': message,
+        'id': pk,
+        'done': done,
+        'updated_at': DateTimeField(format=TaskReadSerializer.datetime_format).to_representation(updated_at),
+    })
+
+
+@require_POST
+@async_jwt_required
+async def mark_complete(request, pk):
+    """Marquer une tâche comme terminée"""
+    return await _set_done(request, pk, True, 'Tâche terminée')
+
+
+@require_POST
+@async_jwt_required
+async def mark_pending(request, pk):
+    """Marquer une tâche comme en attente"""
+    return await _set_done(request, pk, False, 'Tâche en attente')
@@ -0,0 +1,162 @@
+"""
+Per-user cache of task list/detail responses.
+
+Entries are keyed by a version counter: one per user, plus a global one for staff
+listings. Every write bumps the versions of the owners involved (see the
+tasks_changed signal), so stale entries are never read again and simply expire.
+ETag/Last-Modified validators are cached with the data, so polling clients that
+get a 304 cost no query at all. Entries holding time-derived fields (is_recent)
+expire when the first of them changes (valid_until()).
+
+The backend is the Django cache named by TASK_CACHE_ALIAS. Invalidations only
+reach the workers sharing it: with several workers it must be a shared cache
+(file or database), see check_shared_cache().
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .conditional import check_preconditions, set_validators
+
+GLOBAL_SCOPE = 'all'
+
+# Hit/miss/set/invalidation/eviction counts of this process
+stats = Counter()
+_stats_lock = threading.Lock()
+
+# Keys stored recently by this process: a miss on one of them means the backend
+# evicted or expired it before it was invalidated.
+_stored_keys = OrderedDict()
+_STORED_KEYS_MAX = 10000
+
+
+def get_cache():
+    return caches[getattr(settings, 'TASK_CACHE_ALIAS', 'default')]
+
+
+def is_enabled():
+    return getattr(settings, 'TASK_CACHE_ENABLED', True)
+
+
+def check_shared_cache(**kwargs):
+    """System check: the cache is per process while several workers serve requests"""
+    workers = getattr(settings, 'WEB_CONCURRENCY', 1)
+    if is_enabled() and workers > 1 and isinstance(get_cache(), LocMemCache):
+        return [Error(
+            f"TASK_CACHE_ENABLED with a per-process cache and WEB_CONCURRENCY={workers}: "
+            "workers would serve task lists that other workers changed.",
+            hint="Set CACHE_BACKEND=db (or file), or TASK_CACHE_ENABLED=False.",
+            id='todolist_app.E001',
+        )]
+    return []
+
+
+def valid_until(response, until):
+    """Mark a response built from time-derived fields as stale from `until` (None: never)"""
+    response.valid_until = until
+    return response
+
+
+def _timeout(response):
+    timeout = getattr(settings, 'TASK_CACHE_TIMEOUT', 300)
+    until = getattr(response, 'valid_until', None)
+    if until is not None:
+        timeout = min(timeout, math.ceil((until - timezone.now()).total_seconds()))
+    return timeout
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        stats[name] += amount
+
+
+def _version_key(scope):
+    return f'tasks:version:{scope}'
+
+
+def get_version(scope):
+    cache = get_cache()
+    key = _version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock so a lost counter never reuses an old version
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate(owner_ids):
+    """Bump the version of each owner and the global (staff) version"""
+    cache = get_cache()
+    for scope in [*owner_ids, GLOBAL_SCOPE]:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+    _count('invalidations', len(owner_ids))
+
+
+def on_tasks_changed(sender, owner_ids, **kwargs):
+    if is_enabled():
+        invalidate(owner_ids)
+
+
+def response_key(request):
+    user = request.user
+    scope = GLOBAL_SCOPE if user.is_staff else user.id
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'tasks:response:{user.id}:{get_version(scope)}:{path}'
+
+
+def cached_response(request, build, validators=lambda: (None, None)):
+    """
+    Serve build() through the cache. validators() gives the (etag, last_modified)
+    of the resource; they are stored with the cached data, so a cache hit, 304
+    answers included, does not touch the database.
+    """
+    cache = get_cache() if is_enabled() else None
+    entry = None
+    if cache is not None:
+        key = response_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            _count('hits')
+        else:
+            _count('misses')
+            with _stats_lock:
+                if _stored_keys.pop(key, None) is not None:
+                    stats['evictions'] += 1
+
+    data, etag, last_modified = entry if entry is not None else (None, *validators())
+    not_modified = check_preconditions(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    if data is not None:
+        return set_validators(Response(data), etag, last_modified)
+
+    response = build()
+    timeout = _timeout(response)
+    if cache is not None and response.status_code == 200 and timeout > 0:
+        cache.set(key, (response.data, etag, last_modified), timeout)
+        _count('sets')
+        with _stats_lock:
+            _stored_keys[key] = True
+            if len(_stored_keys) > _STORED_KEYS_MAX:
+                _stored_keys.popitem(last=False)
+    return set_validators(response, etag, last_modified)
+
+
+def get_stats():
+    with _stats_lock:
+        return {name: stats[name] for name in ('hits', 'misses', 'sets', 'invalidations', 'evictions')}
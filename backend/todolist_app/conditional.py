@@ -0,0 +1,81 @@
+"""
+ETag / Last-Modified validators for the task endpoints.
+
+Validators come from one aggregate query (row count, latest updated_at, number of
+tasks still flagged is_recent) plus the latest tombstone and the latest archived
+task (archiving leaves no tombstone), so a matching
+If-None-Match / If-Modified-Since is answered with 304 before anything is
+serialized, and a stale If-Match on PUT/PATCH with 412.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import ArchivedTask, TaskTombstone
+
+
+def _etag(*parts):
+    digest = hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def list_validators(request, queryset):
+    """(etag, last_modified) of the list of tasks in `queryset` for this URL"""
+    now = timezone.now()
+    stats = queryset.order_by().aggregate(
+        count=Count('id'),
+        last_updated=Max('updated_at'),
+        recent=Count('id', filter=Q(created_at__gt=now - timedelta(days=1))),
+    )
+    tombstones = TaskTombstone.objects.all()
+    archived = ArchivedTask.objects.all()
+    if not request.user.is_staff:
+        tombstones = tombstones.filter(owner_id=request.user.id)
+        archived = archived.filter(gestionnaire_id=request.user.id)
+    last_deleted = tombstones.aggregate(last=Max('deleted_at'))['last']
+    last_archived = archived.aggregate(last=Max('archived_at'))['last']
+
+    last_modified = max(
+        (value for value in (stats['last_updated'], last_deleted, last_archived) if value is not None),
+        default=None,
+    )
+    etag = _etag(
+        request.user.id, request.get_full_path(), stats['count'],
+        stats['last_updated'], last_deleted, last_archived, stats['recent'],
+    )
+    return etag, last_modified
+
+
+def detail_validators(request, queryset, pk):
+    """(etag, last_modified) of one task, or (None, None) if it is not in `queryset`"""
+    try:
+        row = queryset.filter(pk=pk).values('id', 'created_at', 'updated_at').first()
+    except ValueError:
+        return None, None
+    if row is None:
+        return None, None
+    is_recent = row['created_at'] > timezone.now() - timedelta(days=1)
+    return _etag(row['id'], row['updated_at'], is_recent), row['updated_at']
+
+
+def check_preconditions(request, etag, last_modified):
+    """304/412 response if the request's conditional headers say so, else None"""
+    if etag is None and last_modified is None:
+        return None
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    if response.status_code in (200, 304) and etag is not None:
+        response.headers['ETag'] = etag
+        if last_modified is not None:
+            response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
@@ -0,0 +1,123 @@
+"""
+Per-user task counters (TaskCounter).
+
+Every task write path applies its deltas to the owners' counters in the same
+transaction as the write, so the stats endpoint reads one row per user instead of
+aggregating over TaskList. A missing counter row is rebuilt from TaskList on first
+use; `manage.py rebuild_task_counters` rebuilds or checks all of them.
+"""
+from collections import defaultdict
+from datetime import datetime, time
+
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.utils import timezone
+
+
+def _new_delta():
+    return [0, 0, 0]  # total, done, created today
+
+
+def row_deltas(rows, sign=1):
+    """Deltas for adding (sign=1) or removing (sign=-1) rows of (owner_id, done, created_at)"""
+    today = timezone.localdate()
+    return flag_deltas((
+        (owner_id, done, created_at is not None and timezone.localdate(created_at) == today)
+        for owner_id, done, created_at in rows
+    ), sign)
+
+
+def flag_deltas(rows, sign=1):
+    """row_deltas() of rows of (owner_id, done, created today)"""
+    deltas = defaultdict(_new_delta)
+    for owner_id, done, created_today in rows:
+        delta = deltas[owner_id]
+        delta[0] += sign
+        if done:
+            delta[1] += sign
+        if created_today:
+            delta[2] += sign
+    return deltas
+
+
+def start_of_today():
+    return timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+
+
+def _counts():
+    return {
+        'total': Count('id'),
+        'done': Count('id', filter=Q(done=True)),
+        'created_today': Count('id', filter=Q(created_at__gte=start_of_today())),
+    }
+
+
+def merge(*all_deltas):
+    merged = defaultdict(_new_delta)
+    for deltas in all_deltas:
+        for owner_id, delta in deltas.items():
+            for i, value in enumerate(delta):
+                merged[owner_id][i] += value
+    return merged
+
+
+def apply(deltas, using):
+    """Add the deltas to the counters; must run in the transaction of the write"""
+    from .models import TaskCounter
+
+    today = timezone.localdate()
+    for owner_id, (total, done, created_today) in deltas.items():
+        if not (total or done or created_today):
+            continue
+        updated = TaskCounter.objects.using(using).filter(pk=owner_id).update(
+            total=F('total') + total,
+            done=F('done') + done,
+            created_today=Case(
+                When(day=today, then=F('created_today') + created_today),
+                default=Value(max(created_today, 0)),
+            ),
+            day=today,
+        )
+        if not updated:
+            rebuild(owner_id, using)
+
+
+def compute(owner_id, using='default'):
+    """Counts of one user computed from TaskList"""
+    from .models import TaskList
+
+    return TaskList.objects.using(using).filter(gestionnaire_id=owner_id).aggregate(**_counts())
+
+
+def rebuild(owner_id, using='default'):
+    from .models import TaskCounter
+
+    counter, _ = TaskCounter.objects.using(using).update_or_create(
+        gestionnaire_id=owner_id,
+        defaults={**compute(owner_id, using), 'day': timezone.localdate()},
+    )
+    return counter
+
+
+def get_counts(owner_id):
+    """Counts of one user from its counter row"""
+    from .models import TaskCounter
+
+    counter = TaskCounter.objects.filter(pk=owner_id).first() or rebuild(owner_id)
+    return counter.as_dict()
+
+
+def get_global_counts():
+    """Counts of all users, summed over the counter rows"""
+    from .models import TaskCounter
+
+    totals = TaskCounter.objects.aggregate(
+        total=Sum('total', default=0),
+        done=Sum('done', default=0),
+        created_today=Sum('created_today', filter=Q(day=timezone.localdate()), default=0),
+    )
+    return {
+        'total': totals['total'],
+        'done': totals['done'],
+        'pending': totals['total'] - totals['done'],
+        'created_today': totals['created_today'],
+    }
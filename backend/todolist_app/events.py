@@ -0,0 +1,325 @@
+"""
+Live task events (Server-Sent Events) for /api/tasks/events/.
+
+A stream subscribes to a broker for its user (staff: all users). When the
+broker reports that the user's tasks changed, the stream reads what changed
+since its watermark (sync.changes_since) and pushes `created`, `updated` and
+`deleted` events; the event id is the watermark, so a reconnecting EventSource
+resumes with Last-Event-ID.
+
+Under WSGI every open stream occupies a whole sync worker, and gunicorn kills
+a worker that has not finished its request within --timeout (30 s by default):
+streams are cut after TASK_EVENTS_WSGI_MAX_SECONDS there. Run the ASGI
+application (render.yaml) to keep them open for TASK_EVENTS_MAX_SECONDS.
+
+Brokers (settings.TASK_EVENTS_BROKER):
+  - InProcessBroker: woken by the tasks_changed signal of this process only.
+  - DatabasePollingBroker (default): same, plus one background thread per
+    process that polls TaskList/TaskTombstone for changes made by other workers,
+    with one query pair per interval whatever the number of open streams.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.renderers import BaseRenderer
+
+from .models import TaskList, TaskTombstone
+from .serializers import TaskReadSerializer
+from .sync import Watermark, changes_since, retention_start
+
+logger = logging.getLogger(__name__)
+
+ALL_OWNERS = 'all'
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class Subscription:
+    """One open stream waiting for changes of `owner_id` (ALL_OWNERS for staff)"""
+
+    def __init__(self, owner_id):
+        self.owner_id = owner_id
+        self._event = threading.Event()
+        self._loop = None
+        self._async_event = None
+
+    def notify(self):
+        self._event.set()
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._async_event.set)
+            except RuntimeError:  # loop closed
+                pass
+
+    def wait(self, timeout):
+        """Block until notified (True) or until the timeout (False)"""
+        notified = self._event.wait(timeout)
+        self._event.clear()
+        return notified
+
+    async def await_notification(self, timeout):
+        """wait() for async streams: no thread is held while waiting"""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._async_event = asyncio.Event()
+            if self._event.is_set():
+                self._async_event.set()
+        try:
+            await asyncio.wait_for(self._async_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._async_event.clear()
+        self._event.clear()
+        return True
+
+
+class InProcessBroker:
+    """Wakes the streams of this process on tasks_changed; enough with a single worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, owner_id):
+        subscription = Subscription(owner_id)
+        with self._lock:
+            self._subscriptions[owner_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.owner_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.owner_id]
+
+    def has_subscribers(self):
+        with self._lock:
+            return bool(self._subscriptions)
+
+    def publish(self, owner_ids):
+        with self._lock:
+            woken = set(self._subscriptions.get(ALL_OWNERS, ()))
+            for owner_id in owner_ids:
+                woken.update(self._subscriptions.get(owner_id, ()))
+        for subscription in woken:
+            subscription.notify()
+
+
+class DatabasePollingBroker(InProcessBroker):
+    """
+    InProcessBroker that also picks up changes made by other processes, by polling
+    the database every TASK_EVENTS_POLL_SECONDS while this process has open streams.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._poller = None
+        self._since = None
+
+    def subscribe(self, owner_id):
+        subscription = Subscription(owner_id)
+        # Add the subscription and check the poller under the same lock the poller
+        # holds when it decides to stop, so a stream never ends up without a poller
+        with self._lock:
+            self._subscriptions[owner_id].add(subscription)
+            if self._poller is None:
+                self._since = timezone.now()
+                self._poller = threading.Thread(target=self._poll_loop, name='task-events', daemon=True)
+                self._poller.start()
+        return subscription
+
+    def _poll_loop(self):
+        try:
+            while True:
+                time.sleep(_setting('TASK_EVENTS_POLL_SECONDS', 2))
+                with self._lock:
+                    if not self._subscriptions:
+                        self._poller = None
+                        return
+                try:
+                    self.poll_once()
+                except Exception:
+                    logger.exception("Task events poll failed")
+        finally:
+            with self._lock:
+                if self._poller is threading.current_thread():
+                    self._poller = None
+            connection.close()
+
+    def poll_once(self):
+        """Publish the owners whose tasks changed since the previous poll"""
+        started = timezone.now()
+        # Overlap polls: a row written just before the previous poll may have been uncommitted
+        since = self._since - timedelta(seconds=_setting('TASK_SYNC_OVERLAP_SECONDS', 2))
+        owner_ids = set(
+            TaskList.objects.filter(updated_at__gte=since)
+            .order_by().values_list('gestionnaire_id', flat=True).distinct()
+        )
+        owner_ids.update(
+            TaskTombstone.objects.filter(deleted_at__gte=since)
+            .order_by().values_list('owner_id', flat=True).distinct()
+        )
+        self._since = started
+        if owner_ids:
+            self.publish(owner_ids)
+        return owner_ids
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(
+                _setting('TASK_EVENTS_BROKER', 'todolist_app.events.DatabasePollingBroker')
+            )()
+        return _broker
+
+
+def reset_broker():
+    global _broker
+    with _broker_lock:
+        _broker = None
+
+
+def on_tasks_changed(sender, owner_ids, **kwargs):
+    if _broker is not None:
+        _broker.publish(owner_ids)
+
+
+def format_event(event, data, event_id=None):
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append('data: ' + json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+    return '\n'.join(lines) + '\n\n'
+
+
+class EventStream:
+    """The SSE stream of one user, from `since` (Last-Event-ID) or from now"""
+
+    def __init__(self, queryset, user, since=None):
+        self.queryset = queryset
+        self.user = user
+        self.since = since
+        self.reset = since is not None and since.time < retention_start()
+        if since is None or self.reset:
+            self.since = Watermark(timezone.now() - timedelta(seconds=_setting('TASK_SYNC_OVERLAP_SECONDS', 2)))
+        # Rows and tombstones already sent, that the overlap of the watermark returns again
+        self.sent_rows = {}
+        self.sent_deleted = {}
+
+    def preamble(self):
+        chunk = f"retry: {_setting('TASK_EVENTS_RETRY_MS', 3000)}\n\n"
+        if self.reset:
+            chunk += format_event('reset', {'detail': 'Resynchronisation complète nécessaire.'})
+        return chunk
+
+    def poll(self):
+        """SSE events for everything that changed since the watermark ('' if nothing)"""
+        now = timezone.now()
+        overlap = _setting('TASK_SYNC_OVERLAP_SECONDS', 2)
+        limit = _setting('TASK_SYNC_PAGE_SIZE', 500)
+        chunks = []
+        while True:
+            since = self.since
+            # Tombstones up to now: deletions are pushed at once, the overlap dedup covers them
+            rows, deleted, watermark, has_more = changes_since(
+                self.queryset, self.user, since, limit, now, deleted_until=now
+            )
+            events = []
+            for row in rows:
+                sent = self.sent_rows.get(row['id'])
+                if sent == row['updated_at']:
+                    continue
+                self.sent_rows[row['id']] = row['updated_at']
+                kind = 'created' if sent is None and row['created_at'] >= since.time else 'updated'
+                events.append((kind, TaskReadSerializer(row, now=now).data))
+            sent_at = time.monotonic()
+            for task_id in deleted:
+                if task_id not in self.sent_deleted:
+                    self.sent_deleted[task_id] = sent_at
+                    events.append(('deleted', {'id': task_id}))
+
+            self.since = watermark
+            self.sent_rows = {pk: updated for pk, updated in self.sent_rows.items() if updated >= watermark.time}
+            self.sent_deleted = {
+                pk: at for pk, at in self.sent_deleted.items() if at > sent_at - overlap - 1
+            }
+            event_id = str(watermark)
+            for index, (kind, data) in enumerate(events):
+                chunks.append(format_event(kind, data, event_id if index == len(events) - 1 else None))
+            if not has_more:
+                return ''.join(chunks)
+
+    def _subscribe(self):
+        return get_broker().subscribe(ALL_OWNERS if self.user.is_staff else self.user.id)
+
+    def __iter__(self):
+        """
+        The stream for WSGI: holds the worker while open, so it is closed after
+        TASK_EVENTS_WSGI_MAX_SECONDS (below gunicorn's worker timeout) and the
+        client reconnects. Serve the events through ASGI for long-lived streams.
+        """
+        heartbeat = _setting('TASK_EVENTS_HEARTBEAT_SECONDS', 15)
+        deadline = time.monotonic() + min(
+            _setting('TASK_EVENTS_MAX_SECONDS', 300), _setting('TASK_EVENTS_WSGI_MAX_SECONDS', 20)
+        )
+        subscription = self._subscribe()
+        try:
+            yield self.preamble() + self.poll()
+            while time.monotonic() < deadline:
+                if subscription.wait(min(heartbeat, max(deadline - time.monotonic(), 0))):
+                    chunk = self.poll()
+                    if chunk:
+                        yield chunk
+                else:
+                    yield ': keepalive\n\n'
+        finally:
+            get_broker().unsubscribe(subscription)
+
+    async def __aiter__(self):
+        """The stream for ASGI: only polls the database in a thread, when woken"""
+        heartbeat = _setting('TASK_EVENTS_HEARTBEAT_SECONDS', 15)
+        deadline = time.monotonic() + _setting('TASK_EVENTS_MAX_SECONDS', 300)
+        subscription = self._subscribe()
+        poll = sync_to_async(self.poll)
+        try:
+            yield self.preamble() + await poll()
+            while time.monotonic() < deadline:
+                if await subscription.await_notification(min(heartbeat, max(deadline - time.monotonic(), 0))):
+                    chunk = await poll()
+                    if chunk:
+                        yield chunk
+                else:
+                    yield ': keepalive\n\n'
+        finally:
+            get_broker().unsubscribe(subscription)
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets DRF negotiate Accept: text/event-stream; errors are rendered as JSON"""
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return json.dumps(data, ensure_ascii=False).encode()
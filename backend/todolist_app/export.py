@@ -0,0 +1,138 @@
+"""
+Streaming export of tasks as NDJSON or CSV, optionally gzipped.
+
+Rows are read with queryset.iterator(chunk_size) (aiterator() for async
+consumers) and encoded one by one into output chunks of about CHUNK_BYTES, so
+memory use does not depend on the number of tasks exported. Archived tasks
+(ArchivedTask) follow the active ones, with `archived` set. Used by the
+/api/tasks/export/ endpoint and `manage.py export_tasks`.
+"""
+import csv
+import json
+import zlib
+
+from django.utils import timezone
+
+FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+}
+
+COLUMNS = ('id', 'task', 'done', 'gestionnaire', 'gestionnaire_id', 'created_at', 'updated_at', 'archived')
+# Columns of COLUMNS as read from TaskList and ArchivedTask (`archived` is added by the export)
+FIELDS = ('id', 'task', 'done', 'gestionnaire__username', 'gestionnaire_id', 'created_at', 'updated_at')
+
+CHUNK_BYTES = 64 * 1024
+ROWS_PER_QUERY = 2000
+
+
+class _Echo:
+    """File-like object for csv.writer that hands back each line"""
+
+    def write(self, value):
+        return value
+
+
+def content_type(fmt, compress=False):
+    return 'application/gzip' if compress else FORMATS[fmt][0]
+
+
+def filename(fmt, compress=False, name='tasks'):
+    return f"{name}.{FORMATS[fmt][1]}{'.gz' if compress else ''}"
+
+
+def rows_of(queryset):
+    """The exported columns of `queryset`, in primary key order"""
+    return queryset.order_by('id').values_list(*FIELDS)
+
+
+def _sources(queryset, archived):
+    return [(queryset, False)] + ([(archived, True)] if archived is not None else [])
+
+
+class Encoder:
+    """Turns rows into output chunks (bytes) of the given format"""
+
+    def __init__(self, fmt, compress=False):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        self.fmt = fmt
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # 31: gzip
+        self.csv_writer = csv.writer(_Echo())
+        self.timezone = timezone.get_current_timezone()
+        self.buffer = []
+        self.size = 0
+
+    def header(self):
+        if self.fmt == 'csv':
+            return self._add(self.csv_writer.writerow(COLUMNS))
+        return None
+
+    def row(self, values, archived=False):
+        values = [*values, archived]
+        values[5] = self.isoformat(values[5])
+        values[6] = self.isoformat(values[6])
+        if self.fmt == 'csv':
+            line = self.csv_writer.writerow(values)
+        else:
+            line = json.dumps(dict(zip(COLUMNS, values)), ensure_ascii=False) + '\n'
+        return self._add(line)
+
+    def isoformat(self, value):
+        """Same output as DRF's DateTimeField, without its per-call settings lookups"""
+        value = value.astimezone(self.timezone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+    def _add(self, line):
+        """Buffer a line; returns a chunk once CHUNK_BYTES are buffered"""
+        self.buffer.append(line)
+        self.size += len(line)
+        if self.size >= CHUNK_BYTES:
+            return self._flush()
+        return None
+
+    def _flush(self):
+        data = ''.join(self.buffer).encode()
+        self.buffer, self.size = [], 0
+        if self.compressor is not None:
+            data = self.compressor.compress(data)
+        return data or None
+
+    def close(self):
+        """The last chunk"""
+        data = self._flush() or b''
+        if self.compressor is not None:
+            data += self.compressor.flush()
+        return data or None
+
+
+def stream(queryset, fmt='ndjson', compress=False, chunk_size=ROWS_PER_QUERY, archived=None):
+    """Generator of the export of `queryset`, then of the ArchivedTask queryset `archived`"""
+    encoder = Encoder(fmt, compress)
+    chunk = encoder.header()
+    if chunk:
+        yield chunk
+    for source, is_archived in _sources(queryset, archived):
+        for values in rows_of(source).iterator(chunk_size=chunk_size):
+            chunk = encoder.row(values, is_archived)
+            if chunk:
+                yield chunk
+    chunk = encoder.close()
+    if chunk:
+        yield chunk
+
+
+async def astream(queryset, fmt='ndjson', compress=False, chunk_size=ROWS_PER_QUERY, archived=None):
+    """Async generator of the export, for StreamingHttpResponse under ASGI"""
+    encoder = Encoder(fmt, compress)
+    chunk = encoder.header()
+    if chunk:
+        yield chunk
+    for source, is_archived in _sources(queryset, archived):
+        async for values in rows_of(source).aiterator(chunk_size=chunk_size):
+            chunk = encoder.row(values, is_archived)
+            if chunk:
+                yield chunk
+    chunk = encoder.close()
+    if chunk:
+        yield chunk
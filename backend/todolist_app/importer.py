@@ -0,0 +1,122 @@
+"""
+Streaming import of tasks from NDJSON or CSV.
+
+The input is read line by line (NDJSON: one {"task": ..., "done": ...} object per
+line; CSV: a header row with at least a `task` column, e.g. a file from
+export.py). Rows are checked with the rules of TaskSerializer.validate_task on
+plain dicts, and valid ones are written with bulk_create, one transaction per
+batch of `batch_size` rows. run() yields events as it goes, so progress and
+per-row errors are reported without holding the file in memory:
+
+    {"line": 12, "errors": {"task": ["..."]}}             an invalid row
+    {"imported": 2000, "invalid": 1, "lines": 2001}       after each batch
+    {"imported": ..., "invalid": ..., "lines": ..., "done": true}   at the end
+
+Used by the /api/tasks/import/ endpoint and `manage.py import_tasks`.
+"""
+import csv
+import json
+
+from rest_framework import serializers
+
+from .models import TaskList
+from .serializers import validate_task_text
+
+FORMATS = ('ndjson', 'csv')
+BATCH_SIZE = 1000
+
+_done_field = serializers.BooleanField()
+
+
+def decoded(lines):
+    """Lines of a binary stream as text (utf-8, BOM dropped, bad bytes replaced)"""
+    first = True
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8-sig' if first else 'utf-8', errors='replace')
+        first = False
+        yield line
+
+
+def parse(lines, fmt='ndjson'):
+    """(line number, row dict or None, error) for each record of the input"""
+    if fmt == 'csv':
+        reader = csv.DictReader(decoded(lines))
+        if reader.fieldnames is not None and 'task' not in reader.fieldnames:
+            yield 1, None, {'non_field_errors': ["CSV header must have a 'task' column"]}
+            return
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+
+    for number, line in enumerate(decoded(lines), 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield number, None, {'non_field_errors': [f"Invalid JSON: {exc}"]}
+            continue
+        if not isinstance(row, dict):
+            yield number, None, {'non_field_errors': ["Expected a JSON object"]}
+            continue
+        yield number, row, None
+
+
+def validate_row(row):
+    """(task, done) of a valid row, or (None, errors)"""
+    errors = {}
+    task = row.get('task')
+    if not isinstance(task, str):
+        errors['task'] = ["This field is required." if task is None else "Not a valid string."]
+    else:
+        try:
+            task = validate_task_text(task)
+        except serializers.ValidationError as exc:
+            errors['task'] = [str(message) for message in exc.detail]
+
+    done = row.get('done')
+    if done in (None, ''):
+        done = False
+    else:
+        try:
+            done = _done_field.to_internal_value(done)
+        except serializers.ValidationError as exc:
+            errors['done'] = [str(message) for message in exc.detail]
+
+    if errors:
+        return None, errors
+    return (task, done), None
+
+
+def run(lines, owner_id, fmt='ndjson', batch_size=BATCH_SIZE):
+    """Import the tasks of `lines` for `owner_id`; generator of progress/error events"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown import format: {fmt}")
+    imported = invalid = last_line = 0
+    batch = []
+
+    def flush():
+        # TaskList.objects.bulk_create runs in its own transaction (counters included)
+        TaskList.objects.bulk_create(batch)
+        count = len(batch)
+        batch.clear()
+        return count
+
+    for number, row, errors in parse(lines, fmt):
+        last_line = number
+        if errors is None:
+            values, errors = validate_row(row)
+        if errors is not None:
+            invalid += 1
+            yield {'line': number, 'errors': errors}
+            continue
+        task, done = values
+        batch.append(TaskList(gestionnaire_id=owner_id, task=task, done=done))
+        if len(batch) >= batch_size:
+            imported += flush()
+            yield {'imported': imported, 'invalid': invalid, 'lines': last_line}
+
+    if batch:
+        imported += flush()
+    yield {'imported': imported, 'invalid': invalid, 'lines': last_line, 'done': True}
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from todolist_app import archive
+
+
+class Command(BaseCommand):
+    help = "Move the tasks completed long ago from TaskList to the archive, in batches (run it from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=getattr(settings, 'TASK_ARCHIVE_AFTER_DAYS', 30),
+            help="Archive the tasks completed more than this many days ago",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'TASK_ARCHIVE_BATCH_SIZE', 500),
+            help="Tasks moved per transaction",
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help="Seconds to wait between batches",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for total in archive.archive(options['days'], options['batch_size'], options['pause']):
+            if options['verbosity'] > 1:
+                self.stdout.write(f"{total} task(s) archived...")
+        self.stdout.write(self.style.SUCCESS(f"{total} task(s) archived."))
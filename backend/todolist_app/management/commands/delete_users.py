@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from todolist_app import purge
+
+
+class Command(BaseCommand):
+    help = (
+        "Carry out the queued user deletions, deleting their tasks in batches (once, or "
+        "continuously with --loop: the supported worker, which also resumes deletions "
+        "left half done by a stopped worker)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'USER_DELETE_BATCH_SIZE', 1000),
+            help="Tasks deleted per statement",
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help="Seconds to wait between batches",
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help="Keep running and poll the queue",
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help="Seconds between polls when the queue is empty (with --loop)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            while (deletion := purge.claim()) is not None:
+                for deleted in purge.run(deletion, options['batch_size'], options['pause']):
+                    if options['verbosity'] > 1:
+                        self.stdout.write(f"{deletion.username}: {deleted}/{deletion.tasks_total} task(s) deleted...")
+                self.stdout.write(self.style.SUCCESS(
+                    f"User {deletion.username} deleted ({deletion.tasks_deleted} task(s))."
+                ))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,63 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from todolist_app import export
+from todolist_app.models import ArchivedTask, TaskList
+
+
+class Command(BaseCommand):
+    help = (
+        "Export tasks as NDJSON or CSV (optionally gzipped), streamed row by row: "
+        "all tasks, or those of one user with --user; archived tasks included"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help="Username or id of the owner; all users by default",
+        )
+        parser.add_argument(
+            '--format',
+            choices=sorted(export.FORMATS),
+            default='ndjson',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help="Compress the output with gzip",
+        )
+        parser.add_argument(
+            '--output',
+            default='-',
+            help="File to write, '-' for standard output (default)",
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=export.ROWS_PER_QUERY,
+            help="Rows fetched from the database at a time",
+        )
+
+    def handle(self, *args, **options):
+        queryset, archived = TaskList.objects.all(), ArchivedTask.objects.all()
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None and options['user'].isdigit():
+                user = User.objects.filter(pk=int(options['user'])).first()
+            if user is None:
+                raise CommandError(f"Unknown user: {options['user']}")
+            queryset, archived = queryset.filter(gestionnaire=user), archived.filter(gestionnaire=user)
+
+        chunks = export.stream(queryset, options['format'], options['gzip'], options['chunk_size'], archived)
+        if options['output'] == '-':
+            out = sys.stdout.buffer
+            for chunk in chunks:
+                out.write(chunk)
+            out.flush()
+        else:
+            with open(options['output'], 'wb') as out:
+                for chunk in chunks:
+                    out.write(chunk)
+            self.stderr.write(f"Tasks exported to {options['output']}.")
@@ -0,0 +1,63 @@
+import gzip
+import json
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from todolist_app import importer
+
+
+class Command(BaseCommand):
+    help = (
+        "Import tasks for a user from an NDJSON or CSV file (gzipped if it ends in .gz), "
+        "streamed and written in batches"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, '-' for standard input")
+        parser.add_argument('--user', required=True, help="Username or id of the owner")
+        parser.add_argument(
+            '--format',
+            choices=importer.FORMATS,
+            help="Input format; guessed from the file name by default (ndjson otherwise)",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=importer.BATCH_SIZE,
+            help="Rows per INSERT and per transaction",
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['user']).first()
+        if user is None and options['user'].isdigit():
+            user = User.objects.filter(pk=int(options['user'])).first()
+        if user is None:
+            raise CommandError(f"Unknown user: {options['user']}")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        path = options['path']
+        name = path[:-3] if path.endswith('.gz') else path
+        fmt = options['format'] or ('csv' if name.endswith('.csv') else 'ndjson')
+
+        if path == '-':
+            source = sys.stdin.buffer
+        elif path.endswith('.gz'):
+            source = gzip.open(path, 'rb')
+        else:
+            source = open(path, 'rb')
+        try:
+            for event in importer.run(source, user.id, fmt, options['batch_size']):
+                if 'errors' in event:
+                    self.stderr.write(f"Line {event['line']}: {json.dumps(event['errors'], ensure_ascii=False)}")
+                elif event.get('done'):
+                    self.stdout.write(self.style.SUCCESS(
+                        f"{event['imported']} task(s) imported, {event['invalid']} invalid row(s)."
+                    ))
+                else:
+                    self.stdout.write(f"{event['imported']} task(s) imported ({event['lines']} lines read)")
+        finally:
+            if source is not sys.stdin.buffer:
+                source.close()
@@ -0,0 +1,74 @@
+import io
+import pstats
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from complice_taches.profiling import list_profiles, profile_dir
+
+SORT_KEYS = ('cumulative', 'tottime', 'ncalls')
+
+
+class Command(BaseCommand):
+    help = (
+        "List the request profiles saved by ProfilingMiddleware, or print the top "
+        "functions of one of them ('latest'), or of all of them added up ('all')"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'profile',
+            nargs='?',
+            help="File name of a profile, 'latest' or 'all'; lists the profiles if omitted",
+        )
+        parser.add_argument(
+            '--dir',
+            help="Profile directory (settings.PROFILING_DIR by default)",
+        )
+        parser.add_argument(
+            '--path',
+            help="Only the profiles of request paths starting with this",
+        )
+        parser.add_argument(
+            '--sort',
+            choices=SORT_KEYS,
+            default='cumulative',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=25,
+            help="Number of functions to print",
+        )
+
+    def handle(self, *args, **options):
+        directory = Path(options['dir'] or profile_dir())
+        profiles = list_profiles(directory)
+        if options['path']:
+            profiles = [profile for profile in profiles if profile['path'].startswith(options['path'])]
+
+        if not options['profile']:
+            for profile in profiles:
+                self.stdout.write(
+                    f"{profile['time']:%Y-%m-%d %H:%M:%S}  {profile['ms']:>7} ms  "
+                    f"{profile['method']:<6} {profile['path']}  {profile['file'].name}"
+                )
+            self.stdout.write(f"{len(profiles)} profile(s) in {directory}")
+            return
+
+        if options['profile'] == 'all':
+            files = [profile['file'] for profile in profiles]
+        elif options['profile'] == 'latest':
+            files = [profile['file'] for profile in profiles[-1:]]
+        else:
+            files = [directory / options['profile']]
+            if not files[0].is_file():
+                raise CommandError(f"Unknown profile: {options['profile']}")
+        if not files:
+            raise CommandError(f"No profile in {directory}")
+
+        output = io.StringIO()
+        stats = pstats.Stats(*map(str, files), stream=output)
+        stats.strip_dirs().sort_stats(options['sort']).print_stats(options['limit'])
+        self.stdout.write(f"{len(files)} profile(s)")
+        self.stdout.write(output.getvalue())
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from todolist_app.models import TaskTombstone
+
+
+class Command(BaseCommand):
+    help = "Delete task tombstones older than the sync retention period"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=getattr(settings, 'TASK_TOMBSTONE_RETENTION_DAYS', 30),
+            help="Keep tombstones younger than this many days",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        deleted, _ = TaskTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} tombstone(s) deleted."))
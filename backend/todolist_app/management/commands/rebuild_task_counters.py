@@ -0,0 +1,64 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from todolist_app.models import TaskCounter, TaskList
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the per-user task counters from TaskList. "
+        "Run it once after deploying the counters, and with --check to verify them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Only report counters that differ from TaskList, exit with an error if any",
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        start_of_today = timezone.make_aware(datetime.combine(today, time.min))
+        expected = {
+            row.pop('gestionnaire_id'): row
+            for row in TaskList.objects.order_by().values('gestionnaire_id').annotate(
+                total=Count('id'),
+                done=Count('id', filter=Q(done=True)),
+                created_today=Count('id', filter=Q(created_at__gte=start_of_today)),
+            )
+        }
+        zero = {'total': 0, 'done': 0, 'created_today': 0}
+        current = {counter.pk: counter for counter in TaskCounter.objects.all()}
+
+        mismatches = []
+        for owner_id in expected.keys() | current.keys():
+            counts = expected.get(owner_id, zero)
+            counter = current.get(owner_id)
+            actual = counter and {
+                'total': counter.total,
+                'done': counter.done,
+                'created_today': counter.created_today if counter.day == today else 0,
+            }
+            if actual != counts:
+                mismatches.append((owner_id, actual, counts))
+
+        for owner_id, actual, counts in mismatches:
+            self.stdout.write(f"User {owner_id}: counter {actual}, expected {counts}")
+
+        if options['check']:
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} counter(s) out of sync.")
+            self.stdout.write(self.style.SUCCESS("All counters are in sync."))
+            return
+
+        with transaction.atomic():
+            for owner_id, _, counts in mismatches:
+                TaskCounter.objects.update_or_create(
+                    gestionnaire_id=owner_id, defaults={**counts, 'day': today}
+                )
+        self.stdout.write(self.style.SUCCESS(f"{len(mismatches)} counter(s) rebuilt."))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from todolist_app import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-create the full-text search index of the tasks (SQLite) and fill it from TaskList. "
+        "`migrate` already does it when a table rebuild dropped its triggers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help="Database to rebuild the index on",
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            self.stdout.write(f"Nothing to rebuild: the search index is maintained by {connection.vendor}.")
+            return
+        with transaction.atomic(using=options['database']):
+            search.install(connection)
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt ({connection.vendor})."))
@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from todolist_app import outbox
+
+
+class Command(BaseCommand):
+    help = "Send the emails waiting in the outbox (once, or continuously with --loop)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'OUTBOX_BATCH_SIZE', 50),
+            help="Messages sent per SMTP connection",
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help="Keep running and poll the outbox",
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help="Seconds between polls when the outbox is empty (with --loop)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            total = 0
+            while processed := outbox.send_pending(options['batch_size']):
+                total += processed
+            if total:
+                self.stdout.write(f"{total} message(s) processed.")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todolist_app', '0005_alter_tasklist_options_alter_tasklist_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.IntegerField(verbose_name='Task ID')),
+                ('owner_id', models.IntegerField(verbose_name='Owner ID')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, help_text='Date and time when the task was deleted', verbose_name='Deleted At')),
+            ],
+            options={
+                'verbose_name': 'Task tombstone',
+                'verbose_name_plural': 'Task tombstones',
+                'ordering': ['deleted_at'],
+                'indexes': [models.Index(fields=['owner_id', 'deleted_at'], name='todolist_ap_owner_i_36dcc5_idx'), models.Index(fields=['deleted_at'], name='todolist_ap_deleted_c1a66a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('todolist_app', '0006_tasktombstone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('gestionnaire', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_counter', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Owner')),
+                ('total', models.IntegerField(default=0, verbose_name='Total')),
+                ('done', models.IntegerField(default=0, verbose_name='Completed')),
+                ('created_today', models.IntegerField(default=0, help_text='Tasks created on `day`', verbose_name='Created today')),
+                ('day', models.DateField(help_text='Day counted by created_today', null=True, verbose_name='Day')),
+            ],
+            options={
+                'verbose_name': 'Task counter',
+                'verbose_name_plural': 'Task counters',
+            },
+        ),
+    ]
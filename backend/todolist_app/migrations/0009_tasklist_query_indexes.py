@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todolist_app', '0008_outboxemail'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # New indexes first: the table is never left without an index on gestionnaire
+        migrations.AddIndex(
+            model_name='tasklist',
+            index=models.Index(fields=['gestionnaire', '-created_at', '-id'], name='todolist_ap_gestion_3cdf9d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasklist',
+            index=models.Index(fields=['gestionnaire', 'updated_at', 'id'], name='todolist_ap_gestion_a7e517_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasklist',
+            index=models.Index(condition=models.Q(('done', False)), fields=['gestionnaire', '-created_at', '-id'], name='todolist_ap_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasklist',
+            index=models.Index(fields=['updated_at'], name='todolist_ap_updated_c9ff43_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='tasklist',
+            name='todolist_ap_gestion_11c05f_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='tasklist',
+            name='todolist_ap_done_b83e9c_idx',
+        ),
+        migrations.AlterField(
+            model_name='tasklist',
+            name='gestionnaire',
+            field=models.ForeignKey(db_index=False, help_text='User who owns this task', on_delete=django.db.models.deletion.CASCADE, related_name='tasks', to=settings.AUTH_USER_MODEL, verbose_name='Owner'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todolist_app', '0009_tasklist_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTask',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.CharField(max_length=200, verbose_name='Task Description')),
+                ('done', models.BooleanField(default=True, verbose_name='Completed')),
+                ('created_at', models.DateTimeField(verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(verbose_name='Updated At')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, help_text='Date and time when the task was archived', verbose_name='Archived At')),
+                ('gestionnaire', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_tasks', to=settings.AUTH_USER_MODEL, verbose_name='Owner')),
+            ],
+            options={
+                'verbose_name': 'Archived task',
+                'verbose_name_plural': 'Archived tasks',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['gestionnaire', '-created_at', '-id'], name='todolist_ap_gestion_ade227_idx')],
+            },
+        ),
+    ]
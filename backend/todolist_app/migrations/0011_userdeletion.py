@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todolist_app', '0010_archivedtask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.IntegerField(verbose_name='User ID')),
+                ('username', models.CharField(max_length=150, verbose_name='Username')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done')], default='pending', max_length=10, verbose_name='Status')),
+                ('tasks_total', models.PositiveIntegerField(default=0, help_text='Tasks (active and archived) of the user when the deletion was requested', verbose_name='Tasks')),
+                ('tasks_deleted', models.PositiveIntegerField(default=0, verbose_name='Tasks deleted')),
+                ('requested_at', models.DateTimeField(auto_now_add=True, verbose_name='Requested At')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+            ],
+            options={
+                'verbose_name': 'User deletion',
+                'verbose_name_plural': 'User deletions',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'user_id'], name='todolist_ap_status_1f4157_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Full-text search index of the task descriptions on SQLite (see todolist_app/search.py);
+# the PostgreSQL index is built concurrently by 0013.
+# The SQL is frozen here as of this migration: search.py keeps its own copy to
+# repair the index after later table rebuilds.
+
+from django.db import migrations
+
+INSTALL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS todolist_app_tasklist_fts
+        USING fts5(task, owner, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')""",
+    """CREATE TRIGGER IF NOT EXISTS todolist_app_tasklist_fts_insert AFTER INSERT ON todolist_app_tasklist BEGIN
+        INSERT INTO todolist_app_tasklist_fts(rowid, task, owner) VALUES (new.id, new.task, new.gestionnaire_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS todolist_app_tasklist_fts_update AFTER UPDATE OF task, gestionnaire_id
+        ON todolist_app_tasklist BEGIN
+        UPDATE todolist_app_tasklist_fts SET task = new.task, owner = new.gestionnaire_id WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS todolist_app_tasklist_fts_delete AFTER DELETE ON todolist_app_tasklist BEGIN
+        DELETE FROM todolist_app_tasklist_fts WHERE rowid = old.id;
+    END""",
+    "DELETE FROM todolist_app_tasklist_fts",
+    """INSERT INTO todolist_app_tasklist_fts(rowid, task, owner)
+        SELECT id, task, gestionnaire_id FROM todolist_app_tasklist""",
+]
+
+UNINSTALL = [
+    "DROP TRIGGER IF EXISTS todolist_app_tasklist_fts_insert",
+    "DROP TRIGGER IF EXISTS todolist_app_tasklist_fts_update",
+    "DROP TRIGGER IF EXISTS todolist_app_tasklist_fts_delete",
+    "DROP TABLE IF EXISTS todolist_app_tasklist_fts",
+]
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'sqlite':
+            for sql in statements:
+                schema_editor.execute(sql, params=None)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todolist_app', '0011_userdeletion'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(INSTALL), run_on_sqlite(UNINSTALL)),
+    ]
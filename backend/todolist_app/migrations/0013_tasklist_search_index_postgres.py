@@ -0,0 +1,52 @@
+# GIN index of the full-text search on PostgreSQL (see todolist_app/search.py), built
+# with CREATE INDEX CONCURRENTLY: TaskList stays writable while it is built.
+# The index is defined here as of this migration, not imported from search.py.
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+try:
+    from django.contrib.postgres.operations import AddIndexConcurrently
+except ImportError:  # no PostgreSQL driver (SQLite only): the operation does nothing there
+    from django.db.migrations import AddIndex as AddIndexConcurrently
+
+
+class AddSearchIndexConcurrently(AddIndexConcurrently):
+    """
+    AddIndexConcurrently on PostgreSQL only, and outside of the migration state:
+    the index is not in TaskList.Meta.indexes, so SQLite table rebuilds never
+    try to create a GIN index. Skipped if the index is already there (built by
+    an earlier 0012).
+    """
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        connection = schema_editor.connection
+        if connection.vendor != 'postgresql':
+            return
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, 'todolist_app_tasklist')
+        if self.index.name not in constraints:
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('todolist_app', '0012_tasklist_search_index'),
+    ]
+
+    operations = [
+        AddSearchIndexConcurrently(
+            'tasklist', GinIndex(SearchVector('task', config='french'), name='todolist_ap_task_fts_idx')
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 21:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todolist_app', '0013_tasklist_search_index_postgres'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userdeletion',
+            name='claim_token',
+            field=models.CharField(blank=True, help_text='Token of the worker carrying out the deletion', max_length=32, verbose_name='Claim token'),
+        ),
+        migrations.AddField(
+            model_name='userdeletion',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, help_text='Lease of the worker carrying out the deletion, renewed after each batch', null=True, verbose_name='Claimed until'),
+        ),
+    ]
@@ -1,8 +1,186 @@
-from django.db import models
+from django.db import connections, models, router, transaction
+from django.db.models import sql
 from django.contrib.auth.models import User
 from django.core.validators import MinLengthValidator, MaxLengthValidator
 from django.utils import timezone
 
+from . import counters
+from .signals import tasks_changed
+
+
+# Marks a column left untouched by a queryset update
+_UNCHANGED = object()
+
+
+def notify_tasks_changed(owner_ids, using):
+    """Send tasks_changed for these owners once the current transaction commits"""
+    owner_ids = set(owner_ids)
+    if owner_ids:
+        transaction.on_commit(
+            lambda: tasks_changed.send(sender=TaskList, owner_ids=owner_ids),
+            using=using,
+        )
+
+
+def supports_delete_returning(connection):
+    """DELETE ... RETURNING came with INSERT ... RETURNING (PostgreSQL, SQLite 3.35+, MariaDB)"""
+    return connection.features.can_return_rows_from_bulk_insert
+
+
+class TaskListQuerySet(models.QuerySet):
+    """QuerySet with helpers for the task list read paths"""
+
+    # Columns read by TaskSerializer (owner included)
+    SERIALIZER_FIELDS = (
+        'id', 'task', 'done', 'created_at', 'updated_at',
+        'gestionnaire', 'gestionnaire__id', 'gestionnaire__username',
+    )
+
+    # Columns read by TaskReadSerializer, fetched as plain dicts
+    READ_VALUES = (
+        'id', 'task', 'done', 'gestionnaire__username', 'gestionnaire_id',
+        'created_at', 'updated_at',
+    )
+
+    def with_owner(self):
+        """Load the owner in the same query and only the columns the serializer needs"""
+        return self.select_related('gestionnaire').only(*self.SERIALIZER_FIELDS)
+
+    def read_values(self):
+        """Rows as dicts for the read-only serialization path (no model instances)"""
+        return self.values(*self.READ_VALUES)
+
+    def set_done(self, pk, done, owner_id=None):
+        """
+        Set the status of one task with a single conditional UPDATE of done/updated_at,
+        plus one UPDATE of the owner's counters when the row changed.
+        Returns (done, updated_at) of the row, or None if it is not in this queryset.
+        Concurrent toggles are safe: only the one that actually changes the row writes.
+        Pass `owner_id` when the queryset only holds that user's tasks (saves a query).
+        """
+        now = timezone.now()
+        with transaction.atomic(using=self.db, savepoint=False):
+            # The plain QuerySet.update: the condition on done replaces the locking read
+            changed = super(TaskListQuerySet, self.filter(pk=pk).exclude(done=done)).update(
+                done=done, updated_at=now
+            )
+            if changed:
+                if owner_id is None:
+                    owner_id = self.filter(pk=pk).values_list('gestionnaire_id', flat=True).first()
+                counters.apply({owner_id: [0, 1 if done else -1, 0]}, self.db)
+        if changed:
+            notify_tasks_changed([owner_id], self.db)
+            return done, now
+        return self.filter(pk=pk).values_list('done', 'updated_at').first()
+
+    def owner_ids(self):
+        return set(self.order_by().values_list('gestionnaire_id', flat=True).distinct())
+
+    def update(self, **kwargs):
+        """Update the tasks, keeping the owners' counters in sync in the same transaction"""
+        with transaction.atomic(using=self.db, savepoint=False):
+            if 'done' in kwargs or 'gestionnaire' in kwargs or 'gestionnaire_id' in kwargs:
+                before = list(self.select_for_update(of=('self',)).values_list(
+                    'gestionnaire_id', 'done', 'created_at'
+                ))
+                owner_ids = {owner_id for owner_id, _, _ in before}
+            else:
+                before, owner_ids = None, self.owner_ids()
+            rows = super().update(**kwargs)
+            if before:
+                self._update_counters(before, kwargs)
+        if rows:
+            notify_tasks_changed(owner_ids, self.db)
+        return rows
+
+    def _update_counters(self, before, kwargs):
+        done = kwargs.get('done', _UNCHANGED)
+        owner = kwargs.get('gestionnaire_id', kwargs.get('gestionnaire', _UNCHANGED))
+        owner = getattr(owner, 'pk', owner)
+        if hasattr(done, 'resolve_expression') or hasattr(owner, 'resolve_expression'):
+            # New values are computed by the database: recount the owners instead
+            for owner_id in {owner_id for owner_id, _, _ in before}:
+                counters.rebuild(owner_id, self.db)
+            return
+        after = [
+            (owner_id if owner is _UNCHANGED else owner,
+             row_done if done is _UNCHANGED else done,
+             created_at)
+            for owner_id, row_done, created_at in before
+        ]
+        counters.apply(
+            counters.merge(counters.row_deltas(before, -1), counters.row_deltas(after, 1)),
+            self.db,
+        )
+
+    def delete(self):
+        """
+        Delete the tasks, leaving a tombstone for each one for sync clients.
+        Tombstones and counter deltas come from the rows the DELETE itself removed
+        (DELETE ... RETURNING), so a concurrent toggle or insert cannot slip in
+        between reading the rows and deleting them.
+        """
+        if self.query.is_sliced:
+            raise TypeError("Cannot use 'limit' or 'offset' with delete().")
+        with transaction.atomic(using=self.db, savepoint=False):
+            rows = self._delete_returning()
+            TaskTombstone.objects.using(self.db).bulk_create(
+                TaskTombstone(task_id=task_id, owner_id=owner_id) for task_id, owner_id, _, _ in rows
+            )
+            deltas = counters.flag_deltas(((owner_id, done, today) for _, owner_id, done, today in rows), -1)
+            counters.apply(deltas, self.db)
+        notify_tasks_changed(deltas.keys(), self.db)
+        return len(rows), {self.model._meta.label: len(rows)}
+
+    def _delete_returning(self):
+        """Delete the rows; returns (id, owner id, done, created today) of each one"""
+        connection = connections[self.db]
+        if not supports_delete_returning(connection):
+            # No RETURNING (MySQL): read the rows under a lock, then delete exactly those
+            start = counters.start_of_today()
+            rows = [
+                (pk, owner_id, done, created_at >= start)
+                for pk, owner_id, done, created_at in self.order_by().select_for_update(of=('self',))
+                .values_list('id', 'gestionnaire_id', 'done', 'created_at')
+            ]
+            # The base manager's plain QuerySet: no counters, no tombstones
+            self.model._base_manager.using(self.db).filter(pk__in=[row[0] for row in rows]).delete()
+            return rows
+        query = self.query.clone()
+        query.__class__ = sql.DeleteQuery
+        query.clear_ordering(force=True)
+        delete_sql, params = query.get_compiler(self.db).as_sql()
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'{delete_sql} RETURNING {quote("id")}, {quote("gestionnaire_id")}, {quote("done")}, '
+                f'{quote("created_at")} >= %s',
+                [*params, connection.ops.adapt_datetimefield_value(counters.start_of_today())],
+            )
+            return cursor.fetchall()
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db, savepoint=False):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            counters.apply(counters.row_deltas(
+                (obj.gestionnaire_id, obj.done, obj.created_at) for obj in objs
+            ), self.db)
+        notify_tasks_changed((obj.gestionnaire_id for obj in objs), self.db)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        with transaction.atomic(using=self.db, savepoint=False):
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+            if 'done' in fields or 'gestionnaire' in fields:
+                known = [obj for obj in objs if hasattr(obj, '_counted_state')]
+                counters.apply(counters.merge(*(obj._counter_deltas() for obj in known)), self.db)
+                for owner_id in {obj.gestionnaire_id for obj in objs if not hasattr(obj, '_counted_state')}:
+                    counters.rebuild(owner_id, self.db)
+                for obj in objs:
+                    obj._remember_counted_state()
+        notify_tasks_changed((obj.gestionnaire_id for obj in objs), self.db)
+        return rows
+
 
 class TaskList(models.Model):
     """
@@ -15,6 +193,8 @@ class TaskList(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name="tasks",
+        # The indexes of Meta.indexes start with this column
+        db_index=False,
         verbose_name="Owner",
         help_text="User who owns this task"
     )
@@ -50,14 +230,28 @@ class TaskList(models.Model):
     # Optional: Add due date field for future enhancement
     # due_date = models.DateTimeField(null=True, blank=True, verbose_name="Due Date")
 
+    objects = TaskListQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']  # Show newest tasks first
         verbose_name = "Task"
         verbose_name_plural = "Tasks"
+        # Matched to the queries that run most; each one is read in index order, without a sort
         indexes = [
-            models.Index(fields=['gestionnaire', 'done']),
+            # Tasks of a user, newest first (id: tie-breaker of the cursor pagination)
+            models.Index(fields=['gestionnaire', '-created_at', '-id']),
+            # Changes of a user since a watermark (sync, live events)
+            models.Index(fields=['gestionnaire', 'updated_at', 'id']),
+            # Pending tasks of a user (?done=false): a small index, done tasks pile up
+            models.Index(
+                fields=['gestionnaire', '-created_at', '-id'],
+                condition=models.Q(done=False),
+                name='todolist_ap_pending_idx',
+            ),
+            # Staff listing of all tasks
             models.Index(fields=['created_at']),
-            models.Index(fields=['done']),
+            # Changes of all users (staff sync, polling broker of live events)
+            models.Index(fields=['updated_at']),
         ]
         permissions = [
             ("can_view_all_tasks", "Can view all tasks (admin permission)"),
@@ -83,10 +277,54 @@ class TaskList(models.Model):
                 'task': 'Task must be at least 3 characters long'
             })
 
+    COUNTED_FIELDS = {'gestionnaire_id', 'done', 'created_at'}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if cls.COUNTED_FIELDS.issubset(field_names):
+            instance._remember_counted_state()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._remember_counted_state()
+
+    def _remember_counted_state(self):
+        """Keep the values the counters know about, to compute deltas on save"""
+        self._counted_state = (self.gestionnaire_id, self.done, self.created_at)
+
+    def _counter_deltas(self):
+        before = getattr(self, '_counted_state', None)
+        after = (self.gestionnaire_id, self.done, self.created_at)
+        if before is None:
+            return counters.row_deltas([after], 1)
+        return counters.merge(counters.row_deltas([before], -1), counters.row_deltas([after], 1))
+
     def save(self, *args, **kwargs):
         """Override save to ensure validation runs"""
         self.full_clean()  # Run validation
-        super().save(*args, **kwargs)
+        using = kwargs.get('using') or router.db_for_write(self.__class__, instance=self)
+        adding = self._state.adding
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+            if adding or hasattr(self, '_counted_state'):
+                counters.apply(self._counter_deltas(), using)
+            else:
+                counters.rebuild(self.gestionnaire_id, using)
+        self._remember_counted_state()
+        notify_tasks_changed([self.gestionnaire_id], using)
+
+    def delete(self, using=None, keep_parents=False):
+        """Override delete to leave a tombstone for sync clients"""
+        using = using or self._state.db
+        owner_id = self.gestionnaire_id
+        with transaction.atomic(using=using, savepoint=False):
+            TaskTombstone.objects.using(using).create(task_id=self.pk, owner_id=owner_id)
+            result = super().delete(using=using, keep_parents=keep_parents)
+            counters.apply(counters.row_deltas([(owner_id, self.done, self.created_at)], -1), using)
+        notify_tasks_changed([owner_id], using)
+        return result
 
     @property
     def is_overdue(self):
@@ -97,4 +335,283 @@ class TaskList(models.Model):
     @property
     def time_since_creation(self):
         """Get time since task was created"""
-        return timezone.now() - self.created_at
\ No newline at end of file
+        return timezone.now() - self.created_at
+
+
+class TaskTombstoneQuerySet(models.QuerySet):
+
+    def insert_from(self, rows):
+        """One INSERT ... SELECT of a tombstone per (task id, owner id) of a values_list() queryset"""
+        connection = connections[self.db]
+        sql, params = rows.query.get_compiler(rows.db).as_sql()
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {quote(self.model._meta.db_table)} '
+                f'({quote("task_id")}, {quote("owner_id")}, {quote("deleted_at")}) '
+                f'SELECT deleted.*, %s FROM ({sql}) deleted',
+                [connection.ops.adapt_datetimefield_value(timezone.now()), *params],
+            )
+            return cursor.rowcount
+
+
+class TaskTombstone(models.Model):
+    """
+    Trace of a deleted task, used by the sync endpoint to report deletions.
+    Owner and task are stored as plain ids so tombstones outlive both rows.
+    """
+    task_id = models.IntegerField(verbose_name="Task ID")
+
+    owner_id = models.IntegerField(verbose_name="Owner ID")
+
+    deleted_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Deleted At",
+        help_text="Date and time when the task was deleted"
+    )
+
+    objects = TaskTombstoneQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['deleted_at']
+        verbose_name = "Task tombstone"
+        verbose_name_plural = "Task tombstones"
+        indexes = [
+            models.Index(fields=['owner_id', 'deleted_at']),
+            models.Index(fields=['deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"Task {self.task_id} deleted at {self.deleted_at}"
+
+
+class ArchivedTask(models.Model):
+    """
+    Completed task moved out of TaskList by the archiver (see todolist_app/archive.py),
+    so that TaskList and its indexes stay sized to active work.
+    Keeps the id of the task, so a restored task comes back as it was.
+    """
+    id = models.IntegerField(primary_key=True, verbose_name="ID")
+
+    gestionnaire = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="archived_tasks",
+        # The index of Meta.indexes starts with this column
+        db_index=False,
+        verbose_name="Owner"
+    )
+
+    task = models.CharField(max_length=200, verbose_name="Task Description")
+
+    done = models.BooleanField(default=True, verbose_name="Completed")
+
+    created_at = models.DateTimeField(verbose_name="Created At")
+
+    updated_at = models.DateTimeField(verbose_name="Updated At")
+
+    archived_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Archived At",
+        help_text="Date and time when the task was archived"
+    )
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Archived task"
+        verbose_name_plural = "Archived tasks"
+        indexes = [
+            models.Index(fields=['gestionnaire', '-created_at', '-id']),
+        ]
+
+    def __str__(self):
+        return f"{self.task[:30]}... - archived"
+
+
+class TaskCounter(models.Model):
+    """
+    Task counts of one user, maintained by every task write path
+    (see todolist_app/counters.py) so statistics never aggregate over TaskList.
+    """
+    gestionnaire = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="task_counter",
+        verbose_name="Owner"
+    )
+
+    total = models.IntegerField(default=0, verbose_name="Total")
+
+    done = models.IntegerField(default=0, verbose_name="Completed")
+
+    created_today = models.IntegerField(
+        default=0,
+        verbose_name="Created today",
+        help_text="Tasks created on `day`"
+    )
+
+    day = models.DateField(
+        null=True,
+        verbose_name="Day",
+        help_text="Day counted by created_today"
+    )
+
+    class Meta:
+        verbose_name = "Task counter"
+        verbose_name_plural = "Task counters"
+
+    def __str__(self):
+        return f"{self.gestionnaire_id}: {self.done}/{self.total}"
+
+    def as_dict(self):
+        created_today = self.created_today if self.day == timezone.localdate() else 0
+        return {
+            'total': self.total,
+            'done': self.done,
+            'pending': self.total - self.done,
+            'created_today': created_today,
+        }
+
+
+class OutboxEmail(models.Model):
+    """
+    Email waiting to be sent by the outbox worker (see todolist_app/outbox.py).
+    The contact form only writes here, so SMTP latency never holds a request.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    subject = models.CharField(max_length=255, verbose_name="Subject")
+
+    body = models.TextField(verbose_name="Body")
+
+    from_email = models.CharField(max_length=254, verbose_name="From")
+
+    recipients = models.JSONField(
+        verbose_name="Recipients",
+        help_text="List of recipient addresses"
+    )
+
+    reply_to = models.EmailField(
+        blank=True,
+        verbose_name="Reply-To",
+        help_text="Address of the person who filled the contact form"
+    )
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name="Status"
+    )
+
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Attempts")
+
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Next attempt at",
+        help_text="Not sent before this time (retry backoff, or lease of the worker sending it)"
+    )
+
+    claim_token = models.CharField(
+        max_length=32,
+        blank=True,
+        verbose_name="Claim token",
+        help_text="Token of the worker batch currently sending this email"
+    )
+
+    last_error = models.TextField(blank=True, verbose_name="Last error")
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
+
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Sent At")
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Outbox email"
+        verbose_name_plural = "Outbox emails"
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
+
+
+class UserDeletion(models.Model):
+    """
+    Deletion of a user with too many tasks to delete within a request (see
+    todolist_app/purge.py). The user is deactivated at once; the worker deletes
+    the tasks in batches, then the user, and records its progress here.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_DONE = 'done'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_DONE, "Done"),
+    ]
+
+    # Plain id: the record outlives the user
+    user_id = models.IntegerField(verbose_name="User ID")
+
+    username = models.CharField(max_length=150, verbose_name="Username")
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name="Status"
+    )
+
+    tasks_total = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Tasks",
+        help_text="Tasks (active and archived) of the user when the deletion was requested"
+    )
+
+    tasks_deleted = models.PositiveIntegerField(default=0, verbose_name="Tasks deleted")
+
+    claimed_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Claimed until",
+        help_text="Lease of the worker carrying out the deletion, renewed after each batch"
+    )
+
+    claim_token = models.CharField(
+        max_length=32,
+        blank=True,
+        verbose_name="Claim token",
+        help_text="Token of the worker carrying out the deletion"
+    )
+
+    requested_at = models.DateTimeField(auto_now_add=True, verbose_name="Requested At")
+
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Finished At")
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = "User deletion"
+        verbose_name_plural = "User deletions"
+        indexes = [
+            models.Index(fields=['status', 'user_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.username} ({self.status})"
+
+    def as_dict(self):
+        return {
+            'id': self.pk,
+            'user_id': self.user_id,
+            'status': self.status,
+            'tasks_total': self.tasks_total,
+            'tasks_deleted': self.tasks_deleted,
+        }
@@ -0,0 +1,141 @@
+"""
+Persistent outbox for outgoing email.
+
+Views call enqueue() and return immediately. send_pending() claims a batch of due
+messages with a conditional UPDATE (so concurrent workers never send the same
+message twice), sends them over a single SMTP connection, and schedules failed
+ones again with exponential backoff until OUTBOX_MAX_ATTEMPTS is reached.
+
+It runs from `manage.py send_outbox`, or in a background thread of the web
+process when OUTBOX_IN_PROCESS_WORKER is enabled.
+"""
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue(subject, body, recipients, from_email=None, reply_to=''):
+    """Store an email in the outbox; it is sent after the transaction commits"""
+    message = OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipients),
+        reply_to=reply_to,
+    )
+    if _setting('OUTBOX_IN_PROCESS_WORKER', False):
+        transaction.on_commit(wake_worker)
+    return message
+
+
+def wake_worker():
+    """Drain the outbox in a background thread of this process"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='outbox')
+    _executor.submit(_drain)
+
+
+def _drain():
+    try:
+        while send_pending():
+            pass
+    except Exception:
+        logger.exception("Outbox worker failed")
+    finally:
+        close_old_connections()
+
+
+def claim(batch_size, now=None):
+    """Reserve up to batch_size due messages for this worker, for OUTBOX_LEASE_SECONDS"""
+    now = now or timezone.now()
+    token = uuid.uuid4().hex
+    due = OutboxEmail.objects.filter(
+        status=OutboxEmail.STATUS_PENDING, next_attempt_at__lte=now
+    ).order_by('next_attempt_at', 'id')
+    ids = list(due.values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+    lease = now + timedelta(seconds=_setting('OUTBOX_LEASE_SECONDS', 300))
+    # Conditional on the row still being due: a concurrent worker that claimed it first wins
+    OutboxEmail.objects.filter(
+        id__in=ids, status=OutboxEmail.STATUS_PENDING, next_attempt_at__lte=now
+    ).update(next_attempt_at=lease, claim_token=token)
+    return list(OutboxEmail.objects.filter(claim_token=token, next_attempt_at=lease))
+
+
+def backoff(attempts):
+    base = _setting('OUTBOX_RETRY_BASE_SECONDS', 30)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), 6 * 3600))
+
+
+def send_pending(batch_size=None):
+    """Send one batch of due messages; returns the number of messages processed"""
+    batch_size = batch_size or _setting('OUTBOX_BATCH_SIZE', 50)
+    max_attempts = _setting('OUTBOX_MAX_ATTEMPTS', 5)
+    messages = claim(batch_size)
+    if not messages:
+        return 0
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        for message in messages:
+            _record_failure(message, exc, max_attempts)
+        return len(messages)
+
+    try:
+        for message in messages:
+            email = EmailMessage(
+                message.subject,
+                message.body,
+                message.from_email,
+                message.recipients,
+                reply_to=[message.reply_to] if message.reply_to else None,
+                connection=connection,
+            )
+            try:
+                email.send()
+            except Exception as exc:
+                _record_failure(message, exc, max_attempts)
+            else:
+                OutboxEmail.objects.filter(pk=message.pk).update(
+                    status=OutboxEmail.STATUS_SENT,
+                    attempts=message.attempts + 1,
+                    sent_at=timezone.now(),
+                    claim_token='',
+                    last_error='',
+                )
+    finally:
+        connection.close()
+    return len(messages)
+
+
+def _record_failure(message, exc, max_attempts):
+    attempts = message.attempts + 1
+    failed = attempts >= max_attempts
+    logger.warning("Outbox email %s failed (attempt %s): %s", message.pk, attempts, exc)
+    OutboxEmail.objects.filter(pk=message.pk).update(
+        status=OutboxEmail.STATUS_FAILED if failed else OutboxEmail.STATUS_PENDING,
+        attempts=attempts,
+        next_attempt_at=timezone.now() + backoff(attempts),
+        claim_token='',
+        last_error=str(exc),
+    )
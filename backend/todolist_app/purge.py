@@ -0,0 +1,168 @@
+"""
+Deletion of users and of all their tasks.
+
+Deleting a user through the ORM cascades to its tasks in one statement (and the
+admin confirmation page loads every one of them). purge() deletes the tasks
+first, in batches of USER_DELETE_BATCH_SIZE: one SELECT of ids, one INSERT ...
+SELECT of their tombstones and one raw DELETE per batch, no model instances, no
+signals, so memory and lock time do not depend on the number of tasks. The
+tombstones are kept (prune_task_tombstones expires them): staff sync clients and
+event streams see every user's tasks and learn from them that these are gone.
+The user is deleted last, with nothing left to cascade to.
+
+delete_user() runs purge() inline for accounts of up to
+USER_DELETE_INLINE_MAX_TASKS tasks. Bigger accounts are deactivated at once and
+queued as a UserDeletion, carried out by `manage.py delete_users --loop` (the
+supported worker) or, if enabled, by a background thread of the web process
+(USER_DELETE_IN_PROCESS_WORKER), which records the progress on the UserDeletion.
+
+A worker claims a deletion with a conditional UPDATE (like the outbox) for
+USER_DELETE_LEASE_SECONDS, renewed after each batch, so two workers never purge
+the same user at once. A deletion left half done by a worker that stopped is
+claimed again once its lease has expired, and resumes where it stopped.
+"""
+import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections, router, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import counters
+from .models import ArchivedTask, TaskList, TaskTombstone, UserDeletion, notify_tasks_changed
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def count_tasks(user_id):
+    """Active (from the counter row) and archived tasks of a user"""
+    return counters.get_counts(user_id)['total'] + ArchivedTask.objects.filter(gestionnaire_id=user_id).count()
+
+
+def delete_batch(queryset, batch_size):
+    """Delete up to `batch_size` tasks of the queryset with one DELETE, leaving tombstones; returns how many"""
+    ids = list(queryset.order_by().values_list('pk', flat=True)[:batch_size])
+    if not ids:
+        return 0
+    batch = queryset.model._base_manager.using(queryset.db).filter(pk__in=ids)
+    with transaction.atomic(using=batch.db):
+        TaskTombstone.objects.using(batch.db).insert_from(batch.order_by().values_list('id', 'gestionnaire_id'))
+        # Plain DELETE ... WHERE id IN (...): no collector, no signals
+        return batch._raw_delete(batch.db)
+
+
+def purge(user_id, batch_size=None, pause=0):
+    """Delete the tasks of a user in batches, then the user; yields the running count of tasks deleted"""
+    batch_size = batch_size or _setting('USER_DELETE_BATCH_SIZE', 1000)
+    using = router.db_for_write(TaskList)
+    deleted = 0
+    for model in (TaskList, ArchivedTask):
+        tasks = model._base_manager.using(using).filter(gestionnaire_id=user_id)
+        while count := delete_batch(tasks, batch_size):
+            deleted += count
+            yield deleted
+            if pause:
+                time.sleep(pause)  # let other writers in between batches
+    User.objects.using(using).filter(pk=user_id).delete()
+    notify_tasks_changed([user_id], using)
+
+
+def delete_user(user, batch_size=None):
+    """
+    Delete a user and its tasks: now for small accounts (returns None), otherwise
+    deactivate it and queue the deletion (returns the UserDeletion).
+    """
+    pending = UserDeletion.objects.filter(user_id=user.pk, status=UserDeletion.STATUS_PENDING).first()
+    if pending is not None:
+        return pending
+    total = count_tasks(user.pk)
+    if total <= _setting('USER_DELETE_INLINE_MAX_TASKS', 5000):
+        for _ in purge(user.pk, batch_size):
+            pass
+        return None
+
+    user.is_active = False  # through save(): the cached user is invalidated
+    user.save(update_fields=['is_active'])
+    deletion = UserDeletion.objects.create(user_id=user.pk, username=user.username, tasks_total=total)
+    if _setting('USER_DELETE_IN_PROCESS_WORKER', False):
+        transaction.on_commit(wake_worker)
+    return deletion
+
+
+def _lease(now=None):
+    return (now or timezone.now()) + timedelta(seconds=_setting('USER_DELETE_LEASE_SECONDS', 300))
+
+
+def claim(now=None):
+    """Reserve the oldest pending deletion that no live worker holds; returns it, or None"""
+    now = now or timezone.now()
+    token = uuid.uuid4().hex
+    claimable = UserDeletion.objects.filter(
+        Q(claimed_until__isnull=True) | Q(claimed_until__lt=now), status=UserDeletion.STATUS_PENDING,
+    )
+    for pk in claimable.order_by('id').values_list('pk', flat=True)[:10]:
+        # Conditional on the row still being claimable: a concurrent worker that claimed it first wins
+        if claimable.filter(pk=pk).update(claim_token=token, claimed_until=_lease(now)):
+            return UserDeletion.objects.get(pk=pk)
+    return None
+
+
+def run(deletion, batch_size=None, pause=0):
+    """Carry out a claimed deletion; yields the running count of tasks deleted"""
+    # A resumed deletion: the tasks of the earlier batches are gone already
+    start = deletion.tasks_deleted
+    for deleted in purge(deletion.user_id, batch_size, pause):
+        deletion.tasks_deleted = start + deleted
+        renewed = UserDeletion.objects.filter(pk=deletion.pk, claim_token=deletion.claim_token).update(
+            tasks_deleted=deletion.tasks_deleted, claimed_until=_lease()
+        )
+        if not renewed:
+            logger.warning("Deletion of user %s taken over by another worker", deletion.user_id)
+            return
+        yield deletion.tasks_deleted
+    deletion.status = UserDeletion.STATUS_DONE
+    deletion.finished_at = timezone.now()
+    finished = UserDeletion.objects.filter(pk=deletion.pk, claim_token=deletion.claim_token).update(
+        status=deletion.status, finished_at=deletion.finished_at, claim_token='', claimed_until=None
+    )
+    if not finished:
+        return
+    logger.info("User %s deleted with %s task(s)", deletion.user_id, deletion.tasks_deleted)
+
+
+def run_pending(batch_size=None, pause=0):
+    """Carry out the queued deletions that no other worker holds; returns how many"""
+    count = 0
+    while (deletion := claim()) is not None:
+        for _ in run(deletion, batch_size, pause):
+            pass
+        count += 1
+    return count
+
+
+def wake_worker():
+    """Carry out the queued deletions in a background thread of this process"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='purge')
+    _executor.submit(_drain)
+
+
+def _drain():
+    try:
+        run_pending()
+    except Exception:
+        logger.exception("User deletion worker failed")
+    finally:
+        close_old_connections()
@@ -0,0 +1,165 @@
+"""
+Full-text search over the task descriptions, backed by an index.
+
+SQLite: an FTS5 table (todolist_app_tasklist_fts) with the description and the
+owner id of each task, kept in sync by triggers on todolist_app_tasklist, so
+every write path (ORM, bulk operations, raw deletes, admin) updates it. The
+owner is an indexed column: a user's search is an intersection of posting lists
+inside the index, ranked by bm25, whatever the number of tasks of other users.
+
+PostgreSQL: a GIN index on to_tsvector('french', task), which the database
+maintains itself; results are ranked by ts_rank. Migration 0013 builds it with
+CREATE INDEX CONCURRENTLY, so writes to TaskList go on while it is built.
+
+Other backends fall back to an (unindexed) icontains filter. Every search term
+is a prefix ("cour" finds "courses"; FTS5 keeps prefix indexes for 2 to 4
+characters); on SQLite accents are ignored.
+
+Migrations that rebuild todolist_app_tasklist on SQLite (most AlterField) drop
+its triggers: after every `migrate`, on_post_migrate() re-creates whatever is
+missing and refills the index (`manage.py rebuild_task_search` does it by hand).
+"""
+import logging
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections, router
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+
+from .models import TaskList
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'todolist_app_tasklist_fts'
+POSTGRES_CONFIG = 'french'
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MAX_TERMS = 10
+
+# Same SQL as migration 0012 (which keeps its own copy), to repair the index
+SQLITE_INSTALL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE}
+        USING fts5(task, owner, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON todolist_app_tasklist BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, task, owner) VALUES (new.id, new.task, new.gestionnaire_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE OF task, gestionnaire_id
+        ON todolist_app_tasklist BEGIN
+        UPDATE {FTS_TABLE} SET task = new.task, owner = new.gestionnaire_id WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON todolist_app_tasklist BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END""",
+    f"DELETE FROM {FTS_TABLE}",
+    f"INSERT INTO {FTS_TABLE}(rowid, task, owner) SELECT id, task, gestionnaire_id FROM todolist_app_tasklist",
+]
+
+SQLITE_OBJECTS = {FTS_TABLE, f'{FTS_TABLE}_insert', f'{FTS_TABLE}_update', f'{FTS_TABLE}_delete'}
+
+# The migration that installs the index
+MIGRATION = ('todolist_app', '0012_tasklist_search_index')
+
+
+def install(connection):
+    """Re-create the SQLite index on this connection and refill it (on_post_migrate, rebuild_task_search)"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for sql in SQLITE_INSTALL:
+            cursor.execute(sql)
+
+
+def missing(connection):
+    """Names of the SQLite index objects (table, triggers) that are not in the database"""
+    if connection.vendor != 'sqlite':
+        return set()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name IN (%s)"
+            % ', '.join(['%s'] * len(SQLITE_OBJECTS)),
+            sorted(SQLITE_OBJECTS),
+        )
+        return SQLITE_OBJECTS - {row[0] for row in cursor.fetchall()}
+
+
+def on_post_migrate(sender, using, **kwargs):
+    """Re-create the SQLite triggers that a rebuild of todolist_app_tasklist dropped"""
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or MIGRATION not in MigrationRecorder(connection).applied_migrations():
+        return
+    gone = missing(connection)
+    if gone:
+        install(connection)
+        logger.warning("Task search index re-created on %s (missing: %s)", using, ', '.join(sorted(gone)))
+
+
+def terms(text):
+    """Words of a search, without any query syntax"""
+    return re.findall(r'\w+', text or '')[:MAX_TERMS]
+
+
+def _fts_query(words, owner_id=None):
+    query = ' '.join(f'task : "{word}" *' for word in words)
+    if owner_id is not None:
+        query += f' owner : "{int(owner_id)}"'
+    return query
+
+
+def _vector():
+    return SearchVector('task', config=POSTGRES_CONFIG)
+
+
+def _tsquery(words):
+    return SearchQuery(' & '.join(f'{word}:*' for word in words), config=POSTGRES_CONFIG, search_type='raw')
+
+
+def matching(queryset, text):
+    """Tasks of the queryset matching all the words of `text` (unranked, e.g. for the admin)"""
+    words = terms(text)
+    if not words:
+        return queryset.none()
+    vendor = connections[queryset.db].vendor
+    if vendor == 'sqlite':
+        ids = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [_fts_query(words)])
+        return queryset.filter(pk__in=ids)
+    if vendor == 'postgresql':
+        return queryset.annotate(search=_vector()).filter(search=_tsquery(words))
+    return queryset.filter(*(Q(task__icontains=word) for word in words))
+
+
+def search_ids(owner_id, text, limit=DEFAULT_LIMIT):
+    """Ids of the tasks of `owner_id` matching all the words of `text`, best match first"""
+    words = terms(text)
+    if not words:
+        return []
+    using = router.db_for_read(TaskList)
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            # bm25 weights: the owner column does not count in the rank
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}, 1.0, 0.0), rowid DESC LIMIT %s',
+                [_fts_query(words, owner_id), limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    tasks = TaskList.objects.using(using).filter(gestionnaire_id=owner_id)
+    if connection.vendor == 'postgresql':
+        query = _tsquery(words)
+        ranked = tasks.annotate(search=_vector()).filter(search=query).annotate(
+            rank=SearchRank(F('search'), query)
+        ).order_by('-rank', '-id')
+    else:
+        ranked = matching(tasks, text).order_by('-created_at', '-id')
+    return list(ranked.values_list('id', flat=True)[:limit])
+
+
+def search(queryset, owner_id, text, limit=DEFAULT_LIMIT):
+    """read_values() rows of the tasks of `owner_id` matching `text`, best match first"""
+    ids = search_ids(owner_id, text, limit)
+    rows = {row['id']: row for row in queryset.filter(pk__in=ids).read_values()}
+    return [rows[pk] for pk in ids if pk in rows]
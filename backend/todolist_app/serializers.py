@@ -1,9 +1,29 @@
+from collections import Counter
+from datetime import timedelta
+
 from rest_framework import serializers
 from django.utils import timezone
 from django.core.validators import MinLengthValidator
 from .models import TaskList
 
 
+def validate_task_text(value):
+    """Rules of the task field, shared with the import pipeline (todolist_app/importer.py)"""
+    value = value.strip()
+
+    if len(value) < 3:
+        raise serializers.ValidationError(
+            "Task must be at least 3 characters long"
+        )
+
+    if len(value) > 200:
+        raise serializers.ValidationError(
+            "Task cannot exceed 200 characters"
+        )
+
+    return value
+
+
 class TaskSerializer(serializers.ModelSerializer):
     """
     Serializer for Task model with enhanced validation and metadata.
@@ -84,24 +104,13 @@ class TaskSerializer(serializers.ModelSerializer):
 
     def validate_task(self, value):
         """Validate task field"""
-        value = value.strip()
-
-        if len(value) < 3:
-            raise serializers.ValidationError(
-                "Task must be at least 3 characters long"
-            )
-
-        if len(value) > 200:
-            raise serializers.ValidationError(
-                "Task cannot exceed 200 characters"
-            )
-
-        return value
+        return validate_task_text(value)
 
     def validate(self, data):
         """Object-level validation"""
-        # Prevent marking empty tasks as done
-        if data.get('done') and len(data.get('task', '').strip()) < 3:
+        # Prevent marking empty tasks as done; partial updates keep the current text
+        task = data.get('task', self.instance.task if self.instance is not None else '')
+        if data.get('done') and len(task.strip()) < 3:
             raise serializers.ValidationError({
                 'task': 'Task must be at least 3 characters to mark as done'
             })
@@ -119,6 +128,95 @@ class TaskSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
+class BulkTaskItemsSerializer(serializers.Serializer):
+    """Payload of bulk_create / bulk_update: a list of task payloads"""
+    tasks = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=500,
+        help_text="Task payloads, validated one by one with TaskSerializer"
+    )
+
+    def validate_tasks(self, value):
+        """bulk_update reports one result per task id: each id at most once"""
+        ids = Counter(item['id'] for item in value if isinstance(item.get('id'), int))
+        duplicates = sorted(pk for pk, count in ids.items() if count > 1)
+        if duplicates:
+            raise serializers.ValidationError(
+                f"Duplicate task ids: {', '.join(map(str, duplicates))}"
+            )
+        return value
+
+
+class BulkTaskIdsSerializer(serializers.Serializer):
+    """Payload of bulk_delete: a list of task ids"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=500,
+        help_text="IDs of the tasks to act on"
+    )
+
+
+class BulkTaskToggleSerializer(BulkTaskIdsSerializer):
+    """Payload of bulk_toggle: a list of task ids and the new status"""
+    done = serializers.BooleanField(help_text="New completion status")
+
+
+class TaskReadSerializer:
+    """
+    Read-only fast path for TaskSerializer, used by list and retrieve.
+    Works on TaskList.objects.read_values() dicts instead of model instances,
+    skips the DRF field machinery and reads the current time once per call.
+    Output is identical to TaskSerializer(...).data.
+    """
+    datetime_format = "%d %b %Y %H:%M"
+
+    def __init__(self, instance, many=False, now=None):
+        self.instance = instance
+        self.many = many
+        self.now = now or timezone.now()
+        self.recent_cutoff = self.now - timedelta(days=1)
+        self.timezone = timezone.get_current_timezone()
+        # When the first rendered is_recent turns false: the rendering is stale from then on
+        self.valid_until = None
+
+    def format_datetime(self, value):
+        """Same rendering as serializers.DateTimeField(format=datetime_format)"""
+        if value is None:
+            return None
+        return value.astimezone(self.timezone).strftime(self.datetime_format)
+
+    def to_representation(self, row):
+        format_datetime = self.format_datetime
+        created_at = row['created_at']
+        done = row['done']
+        is_recent = created_at > self.recent_cutoff
+        if is_recent and (self.valid_until is None or created_at + timedelta(days=1) < self.valid_until):
+            self.valid_until = created_at + timedelta(days=1)
+        data = {
+            'id': row['id'],
+            'task': row['task'],
+            'done': done,
+            'gestionnaire': row['gestionnaire__username'],
+            'gestionnaire_id': row['gestionnaire_id'],
+            'created_at': format_datetime(created_at),
+            'updated_at': format_datetime(row['updated_at']),
+            'is_recent': is_recent,
+            'task_length': len(row['task']),
+            'status': "Completed" if done else "Pending",
+        }
+        if 'archived' in row:  # list with ?include_archived=true (archive.with_archived)
+            data['archived'] = row['archived']
+        return data
+
+    @property
+    def data(self):
+        if self.many:
+            return [self.to_representation(row) for row in self.instance]
+        return self.to_representation(self.instance)
+
+
 class ContactSerializer(serializers.Serializer):
     """
     Serializer for contact form submissions.
@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent after commit whenever tasks are created, changed or deleted, whatever the write
+# path (model save/delete, queryset update/delete, bulk operations, admin actions).
+# Arguments: owner_ids (set of user ids whose tasks changed).
+tasks_changed = Signal()
@@ -0,0 +1,81 @@
+"""
+Changes of a user's tasks since a watermark, shared by the /api/tasks/sync/
+endpoint and the live event stream (events.py).
+
+The watermark is a position in the (updated_at, id) order of the tasks, so a page
+never ends in the middle of rows sharing one updated_at (queryset updates and bulk
+toggles stamp the same time on all their rows).
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import DateTimeField
+
+from .models import TaskTombstone
+
+_iso = DateTimeField()
+
+
+class Watermark(namedtuple('Watermark', ['time', 'id'], defaults=[None])):
+    """
+    Rows after (time, id) in the (updated_at, id) order; without id, every row
+    updated at `time` or later (the watermark of the last page, see the overlap).
+    Serialized as '<ISO 8601>' or '<ISO 8601>~<id>'.
+    """
+
+    @classmethod
+    def parse(cls, value):
+        time, _, pk = value.partition('~')
+        try:
+            return cls(_iso.to_internal_value(time), int(pk) if pk else None)
+        except ValueError:
+            raise ValidationError({'since': "Watermark invalide."})
+
+    def __str__(self):
+        iso = _iso.to_representation(self.time)
+        return iso if self.id is None else f'{iso}~{self.id}'
+
+
+def retention_start(now=None):
+    """Watermarks older than this may have lost tombstones: a full resync is needed"""
+    retention = getattr(settings, 'TASK_TOMBSTONE_RETENTION_DAYS', 30)
+    return (now or timezone.now()) - timedelta(days=retention)
+
+
+def changes_since(queryset, user, since, limit, now=None, deleted_until=None):
+    """
+    (rows, deleted ids, watermark, has_more) for the tasks of `queryset` after the
+    Watermark `since`. rows are read_values() dicts ordered by (updated_at, id), at
+    most `limit` of them. Tombstones are read up to the watermark, or up to
+    `deleted_until` if given.
+    """
+    # Rows saved just before `now` may still be uncommitted: hand out a watermark
+    # slightly in the past so they are picked up (again) by the next call.
+    overlap = timedelta(seconds=getattr(settings, 'TASK_SYNC_OVERLAP_SECONDS', 2))
+    now = now or timezone.now()
+
+    changed = queryset.order_by('updated_at', 'id')
+    if since and since.id is None:
+        changed = changed.filter(updated_at__gte=since.time)
+    elif since:
+        changed = changed.filter(Q(updated_at__gt=since.time) | Q(updated_at=since.time, id__gt=since.id))
+    rows = list(changed.read_values()[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if has_more:
+        watermark = Watermark(rows[-1]['updated_at'], rows[-1]['id'])
+    else:
+        watermark = Watermark(now - overlap)
+
+    deleted = TaskTombstone.objects.filter(
+        deleted_at__lte=deleted_until if deleted_until and not has_more else watermark.time
+    )
+    if not user.is_staff:
+        deleted = deleted.filter(owner_id=user.id)
+    if since:
+        deleted = deleted.filter(deleted_at__gte=since.time)
+    return rows, list(deleted.values_list('task_id', flat=True).distinct()), watermark, has_more
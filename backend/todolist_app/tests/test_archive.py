@@ -0,0 +1,105 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from todolist_app import archive, counters
+from todolist_app.models import ArchivedTask, TaskList, TaskTombstone
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(username="ines", password="pwd123")
+
+
+def make_tasks(user, old_done=3):
+    """`old_done` tasks completed 60 days ago, plus a recent done task and a pending one"""
+    tasks = TaskList.objects.bulk_create(
+        [TaskList(gestionnaire=user, task=f"Ancienne {i}", done=True) for i in range(old_done)]
+        + [TaskList(gestionnaire=user, task="Récente", done=True), TaskList(gestionnaire=user, task="En cours")]
+    )
+    old = timezone.now() - timedelta(days=60)
+    TaskList.objects.filter(task__startswith="Ancienne").update(created_at=old, updated_at=old)
+    counters.rebuild(user.id)  # created_today, after the backdating
+    return tasks
+
+
+def assert_counters_match(user, total):
+    counts = counters.get_counts(user.id)
+    assert {name: counts[name] for name in ("total", "done", "created_today")} == counters.compute(user.id)
+    assert counts["total"] == total
+
+
+@pytest.mark.django_db
+def test_archive_moves_old_completed_tasks_in_batches(user):
+    make_tasks(user, old_done=5)
+
+    totals = list(archive.archive(days=30, batch_size=2))
+
+    assert totals == [2, 4, 5]
+    assert sorted(TaskList.objects.values_list("task", flat=True)) == ["En cours", "Récente"]
+    assert ArchivedTask.objects.filter(gestionnaire=user).count() == 5
+    assert_counters_match(user, total=2)
+
+
+@pytest.mark.django_db
+def test_archived_tasks_are_not_deleted_for_sync_clients(user):
+    make_tasks(user)
+    client = APIClient()
+    client.force_authenticate(user=user)
+    watermark = client.get(reverse("tasks-sync")).data["watermark"]
+
+    list(archive.archive(days=30))
+
+    assert not TaskTombstone.objects.filter(owner_id=user.id).exists()
+    assert client.get(reverse("tasks-sync"), {"since": watermark}).data["deleted"] == []
+    stats = client.get(reverse("tasks-stats")).data["user"]
+    assert (stats["total"], stats["done"], stats["archived"]) == (2, 1, 3)
+
+
+@pytest.mark.django_db
+def test_list_includes_archived_tasks_on_request(user):
+    make_tasks(user)
+    call_command("archive_tasks", days=30, verbosity=0)
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    active = client.get(reverse("tasks-list")).data["results"]
+    everything = client.get(reverse("tasks-list"), {"include_archived": "true"}).data["results"]
+    pending = client.get(reverse("tasks-list"), {"include_archived": "true", "done": "false"}).data["results"]
+
+    assert [task["task"] for task in active] == ["En cours", "Récente"]
+    assert "archived" not in active[0]
+    assert len(everything) == 5
+    assert [task["archived"] for task in everything] == [False, False, True, True, True]
+    assert [task["task"] for task in pending] == ["En cours"]
+
+
+@pytest.mark.django_db
+def test_restore_brings_tasks_back_as_they_were(user, django_capture_on_commit_callbacks):
+    make_tasks(user)
+    archive_ids = list(TaskList.objects.filter(task__startswith="Ancienne").values_list("id", "created_at"))
+    list(archive.archive(days=30))
+    other = User.objects.create_user(username="jules", password="pwd123")
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.post(reverse("tasks-restore"), {"ids": [archive_ids[0][0], 999]}, format="json")
+    assert response.data["results"] == [
+        {"id": archive_ids[0][0], "status": "restored"}, {"id": 999, "status": "not_found"},
+    ]
+
+    task = TaskList.objects.get(pk=archive_ids[0][0])
+    assert task.done and task.created_at == archive_ids[0][1]
+    assert not ArchivedTask.objects.filter(pk=task.pk).exists()
+    assert not TaskTombstone.objects.filter(task_id=task.pk).exists()
+    assert_counters_match(user, total=3)
+
+    # Archived tasks of other users cannot be restored
+    client.force_authenticate(user=other)
+    response = client.post(reverse("tasks-restore"), {"ids": [archive_ids[1][0]]}, format="json")
+    assert response.data["results"] == [{"id": archive_ids[1][0], "status": "not_found"}]
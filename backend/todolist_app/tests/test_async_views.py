@@ -0,0 +1,68 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from todolist_app.models import TaskList
+
+
+def call(method, url, user=None, token=None, **kwargs):
+    """Run one request through the async client (and the async views)"""
+    if user is not None:
+        token = AccessToken.for_user(user)
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    return async_to_sync(getattr(AsyncClient(), method))(url, headers=headers, **kwargs)
+
+
+@pytest.mark.django_db
+def test_async_list_and_detail_match_the_sync_endpoints():
+    user = User.objects.create_user(username="ursula", password="pwd123")
+    other = User.objects.create_user(username="victor", password="pwd123")
+    tasks = [TaskList.objects.create(gestionnaire=user, task=f"Tâche {i}") for i in range(3)]
+    foreign = TaskList.objects.create(gestionnaire=other, task="Not yours")
+    sync_client = APIClient()
+    sync_client.force_authenticate(user=user)
+
+    response = call("get", reverse("async-task-list"), user, data={"page_size": 2})
+    expected = sync_client.get(reverse("tasks-list"), {"pagination": "cursor", "page_size": 2})
+    assert response.status_code == 200
+    assert response.json()["results"] == expected.json()["results"]
+    assert response.json()["next"] is not None
+
+    detail = call("get", reverse("async-task-detail", args=[tasks[0].id]), user)
+    assert detail.content == sync_client.get(reverse("tasks-detail", args=[tasks[0].id])).content
+
+    assert call("get", reverse("async-task-detail", args=[foreign.id]), user).status_code == 404
+    assert call("get", reverse("async-task-list"), user, data={"cursor": "bogus"}).status_code == 404
+
+
+@pytest.mark.django_db
+def test_async_toggle_updates_the_task():
+    user = User.objects.create_user(username="wanda", password="pwd123")
+    task = TaskList.objects.create(gestionnaire=user, task="Water the plants")
+
+    response = call("post", reverse("async-task-mark-complete", args=[task.id]), user)
+    assert response.status_code == 200
+    assert response.json()["done"] is True
+    task.refresh_from_db()
+    assert task.done is True
+
+    response = call("post", reverse("async-task-mark-pending", args=[task.id]), user)
+    assert response.json()["status"] == "Tâche en attente"
+    assert call("get", reverse("async-task-mark-pending", args=[task.id]), user).status_code == 405
+
+
+@pytest.mark.django_db
+def test_async_endpoints_require_a_valid_token():
+    user = User.objects.create_user(username="xavier", password="pwd123", email="x@example.com")
+
+    response = call("get", reverse("async-task-list"))
+    assert response.status_code == 401
+    assert response["WWW-Authenticate"].startswith("Bearer")
+    assert call("get", reverse("async-me"), token="not-a-token").status_code == 401
+
+    assert call("get", reverse("async-me"), user).json() == {
+        "nom_utilisateur": "xavier", "email": "x@example.com", "prenom": "", "nom": "", "est_admin": False,
+    }
@@ -0,0 +1,85 @@
+import pytest
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from todolist_app.models import TaskList, TaskTombstone
+
+
+@pytest.fixture
+def owner():
+    return User.objects.create_user(username="ivan", password="pwd123")
+
+
+@pytest.fixture
+def client(owner):
+    client = APIClient()
+    client.force_authenticate(user=owner)
+    return client
+
+
+@pytest.mark.django_db
+def test_bulk_create_reports_each_item(client, owner):
+    response = client.post(reverse("tasks-bulk-create"), {
+        "tasks": [{"task": "Water plants"}, {"task": "  x "}, {"task": "Pay rent", "done": True}],
+    }, format="json")
+
+    assert response.status_code == 200
+    statuses = [result["status"] for result in response.data["results"]]
+    assert statuses == ["created", "invalid", "created"]
+    assert set(TaskList.objects.filter(gestionnaire=owner).values_list("task", flat=True)) == \
+        {"Water plants", "Pay rent"}
+
+
+@pytest.mark.django_db
+def test_bulk_update_of_done_only_keeps_the_text(client, owner):
+    tasks = [TaskList.objects.create(gestionnaire=owner, task=f"My task {i}") for i in range(2)]
+
+    response = client.post(reverse("tasks-bulk-update"), {
+        "tasks": [{"id": tasks[0].id, "done": True}, {"id": tasks[1].id, "done": True, "task": "x"}],
+    }, format="json")
+
+    assert [r["status"] for r in response.data["results"]] == ["updated", "invalid"]
+    assert TaskList.objects.get(pk=tasks[0].id).done
+    assert TaskList.objects.get(pk=tasks[0].id).task == "My task 0"
+    assert not TaskList.objects.get(pk=tasks[1].id).done
+
+
+@pytest.mark.django_db
+def test_bulk_update_rejects_duplicate_ids(client, owner):
+    task = TaskList.objects.create(gestionnaire=owner, task="My task")
+
+    response = client.post(reverse("tasks-bulk-update"), {
+        "tasks": [{"id": task.id, "task": "First rename"}, {"id": task.id, "done": True}],
+    }, format="json")
+
+    assert response.status_code == 400
+    assert response.data["tasks"] == [f"Duplicate task ids: {task.id}"]
+    task.refresh_from_db()
+    assert (task.task, task.done) == ("My task", False)
+
+
+@pytest.mark.django_db
+def test_bulk_update_toggle_and_delete_stay_in_owner_scope(client, owner):
+    other = User.objects.create_user(username="judy", password="pwd123")
+    mine = [TaskList.objects.create(gestionnaire=owner, task=f"My task {i}") for i in range(3)]
+    theirs = TaskList.objects.create(gestionnaire=other, task="Their task")
+
+    response = client.post(reverse("tasks-bulk-update"), {
+        "tasks": [{"id": mine[0].id, "task": "Renamed task"}, {"id": theirs.id, "task": "Hijacked"}],
+    }, format="json")
+    assert [r["status"] for r in response.data["results"]] == ["updated", "not_found"]
+    assert TaskList.objects.get(pk=mine[0].id).task == "Renamed task"
+    assert TaskList.objects.get(pk=theirs.id).task == "Their task"
+
+    response = client.post(reverse("tasks-bulk-toggle"), {
+        "ids": [mine[1].id, mine[2].id, theirs.id], "done": True,
+    }, format="json")
+    assert [r["status"] for r in response.data["results"]] == ["updated", "updated", "not_found"]
+    assert TaskList.objects.filter(done=True).count() == 2
+
+    response = client.post(reverse("tasks-bulk-delete"), {
+        "ids": [task.id for task in mine] + [theirs.id],
+    }, format="json")
+    assert [r["status"] for r in response.data["results"]] == ["deleted"] * 3 + ["not_found"]
+    assert list(TaskList.objects.values_list("id", flat=True)) == [theirs.id]
+    assert TaskTombstone.objects.count() == 3
@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from todolist_app import cache
+from todolist_app.models import TaskList
+
+
+@pytest.mark.django_db
+def test_task_list_is_cached_until_a_write(django_assert_num_queries, django_capture_on_commit_callbacks):
+    user = User.objects.create_user(username="mallory", password="pwd123")
+    staff = User.objects.create_user(username="boss", password="pwd123", is_staff=True)
+    TaskList.objects.create(gestionnaire=user, task="First task")
+    client = APIClient()
+    client.force_authenticate(user=user)
+    staff_client = APIClient()
+    staff_client.force_authenticate(user=staff)
+
+    assert len(client.get(reverse("tasks-list")).data["results"]) == 1
+    assert len(staff_client.get(reverse("tasks-list")).data["results"]) == 1
+    with django_assert_num_queries(0):
+        client.get(reverse("tasks-list"))
+
+    # Any write path invalidates the owner's and the staff entries
+    with django_capture_on_commit_callbacks(execute=True):
+        TaskList.objects.create(gestionnaire=user, task="Second task")
+    assert len(client.get(reverse("tasks-list")).data["results"]) == 2
+    assert len(staff_client.get(reverse("tasks-list")).data["results"]) == 2
+
+    with django_capture_on_commit_callbacks(execute=True):
+        TaskList.objects.filter(gestionnaire=user).update(done=True)
+    results = client.get(reverse("tasks-list")).data["results"]
+    assert all(row["done"] for row in results)
+
+    stats = cache.get_stats()
+    assert stats["hits"] >= 1
+    assert stats["invalidations"] >= 2
+
+
+@pytest.mark.django_db
+def test_entry_expires_when_is_recent_changes(monkeypatch):
+    user = User.objects.create_user(username="nadia", password="pwd123")
+    task = TaskList.objects.create(gestionnaire=user, task="Almost a day old")
+    TaskList.objects.filter(pk=task.pk).update(created_at=task.created_at - timedelta(hours=23, minutes=59))
+    client = APIClient()
+    client.force_authenticate(user=user)
+    timeouts = []
+    set_entry = cache.get_cache().set
+    monkeypatch.setattr(cache.get_cache(), "set", lambda key, value, timeout: timeouts.append(timeout) or set_entry(key, value, timeout))
+
+    assert client.get(reverse("tasks-list")).data["results"][0]["is_recent"] is True
+
+    assert len(timeouts) == 1 and 0 < timeouts[0] <= 60
+
+
+def test_per_process_cache_is_refused_with_several_workers(settings):
+    settings.TASK_CACHE_ENABLED = True
+    assert cache.check_shared_cache() == []
+
+    settings.WEB_CONCURRENCY = 2
+    assert [error.id for error in cache.check_shared_cache()] == ["todolist_app.E001"]
@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APIClient
+from todolist_app import archive
+from todolist_app.models import TaskList
+
+
+@pytest.fixture
+def owner():
+    return User.objects.create_user(username="nina", password="pwd123")
+
+
+@pytest.fixture
+def client(owner):
+    client = APIClient()
+    client.force_authenticate(user=owner)
+    return client
+
+
+@pytest.mark.django_db
+def test_task_list_answers_304_until_tasks_change(
+        client, owner, django_assert_num_queries, django_capture_on_commit_callbacks):
+    TaskList.objects.create(gestionnaire=owner, task="Feed the cat")
+    first = client.get(reverse("tasks-list"))
+    assert first.status_code == 200
+    etag = first["ETag"]
+    assert first["Last-Modified"]
+
+    # Validators are cached with the response: no query at all
+    with django_assert_num_queries(0):
+        response = client.get(reverse("tasks-list"), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+
+    with django_capture_on_commit_callbacks(execute=True):
+        TaskList.objects.create(gestionnaire=owner, task="Feed the dog")
+    response = client.get(reverse("tasks-list"), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_task_update_with_stale_if_match_is_rejected(client, owner):
+    task = TaskList.objects.create(gestionnaire=owner, task="Book flights")
+    url = reverse("tasks-detail", args=[task.id])
+    etag = client.get(url)["ETag"]
+
+    response = client.patch(url, {"task": "Book flights to Rome"}, format="json", HTTP_IF_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+    response = client.patch(url, {"task": "Book flights to Oslo"}, format="json", HTTP_IF_MATCH=etag)
+    assert response.status_code == 412
+    assert TaskList.objects.get(pk=task.id).task == "Book flights to Rome"
+
+
+@pytest.mark.django_db
+def test_task_list_is_modified_when_tasks_are_archived(client, owner, django_capture_on_commit_callbacks):
+    TaskList.objects.bulk_create([
+        TaskList(gestionnaire=owner, task="Old and done", done=True),
+        TaskList(gestionnaire=owner, task="Fresh"),
+    ])
+    TaskList.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+    TaskList.objects.filter(task="Old and done").update(updated_at=timezone.now() - timedelta(days=60))
+    first = client.get(reverse("tasks-list"))
+    assert first.data["count"] == 2
+
+    with django_capture_on_commit_callbacks(execute=True):
+        list(archive.archive(days=30))
+
+    response = client.get(reverse("tasks-list"), HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+    assert response.status_code == 200
+    assert response.data["count"] == 1
+    response = client.get(reverse("tasks-list"), HTTP_IF_NONE_MATCH=first["ETag"])
+    assert response.status_code == 200
@@ -0,0 +1,104 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from todolist_app import counters, models
+from todolist_app.models import TaskCounter, TaskList, TaskTombstone
+
+
+@pytest.mark.django_db
+def test_counters_follow_every_write_path():
+    user = User.objects.create_user(username="oscar", password="pwd123")
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    first = TaskList.objects.create(gestionnaire=user, task="Buy bread")
+    TaskList.objects.bulk_create([
+        TaskList(gestionnaire=user, task="Buy eggs"),
+        TaskList(gestionnaire=user, task="Buy milk", done=True),
+    ])
+    client.post(reverse("tasks-mark-complete", args=[first.id]))
+    TaskList.objects.filter(task="Buy milk").update(done=False)
+    first.refresh_from_db()
+    first.done = False
+    first.save()
+    TaskList.objects.filter(task="Buy eggs").delete()
+
+    assert counters.get_counts(user.id) == {"total": 2, "done": 0, "pending": 2, "created_today": 2}
+    assert counters.compute(user.id) == {"total": 2, "done": 0, "created_today": 2}
+    call_command("rebuild_task_counters", "--check")
+
+
+def assert_counters_match(*owners):
+    for owner in owners:
+        counts = counters.get_counts(owner.id)
+        assert {name: counts[name] for name in ("total", "done", "created_today")} == counters.compute(owner.id)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("returning", [True, False])
+def test_queryset_delete_does_not_load_the_rows(django_assert_num_queries, monkeypatch, returning):
+    owners = [User.objects.create_user(username=name, password="pwd123") for name in ("quinn", "rosa")]
+    TaskList.objects.bulk_create(
+        TaskList(gestionnaire=owner, task=f"Task {i}", done=i % 3 == 0) for owner in owners for i in range(30)
+    )
+
+    def loaded(*args, **kwargs):
+        raise AssertionError("tasks loaded as model instances")
+
+    monkeypatch.setattr(TaskList, "from_db", loaded)
+    monkeypatch.setattr(models, "supports_delete_returning", lambda connection: returning)
+    # DELETE ... RETURNING (or a locking SELECT and a DELETE of those ids), the
+    # INSERT of the tombstones, one counter UPDATE per owner
+    with django_assert_num_queries(4 if returning else 5):
+        TaskList.objects.filter(task__in=[f"Task {i}" for i in range(20)]).delete()
+
+    assert TaskTombstone.objects.count() == 40
+    assert_counters_match(*owners)
+    assert [counters.get_counts(owner.id)["total"] for owner in owners] == [10, 10]
+
+
+@pytest.mark.django_db
+def test_queryset_delete_counts_writes_made_just_before_the_delete():
+    owner = User.objects.create_user(username="sacha", password="pwd123")
+    tasks = TaskList.objects.bulk_create(TaskList(gestionnaire=owner, task=f"Old {i}") for i in range(3))
+    interleaved = []
+
+    def other_transaction(execute, sql, params, many, context):
+        # What another transaction may commit right before the DELETE runs
+        if sql.startswith('DELETE FROM "todolist_app_tasklist"') and not interleaved:
+            interleaved.append(TaskList.objects.set_done(tasks[0].pk, True))
+            interleaved.append(TaskList.objects.create(gestionnaire=owner, task="Old 3"))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(other_transaction):
+        deleted, _ = TaskList.objects.filter(task__startswith="Old").delete()
+
+    assert deleted == 4
+    assert not TaskList.objects.exists()
+    assert set(TaskTombstone.objects.values_list("task_id", flat=True)) == {*(t.pk for t in tasks), interleaved[1].pk}
+    assert_counters_match(owner)
+    assert counters.get_counts(owner.id)["done"] == 0
+
+
+@pytest.mark.django_db
+def test_stats_endpoint_and_rebuild_command():
+    user = User.objects.create_user(username="peggy", password="pwd123")
+    staff = User.objects.create_user(username="root", password="pwd123", is_staff=True)
+    TaskList.objects.create(gestionnaire=user, task="Plan holidays", done=True)
+    TaskList.objects.create(gestionnaire=staff, task="Review accounts")
+
+    TaskCounter.objects.filter(pk=user.id).update(total=42)
+    with pytest.raises(CommandError):
+        call_command("rebuild_task_counters", "--check")
+    call_command("rebuild_task_counters")
+
+    client = APIClient()
+    client.force_authenticate(user=staff)
+    response = client.get(reverse("tasks-stats"))
+    assert response.status_code == 200
+    assert response.data["user"]["total"] == 1
+    assert response.data["global"] == {"total": 2, "done": 1, "pending": 1, "created_today": 2}
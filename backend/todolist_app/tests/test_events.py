@@ -0,0 +1,156 @@
+import json
+import time
+
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from todolist_app import events
+from todolist_app.models import TaskList
+
+
+@pytest.fixture(autouse=True)
+def in_process_broker(settings):
+    settings.TASK_EVENTS_BROKER = "todolist_app.events.InProcessBroker"
+    settings.TASK_EVENTS_HEARTBEAT_SECONDS = 0.05
+    events.reset_broker()
+    yield
+    events.reset_broker()
+
+
+def parse(chunk):
+    """(event, id, data) of each SSE event in a chunk"""
+    parsed = []
+    for block in chunk.decode().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":") and ": " in line)
+        if "event" in fields:
+            parsed.append((fields["event"], fields.get("id"), json.loads(fields["data"])))
+    return parsed
+
+
+@pytest.mark.django_db
+def test_events_are_pushed_when_tasks_change(django_capture_on_commit_callbacks):
+    user = User.objects.create_user(username="hugo", password="pwd123")
+    other = User.objects.create_user(username="iris", password="pwd123")
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    response = client.get(reverse("tasks-events"), HTTP_ACCEPT="text/event-stream")
+    assert response["Content-Type"] == "text/event-stream; charset=utf-8"
+    chunks = iter(response.streaming_content)
+    assert next(chunks).startswith(b"retry: ")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        task = TaskList.objects.create(gestionnaire=user, task="Pushed live")
+    [(kind, event_id, data)] = parse(next(chunks))
+    assert (kind, data["id"], data["task"]) == ("created", task.id, "Pushed live")
+    assert event_id is not None
+
+    with django_capture_on_commit_callbacks(execute=True):
+        TaskList.objects.create(gestionnaire=other, task="Someone else's")
+    assert next(chunks) == b": keepalive\n\n"
+
+    with django_capture_on_commit_callbacks(execute=True):
+        task.done = True
+        task.save()
+    assert [(kind, data["done"]) for kind, _, data in parse(next(chunks))] == [("updated", True)]
+
+    task_id = task.id
+    with django_capture_on_commit_callbacks(execute=True):
+        task.delete()
+    assert [(kind, data) for kind, _, data in parse(next(chunks))] == [("deleted", {"id": task_id})]
+    response.close()
+
+
+@pytest.mark.django_db
+def test_events_resume_from_last_event_id_with_a_query_token():
+    user = User.objects.create_user(username="jack", password="pwd123")
+    client = APIClient()
+    client.force_authenticate(user=user)
+    first = client.get(reverse("tasks-sync")).data["watermark"]
+    TaskList.objects.create(gestionnaire=user, task="Missed while offline")
+    token = client.post(reverse("tasks-events-token")).data["token"]
+
+    anonymous = APIClient()
+    assert anonymous.get(reverse("tasks-events")).status_code == 401
+    response = anonymous.get(
+        reverse("tasks-events"), {"access_token": token},
+        HTTP_ACCEPT="text/event-stream", HTTP_LAST_EVENT_ID=first,
+    )
+    chunks = iter(response.streaming_content)
+    assert [(kind, data["task"]) for kind, _, data in parse(next(chunks))] == [("created", "Missed while offline")]
+    response.close()
+
+
+@pytest.mark.django_db
+def test_query_token_is_a_short_lived_events_token():
+    user = User.objects.create_user(username="jade", password="pwd123")
+    client = APIClient()
+    client.force_authenticate(user=user)
+    token = client.post(reverse("tasks-events-token")).data
+    assert token["expires_in"] == 60
+
+    anonymous = APIClient()
+    # A regular access token is not accepted in the query string
+    assert anonymous.get(
+        reverse("tasks-events"), {"access_token": str(AccessToken.for_user(user))}
+    ).status_code == 401
+    # and the events token opens nothing else
+    anonymous.credentials(HTTP_AUTHORIZATION=f"Bearer {token['token']}")
+    assert anonymous.get(reverse("tasks-list")).status_code == 401
+    anonymous.credentials()
+    assert anonymous.get(reverse("tasks-list"), {"access_token": token["token"]}).status_code == 401
+
+
+@pytest.mark.django_db
+def test_wsgi_stream_ends_before_the_worker_timeout(settings):
+    settings.TASK_EVENTS_WSGI_MAX_SECONDS = 0.1
+    user = User.objects.create_user(username="joel", password="pwd123")
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    response = client.get(reverse("tasks-events"), HTTP_ACCEPT="text/event-stream")
+    chunks = list(response.streaming_content)  # the stream closes by itself
+    assert chunks[0].startswith(b"retry: ")
+    assert 1 < len(chunks) <= 4
+
+
+@pytest.mark.django_db
+def test_database_polling_broker_wakes_streams_of_changed_owners():
+    user = User.objects.create_user(username="kim", password="pwd123")
+    other = User.objects.create_user(username="lou", password="pwd123")
+    broker = events.DatabasePollingBroker()
+    # Poll by hand instead of from the background thread
+    subscription = events.InProcessBroker.subscribe(broker, user.id)
+    broker._since = events.timezone.now()
+
+    TaskList.objects.create(gestionnaire=user, task="Written by another worker")
+    assert broker.poll_once() >= {user.id}
+    assert subscription.wait(0)
+
+    assert broker.poll_once() == {user.id}  # still inside the overlap window
+    TaskList.objects.filter(gestionnaire=user).delete()
+    TaskList.objects.create(gestionnaire=other, task="Not watched")
+    assert broker.poll_once() == {user.id, other.id}
+
+
+def test_database_polling_broker_keeps_polling_while_streams_come_and_go(settings, monkeypatch):
+    settings.TASK_EVENTS_POLL_SECONDS = 0
+    broker = events.DatabasePollingBroker()
+    polls = []
+    monkeypatch.setattr(broker, "poll_once", lambda: polls.append(1))
+
+    # Resubscribe right as the poller may be deciding to stop
+    for _ in range(200):
+        broker.unsubscribe(broker.subscribe(1))
+    subscription = broker.subscribe(1)
+    seen = len(polls)
+    time.sleep(0.2)
+
+    poller = broker._poller
+    assert poller is not None and poller.is_alive()
+    assert len(polls) > seen
+    broker.unsubscribe(subscription)
+    poller.join(1)
+    assert broker._poller is None
@@ -0,0 +1,92 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+from todolist_app import archive, export
+from todolist_app.models import TaskList
+
+
+def content(response):
+    return b"".join(response.streaming_content)
+
+
+@pytest.mark.django_db
+def test_export_streams_the_users_tasks_as_ndjson_or_csv(monkeypatch):
+    monkeypatch.setattr(export, "CHUNK_BYTES", 100)
+    user = User.objects.create_user(username="yann", password="pwd123")
+    other = User.objects.create_user(username="zoe", password="pwd123")
+    tasks = [TaskList.objects.create(gestionnaire=user, task=f"Tâche, \"{i}\"") for i in range(5)]
+    TaskList.objects.create(gestionnaire=other, task="Not yours")
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    response = client.get(reverse("tasks-export"))
+    assert response.streaming
+    assert response["Content-Type"] == "application/x-ndjson"
+    chunks = list(response.streaming_content)
+    assert len(chunks) > 1
+    rows = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+    assert [row["id"] for row in rows] == [task.id for task in tasks]
+    assert rows[0]["task"] == "Tâche, \"0\"" and rows[0]["gestionnaire"] == "yann"
+
+    response = client.get(reverse("tasks-export"), {"output": "csv", "gzip": "1"})
+    assert response["Content-Disposition"] == 'attachment; filename="tasks.csv.gz"'
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(content(response)).decode())))
+    assert [int(row["id"]) for row in rows] == [task.id for task in tasks]
+    assert rows[4]["task"] == "Tâche, \"4\"" and rows[4]["done"] == "False"
+
+    assert client.get(reverse("tasks-export"), {"output": "xml"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_staff_export_all_tasks_or_one_user():
+    staff = User.objects.create_user(username="admin", password="pwd123", is_staff=True)
+    alice = User.objects.create_user(username="alice", password="pwd123")
+    bob = User.objects.create_user(username="bob", password="pwd123")
+    TaskList.objects.create(gestionnaire=alice, task="Alice's task")
+    TaskList.objects.create(gestionnaire=bob, task="Bob's task")
+    client = APIClient()
+    client.force_authenticate(user=staff)
+
+    assert len(content(client.get(reverse("tasks-export"))).splitlines()) == 2
+    rows = content(client.get(reverse("tasks-export"), {"gestionnaire": bob.id})).splitlines()
+    assert [json.loads(row)["gestionnaire"] for row in rows] == ["bob"]
+
+
+@pytest.mark.django_db
+def test_export_includes_archived_tasks():
+    user = User.objects.create_user(username="dina", password="pwd123")
+    other = User.objects.create_user(username="eric", password="pwd123")
+    TaskList.objects.bulk_create([
+        TaskList(gestionnaire=user, task="Old", done=True),
+        TaskList(gestionnaire=other, task="Not yours", done=True),
+    ])
+    list(archive.archive(days=0))
+    TaskList.objects.create(gestionnaire=user, task="Current")
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    rows = [json.loads(line) for line in content(client.get(reverse("tasks-export"))).splitlines()]
+    assert [(row["task"], row["archived"]) for row in rows] == [("Current", False), ("Old", True)]
+
+    rows = list(csv.DictReader(io.StringIO(content(client.get(reverse("tasks-export"), {"output": "csv"})).decode())))
+    assert [(row["task"], row["archived"]) for row in rows] == [("Current", "False"), ("Old", "True")]
+
+
+@pytest.mark.django_db
+def test_export_tasks_command_writes_a_file(tmp_path):
+    user = User.objects.create_user(username="carl", password="pwd123")
+    TaskList.objects.bulk_create(TaskList(gestionnaire=user, task=f"Task {i}") for i in range(30))
+    path = tmp_path / "carl.ndjson.gz"
+
+    call_command("export_tasks", user="carl", gzip=True, output=str(path), chunk_size=7, stderr=io.StringIO())
+
+    rows = [json.loads(line) for line in gzip.decompress(path.read_bytes()).splitlines()]
+    assert len(rows) == 30
+    assert rows[-1]["task"] == "Task 29"
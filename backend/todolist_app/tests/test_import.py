@@ -0,0 +1,81 @@
+import gzip
+import io
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+from todolist_app.models import TaskCounter, TaskList
+
+
+def events(response):
+    return [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+
+
+@pytest.mark.django_db
+def test_import_ndjson_reports_progress_and_row_errors():
+    user = User.objects.create_user(username="dora", password="pwd123")
+    client = APIClient()
+    client.force_authenticate(user=user)
+    body = "\n".join([
+        json.dumps({"task": "  Premier import  ", "done": True}),
+        json.dumps({"task": "no"}),
+        "{not json",
+        json.dumps({"task": "Second import", "done": "maybe"}),
+        json.dumps({"task": "Third import"}),
+        "",
+        json.dumps({"task": "Fourth import", "done": "false"}),
+    ])
+
+    response = client.post(
+        reverse("tasks-import-tasks") + "?batch_size=2", body, content_type="application/x-ndjson"
+    )
+
+    assert response.status_code == 200
+    result = events(response)
+    assert result[0] == {"line": 2, "errors": {"task": ["Task must be at least 3 characters long"]}}
+    assert result[1]["line"] == 3 and "Invalid JSON" in result[1]["errors"]["non_field_errors"][0]
+    assert result[2] == {"line": 4, "errors": {"done": ["Must be a valid boolean."]}}
+    assert result[3] == {"imported": 2, "invalid": 3, "lines": 5}
+    assert result[-1] == {"imported": 3, "invalid": 3, "lines": 7, "done": True}
+    assert list(TaskList.objects.filter(gestionnaire=user).order_by("id").values_list("task", "done")) == [
+        ("Premier import", True), ("Third import", False), ("Fourth import", False),
+    ]
+    assert TaskCounter.objects.get(pk=user.id).as_dict()["total"] == 3
+
+
+@pytest.mark.django_db
+def test_import_gzipped_csv_from_an_export():
+    user = User.objects.create_user(username="eve", password="pwd123")
+    source = User.objects.create_user(username="fred", password="pwd123")
+    TaskList.objects.create(gestionnaire=source, task="Exported, with a comma", done=True)
+    TaskList.objects.create(gestionnaire=source, task="Exported too")
+    client = APIClient()
+    client.force_authenticate(user=source)
+    dump = b"".join(client.get(reverse("tasks-export"), {"output": "csv", "gzip": "1"}).streaming_content)
+
+    client.force_authenticate(user=user)
+    response = client.post(
+        reverse("tasks-import-tasks"), dump, content_type="text/csv", HTTP_CONTENT_ENCODING="gzip"
+    )
+
+    assert events(response)[-1] == {"imported": 2, "invalid": 0, "lines": 3, "done": True}
+    assert set(TaskList.objects.filter(gestionnaire=user).values_list("task", "done")) == {
+        ("Exported, with a comma", True), ("Exported too", False),
+    }
+
+
+@pytest.mark.django_db
+def test_import_tasks_command(tmp_path):
+    user = User.objects.create_user(username="gina", password="pwd123")
+    path = tmp_path / "tasks.csv"
+    path.write_text("task,done\nFrom the command,true\nx,false\n")
+    out, err = io.StringIO(), io.StringIO()
+
+    call_command("import_tasks", str(path), user="gina", stdout=out, stderr=err)
+
+    assert "1 task(s) imported, 1 invalid row(s)." in out.getvalue()
+    assert "Line 3" in err.getvalue()
+    assert TaskList.objects.get(gestionnaire=user).task == "From the command"
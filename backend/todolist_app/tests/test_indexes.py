@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.utils import timezone
+from todolist_app.models import TaskList
+
+
+@pytest.fixture
+def user():
+    user = User.objects.create_user(username="felix", password="pwd123")
+    other = User.objects.create_user(username="gaelle", password="pwd123")
+    TaskList.objects.bulk_create(
+        TaskList(gestionnaire=owner, task=f"Tâche {i}", done=i % 2 == 0)
+        for owner in (user, other) for i in range(200)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    return user
+
+
+def hot_queries(user):
+    tasks = TaskList.objects.filter(gestionnaire=user)
+    newest = timezone.now()
+    return {
+        # TaskViewSet.list and its keyset pagination
+        "list": (tasks.order_by("-created_at").read_values(), "todolist_ap_gestion_3cdf9d_idx"),
+        "cursor page": (
+            tasks.filter(created_at__lt=newest).order_by("-created_at", "-id")[:20],
+            "todolist_ap_gestion_3cdf9d_idx",
+        ),
+        # sync.changes_since
+        "sync": (
+            tasks.filter(updated_at__gte=newest - timedelta(hours=1)).order_by("updated_at", "id")[:500],
+            "todolist_ap_gestion_a7e517_idx",
+        ),
+        # ?done=false
+        "pending": (tasks.filter(done=False).order_by("-created_at"), "todolist_ap_pending_idx"),
+    }
+
+
+def plan(queryset):
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            # Small test tables: make the planner show the plan it uses on big ones
+            cursor.execute("SET LOCAL enable_seqscan = off")
+    return queryset.explain()
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(connection.vendor not in ("sqlite", "postgresql"), reason="SQLite/PostgreSQL plans")
+@pytest.mark.parametrize("name", ["list", "cursor page", "sync", "pending"])
+def test_hot_queries_read_an_index_without_sorting(user, name):
+    queryset, index = hot_queries(user)[name]
+
+    result = plan(queryset)
+
+    assert index in result, result
+    if connection.vendor == "sqlite":
+        assert "TEMP B-TREE" not in result, result
+    else:
+        assert "Sort" not in result, result
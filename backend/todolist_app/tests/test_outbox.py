@@ -0,0 +1,53 @@
+import pytest
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from todolist_app import outbox
+from todolist_app.models import OutboxEmail
+
+
+@pytest.mark.django_db
+def test_contact_form_is_queued_then_sent_by_the_worker():
+    response = APIClient().post(reverse("contact"), {
+        "name": "Alice Martin",
+        "email": "alice@example.com",
+        "subject": "Question about tasks",
+        "message": "How do I export my tasks?",
+    })
+
+    assert response.status_code == 202
+    assert len(mail.outbox) == 0
+    assert OutboxEmail.objects.get().status == OutboxEmail.STATUS_PENDING
+
+    assert outbox.send_pending() == 1
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].subject == "Contact Form: Question about tasks"
+    assert mail.outbox[0].reply_to == ["alice@example.com"]
+    assert OutboxEmail.objects.get().status == OutboxEmail.STATUS_SENT
+    assert outbox.send_pending() == 0
+
+
+@pytest.mark.django_db
+def test_failed_email_is_retried_with_backoff_then_given_up(settings, monkeypatch):
+    settings.OUTBOX_MAX_ATTEMPTS = 2
+
+    def fail(self, *args, **kwargs):
+        raise ConnectionError("SMTP down")
+
+    monkeypatch.setattr(EmailMessage, "send", fail)
+    message = outbox.enqueue("Hello", "Body", ["admin@example.com"])
+
+    assert outbox.send_pending() == 1
+    message.refresh_from_db()
+    assert message.status == OutboxEmail.STATUS_PENDING
+    assert message.attempts == 1
+    assert message.next_attempt_at > timezone.now()
+    assert message.last_error == "SMTP down"
+    assert outbox.send_pending() == 0  # not due yet
+
+    OutboxEmail.objects.update(next_attempt_at=timezone.now())
+    assert outbox.send_pending() == 1
+    message.refresh_from_db()
+    assert message.status == OutboxEmail.STATUS_FAILED
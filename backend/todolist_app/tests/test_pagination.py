@@ -0,0 +1,51 @@
+import pytest
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from todolist_app.models import TaskList
+
+
+@pytest.mark.django_db
+def test_cursor_pagination_walks_all_tasks_in_order():
+    user = User.objects.create_user(username="carol", password="pwd123")
+    for i in range(25):
+        TaskList.objects.create(gestionnaire=user, task=f"Task number {i}")
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    expected = list(
+        TaskList.objects.filter(gestionnaire=user)
+        .order_by('-created_at', '-id')
+        .values_list('id', flat=True)
+    )
+
+    seen = []
+    url = reverse("tasks-list") + "?pagination=cursor&with_total=true"
+    response = client.get(url)
+    assert response.data["count"] == 25
+    assert response.data["previous"] is None
+    while True:
+        assert response.status_code == 200
+        seen.extend(row["id"] for row in response.data["results"])
+        if not response.data["next"]:
+            break
+        last = response
+        response = client.get(response.data["next"])
+
+    assert seen == expected
+
+    # Walking back from the last page returns the previous page unchanged
+    back = client.get(response.data["previous"])
+    assert [row["id"] for row in back.data["results"]] == \
+        [row["id"] for row in last.data["results"]]
+
+
+@pytest.mark.django_db
+def test_cursor_pagination_rejects_invalid_cursor():
+    user = User.objects.create_user(username="dave", password="pwd123")
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    response = client.get(reverse("tasks-list") + "?cursor=not-a-cursor")
+
+    assert response.status_code == 404
@@ -0,0 +1,123 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from todolist_app import archive, purge
+from todolist_app.models import ArchivedTask, TaskCounter, TaskList, TaskTombstone, UserDeletion
+
+
+@pytest.fixture
+def admin_client():
+    client = APIClient()
+    client.force_authenticate(user=User.objects.create_user(username="admin", password="pwd123", is_staff=True))
+    return client
+
+
+def make_user(username, tasks=5):
+    user = User.objects.create_user(username=username, password="pwd123")
+    TaskList.objects.bulk_create(TaskList(gestionnaire=user, task=f"Tâche {i}", done=i % 2 == 0) for i in range(tasks))
+    return user
+
+
+def assert_deleted(user, tasks=5):
+    assert not User.objects.filter(pk=user.pk).exists()
+    assert not TaskList.objects.filter(gestionnaire_id=user.pk).exists()
+    assert not ArchivedTask.objects.filter(gestionnaire_id=user.pk).exists()
+    # A tombstone per task, for staff sync clients and event streams
+    assert TaskTombstone.objects.filter(owner_id=user.pk).count() == tasks
+    assert not TaskCounter.objects.filter(pk=user.pk).exists()
+
+
+@pytest.mark.django_db
+def test_small_account_is_deleted_in_batches_without_loading_tasks(admin_client, settings, monkeypatch):
+    settings.USER_DELETE_BATCH_SIZE = 2
+    settings.TASK_SYNC_OVERLAP_SECONDS = 0
+    user = make_user("henri")
+    TaskList.objects.filter(pk=TaskList.objects.filter(gestionnaire=user).first().pk).delete()  # a tombstone
+    ArchivedTask.objects.create(id=10_000, gestionnaire=user, task="Ancienne", created_at=archive.cutoff(), updated_at=archive.cutoff())
+    other = make_user("iris")
+    task_ids = set(TaskList.objects.filter(gestionnaire=user).values_list("id", flat=True)) | {10_000}
+    watermark = admin_client.get(reverse("tasks-sync")).data["watermark"]
+
+    def loaded(*args, **kwargs):
+        raise AssertionError("tasks loaded as model instances")
+
+    monkeypatch.setattr(TaskList, "from_db", loaded)
+    monkeypatch.setattr(ArchivedTask, "from_db", loaded)
+
+    response = admin_client.delete(reverse("user-detail", args=[user.pk]))
+
+    assert response.status_code == 204
+    assert_deleted(user, tasks=6)  # 4 active, 1 archived, 1 deleted before
+    assert TaskList.objects.filter(gestionnaire=other).count() == 5
+    # Staff sync clients see every user's tasks: they learn these are gone
+    assert set(admin_client.get(reverse("tasks-sync"), {"since": watermark}).data["deleted"]) >= task_ids
+
+
+@pytest.mark.django_db
+def test_large_account_is_deactivated_then_deleted_by_the_worker(admin_client, settings):
+    settings.USER_DELETE_INLINE_MAX_TASKS = 3
+    user = make_user("jade")
+
+    response = admin_client.delete(reverse("user-detail", args=[user.pk]))
+
+    assert response.status_code == 202
+    assert response.data["status"] == "pending"
+    assert response.data["tasks_total"] == 5
+    user.refresh_from_db()
+    assert not user.is_active
+    assert TaskList.objects.filter(gestionnaire=user).count() == 5
+    # Asking again reports the same deletion
+    assert admin_client.delete(reverse("user-detail", args=[user.pk])).data == response.data
+
+    call_command("delete_users", batch_size=2, verbosity=0)
+
+    assert_deleted(user)
+    deletion = UserDeletion.objects.get()
+    assert (deletion.status, deletion.tasks_deleted) == (UserDeletion.STATUS_DONE, 5)
+    assert deletion.finished_at is not None
+    assert admin_client.delete(reverse("user-detail", args=[user.pk])).status_code == 404
+
+
+@pytest.mark.django_db
+def test_admin_confirmation_counts_tasks_and_deletes_in_batches():
+    User.objects.create_superuser(username="root", password="pwd123")
+    user = make_user("karim")
+    client = Client()
+    client.login(username="root", password="pwd123")
+    url = reverse("admin:auth_user_delete", args=[user.pk])
+
+    page = client.get(url)
+    assert page.status_code == 200
+    assert "karim : 5 tâche(s)" in page.content.decode()
+
+    assert client.post(url, {"post": "yes"}).status_code == 302
+    assert_deleted(user)
+
+
+@pytest.mark.django_db
+def test_a_deletion_is_claimed_by_one_worker_and_resumed_after_its_lease(admin_client, settings):
+    settings.USER_DELETE_INLINE_MAX_TASKS = 3
+    user = make_user("lena", tasks=6)
+    admin_client.delete(reverse("user-detail", args=[user.pk]))
+
+    deletion = purge.claim()
+    assert deletion is not None
+    assert purge.claim() is None  # held by the first worker
+    # The first worker deletes one batch, then stops
+    assert next(purge.run(deletion, batch_size=2)) == 2
+
+    assert purge.claim(now=deletion.claimed_until) is None  # lease still running
+    resumed = purge.claim(now=timezone.now() + timedelta(seconds=settings.USER_DELETE_LEASE_SECONDS + 1))
+    assert resumed.pk == deletion.pk
+    assert list(purge.run(resumed, batch_size=2)) == [4, 6]
+    assert_deleted(user, tasks=6)
+    # The first worker lost its claim: it stops without touching the deletion
+    assert list(purge.run(deletion, batch_size=2)) == []
+    finished = UserDeletion.objects.get()
+    assert (finished.status, finished.tasks_deleted, finished.claim_token) == (UserDeletion.STATUS_DONE, 6, "")
@@ -0,0 +1,94 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from rest_framework.test import APIClient
+from todolist_app import search
+from todolist_app.models import TaskList
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(username="louise", password="pwd123")
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def found(client, q, **params):
+    response = client.get(reverse("tasks-search"), {"q": q, **params})
+    assert response.status_code == 200, response.data
+    return [task["task"] for task in response.data["results"]]
+
+
+@pytest.mark.django_db
+def test_search_ranks_own_tasks_by_relevance(user, client):
+    TaskList.objects.bulk_create([
+        TaskList(gestionnaire=user, task="Acheter du lait demain matin"),
+        TaskList(gestionnaire=user, task="Lait lait"),
+        TaskList(gestionnaire=user, task="Payer le loyer"),
+        TaskList(gestionnaire=User.objects.create_user(username="marc", password="pwd123"), task="Lait"),
+    ])
+
+    assert found(client, "lait") == ["Lait lait", "Acheter du lait demain matin"]
+    assert found(client, "lait", limit=1) == ["Lait lait"]
+    assert found(client, "ach lait") == ["Acheter du lait demain matin"]  # every word, as a prefix
+    assert found(client, "chocolat") == []
+    assert client.get(reverse("tasks-search"), {"q": " * "}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_search_index_follows_task_writes(user, client):
+    task = TaskList.objects.create(gestionnaire=user, task="Réviser la tâche")
+    assert found(client, "tache") == ["Réviser la tâche"]  # accents ignored
+
+    client.patch(reverse("tasks-detail", args=[task.pk]), {"task": "Ranger le garage"}, format="json")
+    assert found(client, "tache") == []
+    assert found(client, "garage") == ["Ranger le garage"]
+
+    TaskList.objects.filter(pk=task.pk).update(task="Nettoyer le garage")
+    assert found(client, "nettoyer") == ["Nettoyer le garage"]
+
+    TaskList.objects.filter(pk=task.pk).delete()
+    assert found(client, "garage") == []
+
+
+@pytest.mark.django_db
+def test_admin_search_uses_the_index():
+    User.objects.create_superuser(username="root", password="pwd123")
+    owner = User.objects.create_user(username="nora", password="pwd123")
+    TaskList.objects.bulk_create([
+        TaskList(gestionnaire=owner, task="Arroser les plantes"),
+        TaskList(gestionnaire=owner, task="Sortir le chien"),
+    ])
+    client = Client()
+    client.login(username="root", password="pwd123")
+
+    def results(q):
+        response = client.get(reverse("admin:todolist_app_tasklist_changelist"), {"q": q})
+        return sorted(task.task for task in response.context["cl"].result_list)
+
+    assert results("plante") == ["Arroser les plantes"]
+    assert results("nora") == ["Arroser les plantes", "Sortir le chien"]
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(connection.vendor != "sqlite", reason="FTS5 triggers")
+def test_migrate_recreates_triggers_dropped_by_a_table_rebuild(user, client):
+    with connection.cursor() as cursor:
+        # What a rebuild of todolist_app_tasklist leaves behind
+        cursor.execute(f"DROP TRIGGER {search.FTS_TABLE}_insert")
+    TaskList.objects.create(gestionnaire=user, task="Écrite sans trigger")
+    assert search.missing(connection) == {f"{search.FTS_TABLE}_insert"}
+    assert found(client, "ecrite") == []
+
+    call_command("migrate", verbosity=0)
+
+    assert search.missing(connection) == set()
+    assert found(client, "ecrite") == ["Écrite sans trigger"]
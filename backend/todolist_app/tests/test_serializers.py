@@ -1,7 +1,10 @@
 import pytest
+from datetime import timedelta
 from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
 from todolist_app.models import TaskList
-from todolist_app.serializers import TaskSerializer
+from todolist_app.serializers import TaskSerializer, TaskReadSerializer
 
 
 @pytest.mark.django_db
@@ -14,3 +17,19 @@ def test_tasklist_serializer_fields():
     assert data["task"] == "Clean room"
     assert "done" in data
     assert data["gestionnaire"] == "bob"
+
+
+@pytest.mark.django_db
+def test_task_read_serializer_matches_task_serializer():
+    user = User.objects.create_user(username="erin", password="pwd123")
+    TaskList.objects.create(gestionnaire=user, task="Write report")
+    done = TaskList.objects.create(gestionnaire=user, task="Call plumber", done=True)
+    TaskList.objects.filter(pk=done.pk).update(created_at=timezone.now() - timedelta(days=3))
+
+    instances = TaskList.objects.with_owner().order_by('id')
+    rows = TaskList.objects.order_by('id').read_values()
+
+    expected = JSONRenderer().render(TaskSerializer(instances, many=True).data)
+    actual = JSONRenderer().render(TaskReadSerializer(rows, many=True).data)
+
+    assert actual == expected
@@ -0,0 +1,66 @@
+import pytest
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from todolist_app.models import TaskList
+
+
+@pytest.mark.django_db
+def test_sync_returns_changes_and_deletions_since_watermark(settings):
+    settings.TASK_SYNC_OVERLAP_SECONDS = 0
+    user = User.objects.create_user(username="frank", password="pwd123")
+    other = User.objects.create_user(username="grace", password="pwd123")
+    kept = TaskList.objects.create(gestionnaire=user, task="Keep this one")
+    removed = TaskList.objects.create(gestionnaire=user, task="Remove this one")
+    TaskList.objects.create(gestionnaire=other, task="Not my task")
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    first = client.get(reverse("tasks-sync"))
+    assert first.status_code == 200
+    assert {row["id"] for row in first.data["changed"]} == {kept.id, removed.id}
+    assert first.data["deleted"] == []
+
+    kept.done = True
+    kept.save()
+    removed_id = removed.id
+    removed.delete()
+    TaskList.objects.filter(gestionnaire=other).delete()
+
+    second = client.get(reverse("tasks-sync"), {"since": first.data["watermark"]})
+    assert second.status_code == 200
+    assert [row["id"] for row in second.data["changed"]] == [kept.id]
+    assert second.data["changed"][0]["done"] is True
+    assert second.data["deleted"] == [removed_id]
+
+
+@pytest.mark.django_db
+def test_sync_rejects_invalid_watermark():
+    user = User.objects.create_user(username="heidi", password="pwd123")
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    response = client.get(reverse("tasks-sync"), {"since": "yesterday"})
+
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_sync_pages_through_rows_sharing_one_updated_at(settings):
+    settings.TASK_SYNC_PAGE_SIZE = 2
+    user = User.objects.create_user(username="ivan", password="pwd123")
+    TaskList.objects.bulk_create(TaskList(gestionnaire=user, task=f"Tâche {i}") for i in range(5))
+    TaskList.objects.filter(gestionnaire=user).update(done=True)  # one updated_at for all
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    seen, params = [], {}
+    for _ in range(5):
+        page = client.get(reverse("tasks-sync"), params).data
+        seen += [row["id"] for row in page["changed"]]
+        params = {"since": page["watermark"]}
+        if not page["has_more"]:
+            break
+
+    assert not page["has_more"]
+    assert seen == sorted(TaskList.objects.values_list("id", flat=True))
@@ -2,6 +2,7 @@ import pytest
 from django.urls import reverse
 from django.contrib.auth.models import User
 from rest_framework.test import APIClient
+from todolist_app.models import TaskList
 
 
 @pytest.mark.django_db
@@ -15,3 +16,64 @@ def test_create_task_authenticated():
 
     assert response.status_code == 201
     assert response.data["task"] == "Read a book"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("count", [1, 10])
+def test_staff_task_list_query_count_is_constant(count, django_assert_num_queries):
+    staff = User.objects.create_user(username="admin", password="pwd123", is_staff=True)
+    for i in range(count):
+        owner = User.objects.create_user(username=f"user{i}", password="pwd123")
+        TaskList.objects.create(gestionnaire=owner, task=f"Task of user {i}")
+    client = APIClient()
+    client.force_authenticate(user=staff)
+
+    # Three aggregates for the ETag (tasks, tombstones, archive), one COUNT(*) for
+    # the page number pagination, one SELECT joined with the owner
+    with django_assert_num_queries(5):
+        response = client.get(reverse("tasks-list"))
+
+    assert response.status_code == 200
+    assert len(response.data["results"]) == count
+
+
+@pytest.mark.django_db
+def test_mark_complete_is_one_conditional_update_and_one_counter_update(django_assert_num_queries):
+    user = User.objects.create_user(username="kate", password="pwd123")
+    other = User.objects.create_user(username="leo", password="pwd123")
+    task = TaskList.objects.create(gestionnaire=user, task="Fix the bike")
+    foreign = TaskList.objects.create(gestionnaire=other, task="Not yours")
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    # The conditional UPDATE, and the UPDATE of the owner's counters: no locking read
+    with django_assert_num_queries(2):
+        response = client.post(reverse("tasks-mark-complete", args=[task.id]))
+    assert response.status_code == 200
+    assert response.data["done"] is True
+    assert TaskList.objects.get(pk=task.id).done is True
+
+    # Already done: nothing is written, the current state is returned
+    response = client.post(reverse("tasks-mark-complete", args=[task.id]))
+    assert response.status_code == 200
+    assert response.data["done"] is True
+
+    response = client.post(reverse("tasks-mark-complete", args=[foreign.id]))
+    assert response.status_code == 404
+    assert TaskList.objects.get(pk=foreign.id).done is False
+
+
+@pytest.mark.django_db
+def test_task_list_filters_on_done():
+    user = User.objects.create_user(username="hugo", password="pwd123")
+    TaskList.objects.create(gestionnaire=user, task="En cours", done=False)
+    TaskList.objects.create(gestionnaire=user, task="Terminée", done=True)
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    pending = client.get(reverse("tasks-list"), {"done": "false"})
+    done = client.get(reverse("tasks-list"), {"done": "true"})
+
+    assert [task["task"] for task in pending.data["results"]] == ["En cours"]
+    assert [task["task"] for task in done.data["results"]] == ["Terminée"]
+    assert len(client.get(reverse("tasks-list")).data["results"]) == 2
@@ -1,5 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .views import TaskViewSet, ContactView
 
 router = DefaultRouter()
@@ -8,4 +9,10 @@ router.register(r'tasks', TaskViewSet, basename='tasks')
 urlpatterns = [
     path('', include(router.urls)),  # tasks endpoints will be /api/tasks/ now
     path('contact/', ContactView.as_view(), name='contact'),  # contact form will be /api/contact/
+
+    # Async endpoints for the ASGI deployment
+    path('async/tasks/', async_views.task_list, name='async-task-list'),
+    path('async/tasks/<int:pk>/', async_views.task_detail, name='async-task-detail'),
+    path('async/tasks/<int:pk>/mark_complete/', async_views.mark_complete, name='async-task-mark-complete'),
+    path('async/tasks/<int:pk>/mark_pending/', async_views.mark_pending, name='async-task-mark-pending'),
 ]
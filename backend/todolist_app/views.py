@@ -1,52 +1,459 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.views import APIView
-from django.core.mail import send_mail
+from rest_framework.generics import get_object_or_404
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import DateTimeField
+from rest_framework.settings import api_settings
 from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+import gzip
+import json
 
-from .models import TaskList
-from .serializers import TaskSerializer, ContactSerializer  # <-- make sure ContactSerializer exists
+from complice_taches.instrumentation import timing
+from complice_taches.routers import ReplicaReadsMixin
+from users_app.authentication import EventsToken, QueryTokenJWTAuthentication
 
+from . import archive, cache, counters, export, importer, outbox, search, sync
+from .cache import cached_response
+from .conditional import check_preconditions, detail_validators, list_validators, set_validators
+from .events import EventStream, EventStreamRenderer
+from .models import ArchivedTask, TaskList
+from .pagination import TaskCursorPagination
+from .serializers import (
+    TaskSerializer, TaskReadSerializer, ContactSerializer,
+    BulkTaskItemsSerializer, BulkTaskIdsSerializer, BulkTaskToggleSerializer,
+)
 
-class TaskViewSet(viewsets.ModelViewSet):
+
+class TaskViewSet(ReplicaReadsMixin, viewsets.ModelViewSet):
     """
     Gestion des tâches pour les utilisateurs et admin.
     Les admins voient toutes les tâches, les utilisateurs seulement les leurs.
+    Pagination par curseur disponible avec ?pagination=cursor.
+    Tâches archivées incluses dans la liste avec ?include_archived=true.
+    Recherche plein texte avec /api/tasks/search/?q=.
+    Les lectures (list/retrieve/search) passent par un réplica s'il y en a un.
     """
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated]
+    replica_actions = ('list', 'retrieve', 'search')
+
+    @property
+    def paginator(self):
+        """Pagination par curseur (keyset) si demandée, sinon pagination par page"""
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            # La liste avec les tâches archivées est une UNION : pagination par page
+            if (params.get('pagination') == 'cursor' or 'cursor' in params) and not self.include_archived:
+                self._paginator = TaskCursorPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
 
     def get_queryset(self):
         user = self.request.user
+        queryset = TaskList.objects.with_owner()
         if user.is_staff:
-            return TaskList.objects.all().order_by('-created_at')
-        return TaskList.objects.filter(gestionnaire=user).order_by('-created_at')
+            return queryset.order_by('-created_at')
+        return queryset.filter(gestionnaire=user).order_by('-created_at')
+
+    @property
+    def include_archived(self):
+        return self.request.query_params.get('include_archived') in ('1', 'true', 'True')
+
+    def get_archived_queryset(self):
+        """Tâches archivées visibles par l'utilisateur (toutes pour les admins)"""
+        user = self.request.user
+        if user.is_staff:
+            return ArchivedTask.objects.all()
+        return ArchivedTask.objects.filter(gestionnaire=user)
+
+    def filter_queryset(self, queryset):
+        """Liste : ?done=true / ?done=false pour les seules tâches terminées / en attente"""
+        queryset = super().filter_queryset(queryset)
+        done = self.request.query_params.get('done')
+        if self.action == 'list' and done in ('true', 'false'):
+            queryset = queryset.filter(done=done == 'true')
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        """
+        Liste des tâches via le sérialiseur de lecture rapide, mise en cache par utilisateur.
+        Répond 304 si If-None-Match / If-Modified-Since correspondent.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+
+        def build():
+            rows = queryset.read_values()
+            if self.include_archived:
+                archived = self.get_archived_queryset()
+                if request.query_params.get('done') == 'false':
+                    archived = archived.none()
+                rows = archive.with_archived(rows, archived)
+            page = self.paginate_queryset(rows)
+            if page is not None:
+                serializer = TaskReadSerializer(page, many=True)
+                with timing('serialize'):
+                    data = serializer.data
+                return cache.valid_until(self.get_paginated_response(data), serializer.valid_until)
+            serializer = TaskReadSerializer(list(rows), many=True)
+            with timing('serialize'):
+                data = serializer.data
+            return cache.valid_until(Response(data), serializer.valid_until)
+        return cached_response(request, build, lambda: list_validators(request, queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        """Détail d'une tâche via le sérialiseur de lecture rapide, mis en cache par utilisateur"""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        pk = self.kwargs[lookup_url_kwarg]
+
+        def build():
+            row = get_object_or_404(queryset.read_values(), **{self.lookup_field: pk})
+            serializer = TaskReadSerializer(row)
+            with timing('serialize'):
+                data = serializer.data
+            return cache.valid_until(Response(data), serializer.valid_until)
+        return cached_response(request, build, lambda: detail_validators(request, queryset, pk))
+
+    def update(self, request, *args, **kwargs):
+        """Modification (PUT/PATCH) avec prise en charge de If-Match / If-Unmodified-Since"""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        pk = self.kwargs[lookup_url_kwarg]
+        if 'HTTP_IF_MATCH' not in request.META and 'HTTP_IF_UNMODIFIED_SINCE' not in request.META:
+            response = super().update(request, *args, **kwargs)
+        else:
+            with transaction.atomic():
+                locked = self.get_queryset().select_for_update(of=('self',))
+                precondition_failed = check_preconditions(
+                    request, *detail_validators(request, locked, pk)
+                )
+                if precondition_failed is not None:
+                    return precondition_failed
+                response = super().update(request, *args, **kwargs)
+        return set_validators(response, *detail_validators(request, self.get_queryset(), pk))
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def cache_stats(self, request):
+        """Statistiques du cache des tâches pour ce processus (admin uniquement)"""
+        return Response(cache.get_stats())
 
     def perform_create(self, serializer):
         serializer.save(gestionnaire=self.request.user)
 
+    @action(detail=False, methods=['get'])
+    def sync(self, request):
+        """
+        Synchronisation incrémentale : tâches créées/modifiées depuis ?since=<ISO 8601>
+        et ids des tâches supprimées. Le client renvoie le 'watermark' reçu au prochain appel.
+        """
+        since = request.query_params.get('since')
+        if since:
+            since = sync.Watermark.parse(since)
+            if since.time < sync.retention_start():
+                return Response(
+                    {'error': 'Watermark trop ancien, resynchronisation complète nécessaire.'},
+                    status=status.HTTP_410_GONE
+                )
+
+        now = timezone.now()
+        rows, deleted, watermark, has_more = sync.changes_since(
+            self.get_queryset(), request.user, since, getattr(settings, 'TASK_SYNC_PAGE_SIZE', 500), now
+        )
+        return Response({
+            'since': str(since) if since else None,
+            'watermark': str(watermark),
+            'has_more': has_more,
+            'changed': TaskReadSerializer(rows, many=True, now=now).data,
+            'deleted': deleted,
+        })
+
+    @action(
+        detail=False, methods=['get'],
+        renderer_classes=[JSONRenderer, EventStreamRenderer],
+        authentication_classes=[*api_settings.DEFAULT_AUTHENTICATION_CLASSES, QueryTokenJWTAuthentication],
+    )
+    def events(self, request):
+        """
+        Flux Server-Sent Events des changements de tâches (created / updated / deleted),
+        à la place du polling. Reprise avec l'en-tête Last-Event-ID (ou ?since=).
+        EventSource ne pouvant pas envoyer d'en-têtes, un jeton obtenu par POST sur
+        events/token/ (courte durée, valable pour ce flux seulement) peut être passé
+        en ?access_token=.
+        """
+        since = request.META.get('HTTP_LAST_EVENT_ID') or request.query_params.get('since')
+        if since:
+            since = sync.Watermark.parse(since)
+
+        stream = EventStream(self.get_queryset(), request.user, since)
+        response = StreamingHttpResponse(
+            aiter(stream) if getattr(settings, 'ASGI_MODE', False) else iter(stream),
+            content_type='text/event-stream; charset=utf-8',
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # no proxy buffering (nginx)
+        return response
+
+    @action(detail=False, methods=['post'], url_path='events/token')
+    def events_token(self, request):
+        """
+        Jeton pour ouvrir le flux d'événements (?access_token=), à redemander à chaque
+        (re)connexion : il n'est accepté que par events/ et expire vite.
+        """
+        token = EventsToken.for_user(request.user)
+        return Response({'token': str(token), 'expires_in': int(token.lifetime.total_seconds())})
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """
+        Compteurs de tâches de l'utilisateur, et globaux pour les admins.
+        total/done/created_today ne comptent que les tâches actives : une tâche
+        archivée en sort et est comptée dans user.archived.
+        """
+        data = {'user': {
+            **counters.get_counts(request.user.id),
+            'archived': ArchivedTask.objects.filter(gestionnaire=request.user).count(),
+        }}
+        if request.user.is_staff:
+            data['global'] = counters.get_global_counts()
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Recherche plein texte dans ses propres tâches : ?q=<mots> (tous requis, en
+        début de mot), classées par pertinence. ?limit= (20 par défaut, 100 au plus).
+        """
+        text = request.query_params.get('q', '')
+        if not search.terms(text):
+            raise ValidationError({'q': "Au moins un mot à rechercher."})
+        try:
+            limit = min(int(request.query_params.get('limit', search.DEFAULT_LIMIT)), search.MAX_LIMIT)
+        except ValueError:
+            raise ValidationError({'limit': "Nombre entier attendu."})
+        if limit < 1:
+            raise ValidationError({'limit': "Nombre entier positif attendu."})
+
+        rows = search.search(self.get_queryset(), request.user.id, text, limit)
+        with timing('serialize'):
+            data = TaskReadSerializer(rows, many=True).data
+        return Response({'results': data})
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Export complet des tâches en flux continu : ?output=ndjson (défaut) ou csv,
+        ?gzip=1 pour compresser. Les admins exportent toutes les tâches, ou celles
+        d'un utilisateur avec ?gestionnaire=<id>. Les tâches archivées suivent, avec
+        archived=true. Mémoire constante quel que soit le volume.
+        """
+        fmt = request.query_params.get('output', 'ndjson')
+        if fmt not in export.FORMATS:
+            raise ValidationError({'output': f"Formats disponibles : {', '.join(export.FORMATS)}."})
+        compress = request.query_params.get('gzip') in ('1', 'true', 'True')
+
+        queryset, archived = TaskList.objects.all(), ArchivedTask.objects.all()
+        if not request.user.is_staff:
+            queryset, archived = queryset.filter(gestionnaire=request.user), archived.filter(gestionnaire=request.user)
+        owner = request.query_params.get('gestionnaire')
+        if owner and request.user.is_staff:
+            try:
+                queryset, archived = queryset.filter(gestionnaire_id=int(owner)), archived.filter(gestionnaire_id=int(owner))
+            except ValueError:
+                raise ValidationError({'gestionnaire': "Identifiant invalide."})
+
+        stream = export.astream if getattr(settings, 'ASGI_MODE', False) else export.stream
+        response = StreamingHttpResponse(
+            stream(queryset, fmt, compress, archived=archived), content_type=export.content_type(fmt, compress)
+        )
+        response['Content-Disposition'] = f'attachment; filename="{export.filename(fmt, compress)}"'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_tasks(self, request):
+        """
+        Import en flux continu : le corps de la requête est du NDJSON (défaut) ou du CSV
+        (?input=csv ou Content-Type text/csv), éventuellement gzippé (Content-Encoding: gzip).
+        Écriture par lots de ?batch_size lignes, un lot par transaction. La réponse NDJSON
+        donne la progression après chaque lot et les erreurs ligne par ligne ; les lots
+        déjà écrits restent importés si le client s'interrompt.
+        """
+        fmt = request.query_params.get('input')
+        if fmt is None:
+            fmt = 'csv' if request.content_type.startswith('text/csv') else 'ndjson'
+        if fmt not in importer.FORMATS:
+            raise ValidationError({'input': f"Formats disponibles : {', '.join(importer.FORMATS)}."})
+        try:
+            batch_size = min(int(request.query_params.get('batch_size', importer.BATCH_SIZE)), 5000)
+        except ValueError:
+            raise ValidationError({'batch_size': "Nombre entier attendu."})
+        if batch_size < 1:
+            raise ValidationError({'batch_size': "Nombre entier positif attendu."})
+
+        owner_id = request.user.id
+        owner = request.query_params.get('gestionnaire')
+        if owner and request.user.is_staff:
+            try:
+                owner_id = User.objects.only('id').get(pk=int(owner)).id
+            except (ValueError, User.DoesNotExist):
+                raise ValidationError({'gestionnaire': "Utilisateur inconnu."})
+
+        lines = request.stream or []
+        if request.META.get('HTTP_CONTENT_ENCODING') == 'gzip':
+            lines = gzip.GzipFile(fileobj=lines)
+        events = importer.run(lines, owner_id, fmt, batch_size)
+        return StreamingHttpResponse(
+            (json.dumps(event, ensure_ascii=False) + '\n' for event in events),
+            content_type='application/x-ndjson',
+        )
+
+    # ---------------- BULK OPERATIONS ----------------
+    # Chaque action valide les éléments un par un, écrit en une seule requête SQL
+    # dans une transaction, et renvoie un résultat par élément.
+
+    @action(detail=False, methods=['post'])
+    def bulk_create(self, request):
+        """Créer plusieurs tâches : {"tasks": [{"task": "...", "done": false}, ...]}"""
+        payload = BulkTaskItemsSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+
+        results, to_create = [], []
+        for index, item in enumerate(payload.validated_data['tasks']):
+            serializer = TaskSerializer(data=item)
+            if serializer.is_valid():
+                to_create.append((index, TaskList(gestionnaire=request.user, **serializer.validated_data)))
+            else:
+                results.append({'index': index, 'status': 'invalid', 'errors': serializer.errors})
+
+        with transaction.atomic():
+            created = TaskList.objects.bulk_create([task for _, task in to_create])
+        results.extend(
+            {'index': index, 'status': 'created', 'id': task.id}
+            for (index, _), task in zip(to_create, created)
+        )
+        results.sort(key=lambda result: result['index'])
+        return Response({'results': results})
+
+    @action(detail=False, methods=['post'])
+    def bulk_update(self, request):
+        """Modifier plusieurs tâches : {"tasks": [{"id": 1, "task": "...", "done": true}, ...]}"""
+        payload = BulkTaskItemsSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        items = payload.validated_data['tasks']
+
+        with transaction.atomic():
+            ids = [item.get('id') for item in items]
+            tasks = self.get_queryset().select_for_update(of=('self',)).in_bulk(
+                [pk for pk in ids if isinstance(pk, int)]
+            )
+            now = timezone.now()
+            results, to_update, fields = [], [], {'updated_at'}
+            for index, item in enumerate(items):
+                task = tasks.pop(item.get('id'), None)
+                if task is None:
+                    results.append({'index': index, 'id': item.get('id'), 'status': 'not_found'})
+                    continue
+                serializer = TaskSerializer(task, data=item, partial=True)
+                if not serializer.is_valid():
+                    results.append({'index': index, 'id': task.id, 'status': 'invalid',
+                                    'errors': serializer.errors})
+                    continue
+                for field, value in serializer.validated_data.items():
+                    setattr(task, field, value)
+                    fields.add(field)
+                task.updated_at = now
+                to_update.append(task)
+                results.append({'index': index, 'id': task.id, 'status': 'updated'})
+
+            if to_update:
+                TaskList.objects.bulk_update(to_update, sorted(fields))
+        return Response({'results': results})
+
+    @action(detail=False, methods=['post'])
+    def bulk_toggle(self, request):
+        """Changer le statut de plusieurs tâches : {"ids": [1, 2], "done": true}"""
+        payload = BulkTaskToggleSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        ids = payload.validated_data['ids']
+
+        with transaction.atomic():
+            queryset = self.get_queryset().filter(id__in=ids)
+            found = set(queryset.values_list('id', flat=True))
+            queryset.update(done=payload.validated_data['done'], updated_at=timezone.now())
+        return Response({'results': [
+            {'id': pk, 'status': 'updated' if pk in found else 'not_found'} for pk in ids
+        ]})
+
+    @action(detail=False, methods=['post'])
+    def bulk_delete(self, request):
+        """Supprimer plusieurs tâches : {"ids": [1, 2, 3]}"""
+        payload = BulkTaskIdsSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        ids = payload.validated_data['ids']
+
+        with transaction.atomic():
+            queryset = self.get_queryset().filter(id__in=ids)
+            found = set(queryset.values_list('id', flat=True))
+            queryset.delete()
+        return Response({'results': [
+            {'id': pk, 'status': 'deleted' if pk in found else 'not_found'} for pk in ids
+        ]})
+
+    @action(detail=False, methods=['post'])
+    def restore(self, request):
+        """Restaurer des tâches archivées : {"ids": [1, 2, 3]}"""
+        payload = BulkTaskIdsSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        ids = payload.validated_data['ids']
+
+        restored = set(archive.restore(self.get_archived_queryset().filter(id__in=ids)))
+        return Response({'results': [
+            {'id': pk, 'status': 'restored' if pk in restored else 'not_found'} for pk in ids
+        ]})
+
+    def _set_done(self, done, message):
+        """Mise à jour atomique du statut, sans relire la tâche avant l'écriture"""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            pk = int(self.kwargs[lookup_url_kwarg])
+        except ValueError:
+            raise NotFound()
+        user = self.request.user
+        result = self.get_queryset().set_done(pk, done, owner_id=None if user.is_staff else user.id)
+        if result is None:
+            raise NotFound()
+        done, updated_at = result
+        return Response({
+            'status': message,
+            'id': pk,
+            'done': done,
+            'updated_at': DateTimeField(format=TaskReadSerializer.datetime_format).to_representation(updated_at),
+        })
+
     @action(detail=True, methods=['post'])
     def mark_complete(self, request, pk=None):
         """Marquer une tâche comme terminée"""
-        task = self.get_object()
-        task.done = True
-        task.save()
-        return Response({'status': 'Tâche terminée'})
+        return self._set_done(True, 'Tâche terminée')
 
     @action(detail=True, methods=['post'])
     def mark_pending(self, request, pk=None):
         """Marquer une tâche comme en attente"""
-        task = self.get_object()
-        task.done = False
-        task.save()
-        return Response({'status': 'Tâche en attente'})
+        return self._set_done(False, 'Tâche en attente')
 
 
 # ---------------- CONTACT FORM VIEW ----------------
 
 class ContactView(APIView):
-    """API pour le formulaire de contact"""
+    """
+    API pour le formulaire de contact.
+    Le message est placé dans la boîte d'envoi (outbox) et envoyé en arrière-plan.
+    """
     permission_classes = []  # public access
 
     def post(self, request):
@@ -57,16 +464,12 @@ class ContactView(APIView):
             subject = serializer.validated_data['subject']
             message = serializer.validated_data['message']
 
-            try:
-                send_mail(
-                    f"Contact Form: {subject}",
-                    f"From: {name} <{email}>\n\nMessage:\n{message}",
-                    settings.DEFAULT_FROM_EMAIL,
-                    [settings.DEFAULT_FROM_EMAIL],  # admin email
-                    fail_silently=False,
-                )
-                return Response({"success": "Message envoyé avec succès!"}, status=status.HTTP_200_OK)
-            except Exception as e:
-                return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            outbox.enqueue(
+                f"Contact Form: {subject}",
+                f"From: {name} <{email}>\n\nMessage:\n{message}",
+                [settings.DEFAULT_FROM_EMAIL],  # admin email
+                reply_to=email,
+            )
+            return Response({"success": "Message envoyé avec succès!"}, status=status.HTTP_202_ACCEPTED)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
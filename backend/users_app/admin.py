@@ -1,3 +1,39 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.contrib.auth.models import User
+from todolist_app import purge
+from todolist_app.models import TaskList
 
-# Register your models here.
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class UserAdmin(BaseUserAdmin):
+    """Suppression des utilisateurs par lots (voir todolist_app/purge.py)"""
+
+    def get_deleted_objects(self, objs, request):
+        """Compter les tâches au lieu de les charger toutes pour la page de confirmation"""
+        users = list(objs)
+        tasks = {user.pk: purge.count_tasks(user.pk) for user in users}
+        to_delete = [f"{user} : {tasks[user.pk]} tâche(s)" for user in users]
+        model_count = {
+            User._meta.verbose_name_plural: len(users),
+            TaskList._meta.verbose_name_plural: sum(tasks.values()),
+        }
+        perms_needed = set() if self.has_delete_permission(request) else {User._meta.verbose_name}
+        return to_delete, model_count, perms_needed, []
+
+    def delete_model(self, request, obj):
+        self._delete_users(request, [obj])
+
+    def delete_queryset(self, request, queryset):
+        self._delete_users(request, queryset)
+
+    def _delete_users(self, request, users):
+        queued = [user.username for user in users if purge.delete_user(user) is not None]
+        if queued:
+            self.message_user(
+                request,
+                f"Compte(s) désactivé(s), suppression des tâches en arrière-plan : {', '.join(queued)}.",
+                messages.WARNING,
+            )
@@ -4,3 +4,17 @@ from django.apps import AppConfig
 class UsersAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users_app'
+
+    def ready(self):
+        from django.contrib.auth.models import User
+        from django.db.models.signals import post_delete, post_save
+
+        post_save.connect(_invalidate_cached_user, sender=User, dispatch_uid='users_app.cached_user_save')
+        post_delete.connect(_invalidate_cached_user, sender=User, dispatch_uid='users_app.cached_user_delete')
+
+
+def _invalidate_cached_user(sender, instance, **kwargs):
+    """Changes to a user (is_active, is_staff, password...) apply to the next request"""
+    from .authentication import invalidate_user
+
+    invalidate_user(instance.pk)
@@ -0,0 +1,245 @@
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router
+from django.http import JsonResponse
+from django.utils.translation import gettext_lazy as _
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException, NotAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+# What is cached of a user: no password hash, no profile
+CACHED_USER_FIELDS = ('id', 'username', 'is_active', 'is_staff', 'is_superuser')
+
+
+def get_cache():
+    return caches[getattr(settings, 'JWT_USER_CACHE_ALIAS', 'default')]
+
+
+def _generation_key(user_id):
+    return f'auth:user-generation:{user_id}'
+
+
+def invalidate_user(user_id):
+    """Drop every cached copy of this user (all tokens)"""
+    cache = get_cache()
+    try:
+        cache.incr(_generation_key(user_id))
+    except ValueError:
+        cache.add(_generation_key(user_id), time.time_ns(), timeout=None)
+
+
+def _profile_key(user_id):
+    return f'auth:user-profile:{user_id}'
+
+
+def get_cached_profile(user_id, load):
+    """
+    load() (the profile data of the user) from the cache, in its own entry so the
+    JWT user entries stay small. Invalidated with the cached user (invalidate_user).
+    """
+    cache = get_cache()
+    found = cache.get_many([_profile_key(user_id), _generation_key(user_id)])
+    generation = found.get(_generation_key(user_id))
+    entry = found.get(_profile_key(user_id))
+    if entry is not None and generation is not None and entry[0] == generation:
+        return entry[1]
+
+    if generation is None:
+        cache.add(_generation_key(user_id), time.time_ns(), timeout=None)
+        generation = cache.get(_generation_key(user_id))
+    # Tagged with the generation read before loading: a save in between invalidates it
+    profile = load()
+    cache.set(_profile_key(user_id), (generation, profile), getattr(settings, 'JWT_USER_CACHE_TIMEOUT', 60))
+    return profile
+
+
+async def aget_cached_profile(user_id, load):
+    """get_cached_profile() with the async cache API; load is a coroutine function"""
+    cache = get_cache()
+    found = await cache.aget_many([_profile_key(user_id), _generation_key(user_id)])
+    generation = found.get(_generation_key(user_id))
+    entry = found.get(_profile_key(user_id))
+    if entry is not None and generation is not None and entry[0] == generation:
+        return entry[1]
+
+    if generation is None:
+        await cache.aadd(_generation_key(user_id), time.time_ns(), timeout=None)
+        generation = await cache.aget(_generation_key(user_id))
+    profile = await load()
+    await cache.aset(_profile_key(user_id), (generation, profile), getattr(settings, 'JWT_USER_CACHE_TIMEOUT', 60))
+    return profile
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that reads the user from a short-lived cache instead of
+    running a SELECT on auth_user for every request.
+    Entries are keyed by user id and token issue time (iat) and hold the
+    CACHED_USER_FIELDS only; the user is rebuilt with the other fields deferred
+    (loaded on access, and left alone by save()). Saving or deleting the user
+    invalidates all of them (see users_app.apps).
+    """
+
+    def _keys(self, user_id, validated_token):
+        return f"auth:user-fields:{user_id}:{validated_token.get('iat')}", _generation_key(user_id)
+
+    def _cached_fields(self):
+        # In model order, as from_db() expects them
+        return [field.attname for field in self.user_model._meta.concrete_fields if field.attname in CACHED_USER_FIELDS]
+
+    def _entry(self, generation, user):
+        return generation, tuple(getattr(user, field) for field in self._cached_fields())
+
+    def _rebuild(self, values):
+        return self.user_model.from_db(router.db_for_read(self.user_model), self._cached_fields(), values)
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        cache = get_cache()
+        entry_key, generation_key = self._keys(user_id, validated_token)
+        found = cache.get_many([entry_key, generation_key])
+        generation = found.get(generation_key)
+        entry = found.get(entry_key)
+        if entry is not None and generation is not None and entry[0] == generation:
+            return self._rebuild(entry[1])
+
+        if generation is None:
+            # Start from the clock so a lost generation never matches old entries
+            cache.add(generation_key, time.time_ns(), timeout=None)
+            generation = cache.get(generation_key)
+
+        # Full lookup: also checks is_active and token revocation
+        user = super().get_user(validated_token)
+        cache.set(entry_key, self._entry(generation, user), getattr(settings, 'JWT_USER_CACHE_TIMEOUT', 60))
+        return user
+
+    # ---------------- ASYNC VIEWS ----------------
+
+    async def aauthenticate(self, request):
+        """authenticate() for async views: (user, token), or None without a JWT header"""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        """get_user() with the async cache and ORM APIs"""
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        cache = get_cache()
+        entry_key, generation_key = self._keys(user_id, validated_token)
+        found = await cache.aget_many([entry_key, generation_key])
+        generation = found.get(generation_key)
+        entry = found.get(entry_key)
+        if entry is not None and generation is not None and entry[0] == generation:
+            return self._rebuild(entry[1])
+
+        if generation is None:
+            await cache.aadd(generation_key, time.time_ns(), timeout=None)
+            generation = await cache.aget(generation_key)
+
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        # Same checks as JWTAuthentication.get_user
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        await cache.aset(entry_key, self._entry(generation, user), getattr(settings, 'JWT_USER_CACHE_TIMEOUT', 60))
+        return user
+
+
+class EventsToken(AccessToken):
+    """
+    Short-lived token that only opens the event stream (/api/tasks/events/).
+    It travels in the query string, where proxies and servers log it: it expires
+    after TASK_EVENTS_TOKEN_LIFETIME and header authentication rejects it
+    (token_type 'events', not 'access').
+    """
+    token_type = 'events'
+
+    @property
+    def lifetime(self):
+        return getattr(settings, 'TASK_EVENTS_TOKEN_LIFETIME', timedelta(minutes=1))
+
+
+class QueryTokenJWTAuthentication(CachedJWTAuthentication):
+    """
+    EventsToken passed as ?access_token=, for clients that cannot send headers
+    (EventSource). Only enabled on the event stream; access tokens are refused.
+    """
+    query_param = 'access_token'
+
+    def authenticate(self, request):
+        raw_token = request.query_params.get(self.query_param)
+        if not raw_token:
+            return None
+        validated_token = self.get_validated_token(raw_token.encode())
+        return self.get_user(validated_token), validated_token
+
+    def get_validated_token(self, raw_token):
+        try:
+            return EventsToken(raw_token)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+
+
+def api_json_response(data, status=200):
+    """JsonResponse encoded like DRF's JSONRenderer (compact, UTF-8)"""
+    return JsonResponse(data, status=status, safe=False, json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')})
+
+
+def api_exception_response(exc):
+    """JSON response for a DRF APIException, as DRF's exception handler renders it"""
+    detail = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+    return api_json_response(detail, status=exc.status_code)
+
+
+def async_jwt_required(view):
+    """
+    Async view decorator: authenticates the JWT like the DRF views do and sets
+    request.user/request.auth, or answers 401 with the same body. APIExceptions
+    raised by the view are rendered like DRF does.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        authenticator = CachedJWTAuthentication()
+        try:
+            result = await authenticator.aauthenticate(request)
+            if result is None:
+                raise NotAuthenticated()
+        except APIException as exc:
+            response = api_exception_response(exc)
+            response['WWW-Authenticate'] = authenticator.authenticate_header(request)
+            return response
+
+        request.user, request.auth = result
+        try:
+            return await view(request, *args, **kwargs)
+        except APIException as exc:
+            return api_exception_response(exc)
+
+    return csrf_exempt(wrapper)
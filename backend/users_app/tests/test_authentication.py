@@ -0,0 +1,67 @@
+import pickle
+
+import pytest
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from users_app.authentication import CachedJWTAuthentication, get_cache
+
+
+@pytest.mark.django_db
+def test_jwt_user_is_cached_until_the_user_changes(django_assert_num_queries):
+    user = User.objects.create_user(username="quentin", password="pwd123")
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+
+    assert client.get(reverse("me")).data["est_admin"] is False
+    with django_assert_num_queries(0):  # user and profile both cached
+        assert client.get(reverse("me")).status_code == 200
+
+    staff = User.objects.create_user(username="rita", password="pwd123", is_staff=True)
+    admin = APIClient()
+    admin.force_authenticate(user=staff)
+    admin.patch(reverse("user-detail", args=[user.id]), {"is_staff": True}, format="json")
+    assert client.get(reverse("me")).data["est_admin"] is True
+
+    admin.patch(reverse("user-detail", args=[user.id]), {"is_active": False}, format="json")
+    assert client.get(reverse("me")).status_code == 401
+
+
+@pytest.mark.django_db
+def test_cached_user_has_no_password_hash(django_assert_num_queries):
+    user = User.objects.create_user(username="sami", password="pwd123", email="sami@example.com")
+    token = AccessToken.for_user(user)
+    authentication = CachedJWTAuthentication()
+    authentication.get_user(token)
+
+    entry_key, _ = authentication._keys(user.id, token)
+    entry = pickle.dumps(get_cache().get(entry_key))
+    assert user.password.encode() not in entry and b"sami@example.com" not in entry
+
+    with django_assert_num_queries(0):
+        cached = authentication.get_user(token)
+    assert (cached.pk, cached.username, cached.is_active, cached.is_staff) == (user.pk, "sami", True, False)
+    assert cached.get_deferred_fields() >= {"password", "email"}
+    cached.save()  # only the cached fields
+    user.refresh_from_db()
+    assert user.check_password("pwd123") and user.email == "sami@example.com"
+
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    assert client.get(reverse("me")).data["email"] == "sami@example.com"
+
+
+@pytest.mark.django_db
+def test_cached_profile_is_invalidated_when_the_user_changes(django_assert_num_queries):
+    user = User.objects.create_user(username="tom", password="pwd123", email="tom@example.com")
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+    assert client.get(reverse("me")).data["email"] == "tom@example.com"
+
+    user.email = "thomas@example.com"
+    user.save()
+    with django_assert_num_queries(2):  # user lookup and profile, once
+        assert client.get(reverse("me")).data["email"] == "thomas@example.com"
+    with django_assert_num_queries(0):
+        assert client.get(reverse("me")).data["email"] == "thomas@example.com"
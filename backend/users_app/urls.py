@@ -1,11 +1,12 @@
 # users_app/urls.py
 from django.urls import path
-from .views import RegisterView, MeView, UserListView, UserDetailView
+from .views import RegisterView, MeView, UserListView, UserDetailView, async_me_view
 
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('me/', MeView.as_view(), name='me'),
+    path('async/me/', async_me_view, name='async-me'),
     path('users/', UserListView.as_view(), name='user-list'),
     path('users/<int:pk>/', UserDetailView.as_view(), name='user-detail'),
 ]
\ No newline at end of file
@@ -1,6 +1,10 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from django.contrib.auth.models import User
+from django.views.decorators.http import require_GET
+from complice_taches.routers import ReplicaReadsMixin
+from todolist_app import purge
+from .authentication import aget_cached_profile, api_json_response, async_jwt_required, get_cached_profile
 from .serializers import RegisterSerializer, UserSerializer
 
 # ---------- INSCRIPTION ----------
@@ -22,22 +26,46 @@ class RegisterView(generics.CreateAPIView):
         return super().create(request, *args, **kwargs)
 
 # ---------- UTILISATEUR ACTUEL ----------
-class MeView(generics.RetrieveAPIView):
+ME_FIELDS = ('username', 'email', 'first_name', 'last_name', 'is_staff')
+
+
+class MeView(ReplicaReadsMixin, generics.RetrieveAPIView):
     """Retourne les informations de l'utilisateur connecté"""
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
-        user = request.user
-        return Response({
-            "nom_utilisateur": user.username,
-            "email": user.email,
-            "prenom": user.first_name,
-            "nom": user.last_name,
-            "est_admin": user.is_staff
-        })
+        # L'utilisateur authentifié (en cache) n'a pas les champs du profil :
+        # ils ont leur propre entrée, invalidée en même temps que lui
+        user_id = request.user.pk
+        return Response(get_cached_profile(
+            user_id, lambda: me_data(User.objects.only(*ME_FIELDS).get(pk=user_id))
+        ))
+
+
+def me_data(user):
+    return {
+        "nom_utilisateur": user.username,
+        "email": user.email,
+        "prenom": user.first_name,
+        "nom": user.last_name,
+        "est_admin": user.is_staff
+    }
+
+
+@require_GET
+@async_jwt_required
+async def async_me_view(request):
+    """MeView en version async (déploiement ASGI) : aucun thread occupé par la requête"""
+    user_id = request.user.pk
+
+    async def load():
+        return me_data(await User.objects.only(*ME_FIELDS).aget(pk=user_id))
+
+    return api_json_response(await aget_cached_profile(user_id, load))
 
 # ---------- CRUD UTILISATEURS (Admin uniquement) ----------
-class UserListView(generics.ListCreateAPIView):
+class UserListView(ReplicaReadsMixin, generics.ListCreateAPIView):
+    """Liste (lue sur un réplica s'il y en a un) et création des utilisateurs"""
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAdminUser]
@@ -46,3 +74,14 @@ class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAdminUser]
+
+    def destroy(self, request, *args, **kwargs):
+        """
+        Supprime l'utilisateur et ses tâches, par lots. Un compte avec beaucoup de
+        tâches est désactivé tout de suite et supprimé en arrière-plan : la réponse
+        202 donne l'avancement (répéter la requête pour le suivre).
+        """
+        deletion = purge.delete_user(self.get_object())
+        if deletion is None:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(deletion.as_dict(), status=status.HTTP_202_ACCEPTED)
@@ -1,4 +1,4 @@
-import { apiCall } from '../axiosInstance';
+import axiosInstance, { apiCall } from '../axiosInstance';
 
 export const taskApi = {
     // Get tasks with pagination
@@ -24,4 +24,20 @@ export const taskApi = {
 
     // Mark task as pending
     markPending: (id) => apiCall('post', `tasks/${id}/mark_pending/`),
-};
\ No newline at end of file
+
+    // Live change events (Server-Sent Events). EventSource cannot send headers,
+    // so a short-lived events token goes in the query string: ask for a new one
+    // each time the stream is opened. `since` resumes after the last event id.
+    openEvents: async (since) => {
+        const result = await apiCall('post', 'tasks/events/token/');
+        if (!result.success) {
+            return null;
+        }
+        const url = new URL('tasks/events/', axiosInstance.defaults.baseURL);
+        url.searchParams.set('access_token', result.data.token);
+        if (since) {
+            url.searchParams.set('since', since);
+        }
+        return new EventSource(url.toString());
+    },
+};
@@ -1,10 +1,11 @@
-import { useState, useCallback } from 'react';
+import { useState, useCallback, useEffect } from 'react';
 import { taskApi } from '../api/tasks';
 
 /**
  * Custom hook for task management
+ * @param {Object} options - { live: true } keeps the list in sync with /tasks/events/
  */
-export const useTasks = () => {
+export const useTasks = ({ live = false } = {}) => {
     const [tasks, setTasks] = useState([]);
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState(null);
@@ -152,7 +153,13 @@ export const useTasks = () => {
                 : await taskApi.markComplete(task.id);
 
             if (result.success) {
-                await fetchTasks(); // Refresh task list
+                // The toggle returns the new state: update the task in place
+                const { done, updated_at } = result.data;
+                setTasks((current) => current.map((item) => (
+                    item.id === task.id
+                        ? { ...item, done, updated_at, status: done ? 'Completed' : 'Pending' }
+                        : item
+                )));
                 return {
                     success: true,
                     message: `Task marked as ${task.done ? 'pending' : 'complete'}`,
@@ -170,6 +177,56 @@ export const useTasks = () => {
         }
     };
 
+    /**
+     * Live updates: apply the server's change events instead of polling
+     */
+    useEffect(() => {
+        if (!live || typeof EventSource === 'undefined') {
+            return undefined;
+        }
+        let source = null;
+        let lastEventId = null;
+        let closed = false;
+        const parse = (event) => {
+            lastEventId = event.lastEventId || lastEventId;
+            return JSON.parse(event.data);
+        };
+
+        const open = async () => {
+            source = await taskApi.openEvents(lastEventId);
+            if (closed || !source) {
+                source?.close();
+                return;
+            }
+            source.addEventListener('updated', (event) => {
+                const task = parse(event);
+                setTasks((current) => current.map((item) => (item.id === task.id ? task : item)));
+            });
+            source.addEventListener('deleted', (event) => {
+                const { id } = parse(event);
+                setTasks((current) => current.filter((item) => item.id !== id));
+            });
+            // New tasks change the pages: reload the current one
+            source.addEventListener('created', (event) => {
+                parse(event);
+                fetchTasks();
+            });
+            source.addEventListener('reset', () => fetchTasks());
+            // The events token expires quickly: reopen with a new one when a reconnection is refused
+            source.onerror = () => {
+                if (source.readyState === EventSource.CLOSED && !closed) {
+                    setTimeout(open, 3000);
+                }
+            };
+        };
+        open();
+
+        return () => {
+            closed = true;
+            source?.close();
+        };
+    }, [live, fetchTasks]);
+
     return {
         // State
         tasks,